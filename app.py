@@ -3,6 +3,15 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 
+# Session DataFrames are shared read-only across pages and reruns. Copy-on-write
+# (always on from pandas 3.0) guarantees that derived frames never write through
+# to them, so pages read without defensive copies.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+from application_pages.lineage import LineageGraph
+from application_pages.provenance_store import create_provenance_store
+
 st.set_page_config(page_title="QuLab", layout="wide")
 st.sidebar.image("https://www.quantuniversity.com/assets/img/logo5.jpg")
 st.sidebar.divider()
@@ -20,13 +29,31 @@ if "metadata" not in st.session_state:
                  "Last Updated", "Provenance Log"]
     )
 if "provenance_logs" not in st.session_state:
-    st.session_state.provenance_logs = pd.DataFrame(
-        columns=["Timestamp", "Action", "Description", "User"]
+    st.session_state.provenance_logs = create_provenance_store()
+if "lineage" not in st.session_state:
+    st.session_state.lineage = LineageGraph()
+if "risk_register" not in st.session_state:
+    st.session_state.risk_register = pd.DataFrame(
+        columns=[
+            "Risk ID", "Risk Name", "Category", "Description",
+            "Likelihood", "Impact", "Risk Score", "Mitigation Strategy",
+            "Status", "Owner", "Date Identified"
+        ]
     )
 if "bias_metrics" not in st.session_state:
     st.session_state.bias_metrics = {}
+if "logged_bias_results" not in st.session_state:
+    st.session_state.logged_bias_results = set()
 if "current_page" not in st.session_state:
     st.session_state.current_page = "1. Data Ingestion & Overview"
+if "cleaning_job" not in st.session_state:
+    st.session_state.cleaning_job = None
+
+# Swap in a background cleaning job that finished since the last run
+from application_pages.cleaning_jobs import collect_cleaning_job
+cleaning_message = collect_cleaning_job()
+if cleaning_message is not None:
+    st.toast(cleaning_message)
 
 # List of page options
 page_options = [
@@ -80,6 +107,8 @@ elif page == "8. Audit Report & Insights":
     from application_pages.page_8_audit_report import main
     main()
 
+# Persist any provenance entries still buffered by this run
+st.session_state.provenance_logs.flush()
 
 # License
 st.caption('''
@@ -0,0 +1,141 @@
+import io
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+import streamlit as st
+from matplotlib.figure import Figure
+
+from application_pages.profiling import dataset_fingerprint
+
+
+# Fliers drawn per box; beyond this the most extreme ones plus an even sample are kept
+MAX_FLIERS = 500
+
+
+def box_stats(values, label, whis=1.5, max_fliers=MAX_FLIERS):
+    """Tukey box statistics for `Axes.bxp` from raw values (NaNs are ignored)."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+    q1, med, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - whis * iqr) & (values <= q3 + whis * iqr)]
+    fliers = values[(values < q1 - whis * iqr) | (values > q3 + whis * iqr)]
+    if len(fliers) > max_fliers:
+        fliers = np.sort(fliers)
+        keep = np.unique(np.concatenate([
+            np.arange(max_fliers // 4), len(fliers) - 1 - np.arange(max_fliers // 4),
+            np.linspace(0, len(fliers) - 1, max_fliers // 2).astype(int)]))
+        fliers = fliers[keep]
+    return {
+        "label": label,
+        "med": med,
+        "q1": q1,
+        "q3": q3,
+        "whislo": inside.min() if len(inside) else q1,
+        "whishi": inside.max() if len(inside) else q3,
+        "fliers": fliers,
+    }
+
+
+def grouped_box_stats(df, value_col, group_col=None, whis=1.5):
+    """Box statistics for `value_col`, optionally one box per `group_col` value."""
+    if group_col is None:
+        stats = box_stats(df[value_col].to_numpy(dtype=np.float64, na_value=np.nan), value_col, whis)
+        return [stats] if stats else []
+    values = df[value_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    codes, groups = pd.factorize(df[group_col], sort=True)
+    order = np.argsort(codes, kind="stable")
+    boundaries = np.searchsorted(codes[order], np.arange(len(groups) + 1))
+    stats = []
+    for i, group in enumerate(groups):
+        group_stats = box_stats(values[order[boundaries[i]:boundaries[i + 1]]], str(group), whis)
+        if group_stats:
+            stats.append(group_stats)
+    return stats
+
+
+def _render_png(draw, figsize):
+    # A standalone Figure is not registered with pyplot, so nothing outlives this call
+    fig = Figure(figsize=figsize)
+    try:
+        ax = fig.subplots()
+        draw(ax)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=100)
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+
+def _draw_box(ax, stats, palette, title, xlabel, ylabel, orientation):
+    colors = sns.color_palette(palette, max(len(stats), 1))
+    artists = ax.bxp(stats, orientation=orientation, patch_artist=True, widths=0.6,
+                     flierprops={"marker": "d", "markersize": 4, "markerfacecolor": "0.3", "markeredgecolor": "0.3"},
+                     medianprops={"color": "0.2"})
+    for patch, color in zip(artists["boxes"], colors):
+        patch.set_facecolor(color)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+
+
+def _draw_bar(ax, labels, values, palette, title, xlabel, ylabel, ylim, annotate, rotation):
+    positions = np.arange(len(labels))
+    ax.bar(positions, values, color=sns.color_palette(palette, max(len(labels), 1)))
+    ax.set_xticks(positions)
+    ax.set_xticklabels(labels, rotation=rotation)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    if ylim is not None:
+        ax.set_ylim(*ylim)
+    if annotate:
+        for position, value in zip(positions, values):
+            ax.text(position, value + 0.02, f"{value:.3f}", ha="center", va="bottom", fontsize=10)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _box_chart_png(fingerprint, value_col, group_col, options, _df):
+    options = dict(options)
+    stats = grouped_box_stats(_df, value_col, group_col)
+    return _render_png(
+        lambda ax: _draw_box(ax, stats, options["palette"], options["title"], options["xlabel"],
+                             options["ylabel"], options["orientation"]),
+        options["figsize"])
+
+
+def box_chart(df, value_col, group_col=None, title="", xlabel="", ylabel="", palette="rocket",
+              figsize=(8, 4)):
+    """PNG box plot from server-side box statistics, cached by (dataset hash, columns, options)."""
+    options = (("palette", palette), ("title", title), ("xlabel", xlabel), ("ylabel", ylabel),
+               ("orientation", "vertical" if group_col is not None else "horizontal"),
+               ("figsize", tuple(figsize)))
+    return _box_chart_png(dataset_fingerprint(df), value_col, group_col, options, df)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def bar_chart(labels, values, title="", xlabel="", ylabel="", palette="viridis", ylim=None,
+              annotate=False, rotation=0, figsize=(10, 6)):
+    """PNG bar chart from pre-aggregated values, cached by the aggregates and options."""
+    labels = [str(label) for label in labels]
+    values = [float(value) for value in values]
+    return _render_png(
+        lambda ax: _draw_bar(ax, labels, values, palette, title, xlabel, ylabel, ylim, annotate, rotation),
+        figsize)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _count_chart_png(fingerprint, column, options, _df):
+    counts = _df[column].value_counts(sort=False).sort_index()
+    return bar_chart(counts.index.tolist(), counts.tolist(), **dict(options))
+
+
+def count_chart(df, column, title="", xlabel="", ylabel="", palette="coolwarm", figsize=(8, 5)):
+    """PNG count plot of one column, cached by (dataset hash, column, options)."""
+    options = (("title", title), ("xlabel", xlabel), ("ylabel", ylabel), ("palette", palette),
+               ("figsize", tuple(figsize)))
+    return _count_chart_png(dataset_fingerprint(df), column, options, df)
@@ -0,0 +1,503 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from application_pages.column_parallel import PARALLEL_BACKENDS, map_column_groups
+
+
+IMPUTATION_STRATEGIES = ["Median", "Mean", "Mode", "Remove Rows"]
+GROUP_IMPUTATION_STRATEGIES = ["Median", "Mean"]
+# Groups with fewer observed values than this fall back to the global statistic
+MIN_GROUP_SIZE = 30
+OUTLIER_STRATEGIES = ["None", "Cap Outliers (IQR Method)", "Remove Outliers (IQR Method)",
+                      "Remove Outliers (IQR Method, Sequential)"]
+
+
+def _to_builtin(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _fill_value(series, value):
+    # Cast to the column dtype first so float32 columns get the same value fillna would store
+    if pd.api.types.is_float_dtype(series.dtype):
+        return np.float64(np.asarray(value, dtype=series.dtype))
+    return value
+
+
+def _is_nan(value):
+    return isinstance(value, float) and np.isnan(value)
+
+
+def _group_key(key):
+    return tuple(_to_builtin(value) for value in (key if isinstance(key, tuple) else (key,)))
+
+
+def _native_numeric(series):
+    """Whether a column is a plain NumPy int/float column the column kernels can fill in place."""
+    return isinstance(series.dtype, np.dtype) and series.dtype.kind in "iuf"
+
+
+def _filled_quantiles(observed, fill, n_fill, quantiles):
+    """`np.quantile` (linear) of sorted `observed` values with `n_fill` copies of `fill` merged in.
+
+    The filled column is never materialized: the two order statistics around
+    each quantile are read from `observed` or are `fill` itself.
+    """
+    n = len(observed) + n_fill
+    if n == 0:
+        return (np.nan,) * len(quantiles)
+    position = int(np.searchsorted(observed, fill)) if n_fill else len(observed)
+
+    def order_statistic(i):
+        if i < position:
+            return observed[i]
+        return fill if i < position + n_fill else observed[i - n_fill]
+
+    result = []
+    for q in quantiles:
+        index = (n - 1) * q
+        below = int(np.floor(index))
+        gamma = index - below
+        a, b = np.float64(order_statistic(below)), np.float64(order_statistic(min(below + 1, n - 1)))
+        # Same interpolation as numpy's _lerp, so the result matches np.quantile bit for bit
+        diff = b - a
+        result.append(float(b - diff * (1 - gamma) if gamma >= 0.5 else a + diff * gamma))
+    return tuple(result)
+
+
+def _fit_columns(group, inputs, shared, outputs, specs):
+    """Fit kernel: (fill value, quartiles) per column, from the rows in the shared `keep` mask.
+
+    Each spec is (statistic, fill, dtype, quartiles): the statistic ("median",
+    "mean" or None) is computed on the column in its own dtype exactly as
+    pandas computes it (a float32 mean accumulates in float32) and rounded
+    through `dtype`; otherwise the given fill is used. Each column is sorted at most
+    once: the median and the quartiles of the imputed column both come from
+    the sorted observed values. With an "imputed" output the imputed column
+    is written back for the caller's sequential bound fitting.
+    """
+    keep = shared.get("keep")
+    results = []
+    for j in group:
+        statistic, fill, dtype, need_quartiles = specs[j]
+        values = inputs["values"][j]
+        missing = np.isnan(values)
+        kept = values if keep is None else values[keep]
+        n_missing = int(missing.sum() if keep is None else missing[keep].sum())
+        n_observed = len(kept) - n_missing
+        observed = np.sort(kept)[:n_observed] if statistic == "median" or need_quartiles else None
+        if statistic == "median":
+            middle = observed[(n_observed - 1) // 2:n_observed // 2 + 1]
+            fill = float(np.asarray(np.mean(middle), dtype=dtype)) if n_observed else np.nan
+        elif statistic == "mean":
+            fill = float(np.asarray(pd.Series(kept, copy=False).mean(), dtype=dtype)) if n_observed else np.nan
+        filled = fill is not None and not np.isnan(fill)
+        if filled:
+            fill = np.float64(np.asarray(fill, dtype=dtype))
+        if "imputed" in outputs:
+            outputs["imputed"][j] = np.where(missing, fill, values) if filled else values
+        quartiles = None
+        if need_quartiles:
+            quartiles = _filled_quantiles(observed, fill, n_missing if filled else 0, [0.25, 0.75])
+        results.append((_to_builtin(fill), quartiles))
+    return results
+
+
+def _transform_columns(group, inputs, shared, outputs, specs):
+    """Transform kernel: fill and cap each column into the "values" output.
+
+    Each spec is (fill, bounds, cap). The output keeps the dtype the caller
+    allocated for the column; bounds are compared in float64 whatever that
+    dtype is. Capped columns return their (lower, upper) counts among rows
+    in the shared `keep` mask; for removal the unmasked outlier flags go to
+    the "outliers" output so the caller can attribute rows to columns in
+    order.
+    """
+    keep = shared["keep"]
+    results = []
+    for j in group:
+        fill, bounds, cap = specs[j]
+        values = inputs["values"][j]
+        out = outputs["values"][j]
+        out[...] = values
+        if fill is not None:
+            out[np.isnan(values)] = fill
+        counts = None
+        if bounds is not None:
+            lower, upper = np.float64(bounds[0]), np.float64(bounds[1])
+            below, above = out < lower, out > upper
+            if cap:
+                counts = (int((below & keep).sum()), int((above & keep).sum()))
+                np.clip(out, lower, upper, out=out)
+            else:
+                outputs["outliers"][j] = below | above
+        elif "outliers" in outputs:
+            outputs["outliers"][j] = False
+        results.append(counts)
+    return results
+
+
+class CleaningPipeline:
+    """Imputation and IQR outlier handling compiled from the page 4 selections.
+
+    `fit()` learns fill values and outlier bounds, `transform()` applies them
+    column by column in a single pass and removes rows with one combined mask.
+    A fitted pipeline round-trips through `to_dict()`/`to_json()`, so identical
+    cleaning can be applied to new data without refitting.
+
+    Fill values are computed on the rows that survive "Remove Rows"
+    imputation. Bounds are computed on imputed values. Outlier removal fits
+    every column's bounds on the same rows and drops rows flagged by any
+    column, so the result does not depend on column order; each column is
+    credited with every row it flags. The "Sequential" variant keeps the
+    original page 4 behaviour: each column's bounds are fitted after earlier
+    columns' outlier rows are removed, and each removed row is credited to the
+    first column that flags it.
+
+    `group_by` maps Median/Mean-imputed numerical columns to the categorical
+    columns whose groups they are imputed within (e.g. LoanAmount by
+    Property_Area). Each distinct key set is grouped once for all of its
+    columns; groups with fewer than `min_group_size` observed values, rows
+    with a missing key and groups unseen at fit time use the global statistic.
+
+    Numerical columns are fitted and transformed by per-column kernels over
+    contiguous column groups. `n_jobs` and `backend` ("thread" or "process")
+    spread the groups over a worker pool; every column is computed the same
+    way whatever the grouping, and results are merged in column order, so the
+    output and report do not depend on the execution settings (which are
+    therefore not part of the serialized pipeline).
+    """
+
+    def __init__(self, imputation_strategies=None, outlier_strategy="None", iqr_multiplier=1.5,
+                 outlier_columns=(), n_jobs=1, backend="thread", group_by=None, min_group_size=MIN_GROUP_SIZE):
+        self.imputation_strategies = dict(imputation_strategies or {})
+        for col, strategy in self.imputation_strategies.items():
+            if strategy not in IMPUTATION_STRATEGIES:
+                raise ValueError(f"Unknown imputation strategy '{strategy}' for column '{col}'.")
+        if outlier_strategy not in OUTLIER_STRATEGIES:
+            raise ValueError(f"Unknown outlier strategy '{outlier_strategy}'.")
+        self.outlier_strategy = outlier_strategy
+        self.iqr_multiplier = float(iqr_multiplier)
+        self.outlier_columns = list(outlier_columns) if outlier_strategy != "None" else []
+        self.group_by = {col: list(keys) for col, keys in (group_by or {}).items() if keys}
+        for col, keys in self.group_by.items():
+            if self.imputation_strategies.get(col) not in GROUP_IMPUTATION_STRATEGIES:
+                raise ValueError(f"Group-aware imputation needs a Median or Mean strategy for column '{col}'.")
+            if col in keys:
+                raise ValueError(f"Column '{col}' cannot be imputed within groups of itself.")
+        self.min_group_size = int(min_group_size)
+        if backend not in PARALLEL_BACKENDS:
+            raise ValueError(f"Unknown parallel backend '{backend}'.")
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.fill_values = {}
+        self.group_fill_values = {}
+        self.bounds = {}
+        self.fitted = False
+
+    @property
+    def drop_missing_columns(self):
+        return [col for col, strategy in self.imputation_strategies.items() if strategy == "Remove Rows"]
+
+    def _keep_mask(self, df):
+        drop_cols = self.drop_missing_columns
+        if not drop_cols:
+            return None
+        return ~df[drop_cols].isna().to_numpy().any(axis=1)
+
+    @property
+    def sequential_removal(self):
+        return self.outlier_strategy == "Remove Outliers (IQR Method, Sequential)"
+
+    def _map_columns(self, kernel, columns, specs, shared, outputs):
+        # Plain NumPy columns are passed as zero-copy views in their own dtype
+        inputs = {"values": [
+            values if isinstance(values, np.ndarray)
+            else values.to_numpy() if _native_numeric(values)
+            else values.to_numpy(dtype=np.float64, na_value=np.nan)
+            for values in columns]}
+        return map_column_groups(kernel, inputs, shared, outputs, (specs,), self.n_jobs, self.backend)
+
+    def _group_key_sets(self):
+        """Group-imputed columns by key set, so each grouping is computed once."""
+        key_sets = {}
+        for col, keys in self.group_by.items():
+            key_sets.setdefault(tuple(keys), []).append(col)
+        return key_sets
+
+    def _fit_group_fills(self, df, keep):
+        self.group_fill_values = {}
+        frame = df if keep is None else df[keep]
+        for keys, cols in self._group_key_sets().items():
+            grouped = frame[list(keys)].groupby(list(keys), observed=True, sort=True)
+            # Rows with a missing key have no group (NaN)
+            codes = grouped.ngroup().to_numpy(dtype=np.float64, na_value=np.nan)
+            groups = [_group_key(key) for key in grouped.size().index]
+            observed = ~np.isnan(codes)
+            codes = np.where(observed, codes, -1).astype(np.intp)
+            values = pd.DataFrame(
+                {col: frame[col].to_numpy(dtype=np.float64, na_value=np.nan)[observed] for col in cols})
+            by_group = values.groupby(codes[observed], sort=True)
+            counts = by_group.count()
+            statistics = {
+                strategy: getattr(by_group[stat_cols], strategy.lower())()
+                for strategy in GROUP_IMPUTATION_STRATEGIES
+                for stat_cols in [[col for col in cols if self.imputation_strategies[col] == strategy]]
+                if stat_cols}
+            for col in cols:
+                dtype = frame[col].dtype if pd.api.types.is_float_dtype(frame[col].dtype) else np.float64
+                # Global fallback from the same rows, so group columns need no separate fitting pass
+                fallback = getattr(frame[col], self.imputation_strategies[col].lower())()
+                self.fill_values[col] = float(np.asarray(fallback, dtype=dtype))
+                column_stats = statistics[self.imputation_strategies[col]][col]
+                self.group_fill_values[col] = {
+                    groups[code]: float(np.asarray(value, dtype=dtype))
+                    for code, value, count in zip(column_stats.index, column_stats.to_numpy(), counts[col].to_numpy())
+                    if count >= self.min_group_size}
+
+    def _group_filled(self, df, keep=None):
+        """Group-imputed columns as float64 arrays, with row group codes shared across each key set.
+
+        Returns (filled, counts); counts are (group-filled, fallback) missing
+        values per column among the rows in `keep`.
+        """
+        filled, counts = {}, {}
+        for keys, cols in self._group_key_sets().items():
+            groups = list(dict.fromkeys(group for col in cols for group in self.group_fill_values[col]))
+            codes = np.full(len(df), -1, dtype=np.intp)
+            if groups:
+                index = pd.MultiIndex.from_tuples(groups, names=list(keys))
+                codes = index.get_indexer(pd.MultiIndex.from_frame(df[list(keys)]))
+            codes[df[list(keys)].isna().to_numpy().any(axis=1)] = -1
+            for col in cols:
+                # Code -1 (missing key, unseen or small group) maps to the trailing NaN slot
+                table = np.array([self.group_fill_values[col].get(group, np.nan) for group in groups] + [np.nan])
+                values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                group_values = table[codes]
+                missing = np.isnan(values) if keep is None else np.isnan(values) & keep
+                in_group = int((missing & ~np.isnan(group_values)).sum())
+                counts[col] = (in_group, int(missing.sum()) - in_group)
+                filled[col] = np.where(np.isnan(values), group_values, values)
+        return filled, counts
+
+    def fit(self, df):
+        keep = self._keep_mask(df)
+
+        def kept(col):
+            return df[col] if keep is None else df[col][keep]
+
+        self.fill_values = {}
+        for col in self.group_by:
+            if not _native_numeric(df[col]):
+                raise ValueError(f"Group-aware imputation needs a numerical column; '{col}' is {df[col].dtype}.")
+        if self.group_by:
+            self._fit_group_fills(df, keep)
+        group_filled, _ = self._group_filled(df)
+
+        kernel_specs = {}
+        for col, strategy in self.imputation_strategies.items():
+            if col in self.group_by:
+                continue
+            if strategy in ("Median", "Mean") and pd.api.types.is_numeric_dtype(df[col].dtype):
+                dtype = df[col].dtype if pd.api.types.is_float_dtype(df[col].dtype) else np.float64
+                kernel_specs[col] = [strategy.lower(), None, np.dtype(dtype).str, False]
+            elif strategy == "Median":
+                self.fill_values[col] = _to_builtin(kept(col).median())
+            elif strategy == "Mean":
+                self.fill_values[col] = _to_builtin(kept(col).mean())
+            elif strategy == "Mode":
+                self.fill_values[col] = _to_builtin(kept(col).mode()[0])
+
+        for col in self.outlier_columns:
+            if col not in kernel_specs:
+                dtype = df[col].dtype if pd.api.types.is_float_dtype(df[col].dtype) else np.float64
+                kernel_specs[col] = [None, self.fill_values.get(col), np.dtype(dtype).str, False]
+            # Capping and joint removal fit every column on the same rows, so quartiles are independent
+            kernel_specs[col][3] = not self.sequential_removal
+
+        removal = self.sequential_removal and bool(self.outlier_columns)
+        columns = list(kernel_specs)
+        results, outputs = self._map_columns(
+            _fit_columns, [group_filled.get(col, df[col]) for col in columns],
+            [tuple(kernel_specs[col]) for col in columns],
+            {} if keep is None else {"keep": keep}, {"imputed": np.float64} if removal else {})
+
+        fitted = dict(zip(columns, results))
+        for col, strategy in self.imputation_strategies.items():
+            if col in fitted and strategy in ("Median", "Mean") and col not in self.group_by:
+                self.fill_values[col] = fitted[col][0]
+
+        self.bounds = {}
+        if removal:
+            alive = None
+            for col in self.outlier_columns:
+                values = outputs["imputed"][columns.index(col)]
+                values = values if keep is None else values[keep]
+                alive = np.ones(len(values), dtype=bool) if alive is None else alive
+                q1, q3 = np.nanquantile(values[alive], [0.25, 0.75]) if alive.any() else (np.nan, np.nan)
+                bounds = self._set_bounds(col, q1, q3)
+                if bounds is not None:
+                    alive &= ~((values < bounds[0]) | (values > bounds[1]))
+        else:
+            for col in self.outlier_columns:
+                self._set_bounds(col, *fitted[col][1])
+        self.fitted = True
+        return self
+
+    def _set_bounds(self, col, q1, q3):
+        if np.isnan(q1) or np.isnan(q3):
+            # No observed values: leave the column unbounded rather than clip to NaN
+            return None
+        iqr = q3 - q1
+        bounds = (float(q1 - self.iqr_multiplier * iqr), float(q3 + self.iqr_multiplier * iqr))
+        self.bounds[col] = bounds
+        return bounds
+
+    def transform(self, df):
+        """Apply the fitted cleaning; returns (cleaned_df, report)."""
+        if not self.fitted:
+            raise ValueError("CleaningPipeline must be fitted before transform().")
+        report = {"Rows In": len(df), "Removed Missing": {}, "Group Imputed": {}, "Capped": {},
+                  "Removed Outliers": {}, "Removed Outlier Rows": 0}
+
+        keep = np.ones(len(df), dtype=bool)
+        for col in self.drop_missing_columns:
+            missing = df[col].isna().to_numpy() & keep
+            report["Removed Missing"][col] = int(missing.sum())
+            keep &= ~missing
+        group_filled, report["Group Imputed"] = self._group_filled(df, keep)
+
+        capping = self.outlier_strategy == "Cap Outliers (IQR Method)"
+        kernel_columns = list(self.outlier_columns) + [
+            col for col in self.fill_values
+            if col not in self.bounds and col in df.columns and _native_numeric(df[col])]
+        specs = [(None if col not in self.fill_values else _fill_value(df[col], self.fill_values[col]),
+                  self.bounds.get(col), capping) for col in kernel_columns]
+        # Capped columns become float64 like the bounds; others stay in their own dtype
+        outputs = {"values": [
+            np.float64 if (capping and col in self.bounds) or not _native_numeric(df[col]) else df[col].dtype
+            for col in kernel_columns]}
+        if self.outlier_columns and not capping:
+            outputs["outliers"] = np.bool_
+        results, outputs = self._map_columns(
+            _transform_columns, [group_filled.get(col, df[col]) for col in kernel_columns], specs,
+            {"keep": keep.copy()}, outputs)
+
+        n_outlier_columns = len(self.outlier_columns)
+        if capping:
+            report["Capped"] = dict(zip(self.outlier_columns, results[:n_outlier_columns]))
+        elif self.sequential_removal:
+            # Each removed row is credited to the first column that flags it
+            for j, col in enumerate(self.outlier_columns):
+                outliers = outputs["outliers"][j] & keep
+                report["Removed Outliers"][col] = int(outliers.sum())
+                keep &= ~outliers
+        elif n_outlier_columns:
+            flagged = outputs["outliers"][:n_outlier_columns] & keep
+            report["Removed Outliers"] = dict(zip(self.outlier_columns, flagged.sum(axis=1).tolist()))
+            outliers = flagged.any(axis=0)
+            report["Removed Outlier Rows"] = int(outliers.sum())
+            keep &= ~outliers
+        if self.sequential_removal:
+            report["Removed Outlier Rows"] = sum(report["Removed Outliers"].values())
+
+        kernel_values = {}
+        for j, col in enumerate(kernel_columns):
+            if capping and col in self.bounds:
+                kernel_values[col] = outputs["values"][j]
+            elif col in self.fill_values and _native_numeric(df[col]):
+                kernel_values[col] = outputs["values"][j].astype(df[col].dtype, copy=False)
+
+        subset = None if keep.all() else keep
+        columns = {}
+        for col in df.columns:
+            if col in kernel_values:
+                column = kernel_values[col]
+            elif col in self.fill_values:
+                column = df[col].fillna(self.fill_values[col])
+            else:
+                column = df[col]
+            columns[col] = column if subset is None else column[subset]
+        index = df.index if subset is None else df.index[subset]
+        cleaned = pd.DataFrame(columns, index=index).reset_index(drop=True)
+        report["Rows Out"] = len(cleaned)
+        return cleaned, report
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def log_entries(self, report):
+        """Provenance descriptions for a transform report."""
+        entries = []
+        for col, strategy in self.imputation_strategies.items():
+            if strategy == "Remove Rows":
+                entries.append(
+                    f"Removed {report['Removed Missing'][col]} rows with missing values in `{col}`.")
+            elif col in self.group_by:
+                in_group, fallback = report["Group Imputed"].get(col, (0, 0))
+                keys = ", ".join(f"`{key}`" for key in self.group_by[col])
+                entries.append(
+                    f"Imputed missing values in `{col}` with the {strategy.lower()} per {keys} group "
+                    f"({len(self.group_fill_values[col])} groups; {in_group} values from their group, "
+                    f"{fallback} from the global {strategy.lower()} ({self.fill_values[col]}) for groups "
+                    f"under {self.min_group_size} rows or unseen keys).")
+            else:
+                entries.append(
+                    f"Imputed missing values in `{col}` with {strategy.lower()} ({self.fill_values[col]}).")
+        for col, (num_capped_lower, num_capped_upper) in report["Capped"].items():
+            if num_capped_lower > 0 or num_capped_upper > 0:
+                entries.append(
+                    f"Capped {num_capped_lower} lower and {num_capped_upper} upper outliers in `{col}` using IQR multiplier {self.iqr_multiplier}.")
+        if self.sequential_removal:
+            for col, rows_removed in report["Removed Outliers"].items():
+                if rows_removed > 0:
+                    entries.append(
+                        f"Removed {rows_removed} rows containing outliers in `{col}` using IQR multiplier {self.iqr_multiplier}.")
+        elif report["Removed Outliers"]:
+            for col, rows_flagged in report["Removed Outliers"].items():
+                if rows_flagged > 0:
+                    entries.append(
+                        f"Flagged {rows_flagged} rows with outliers in `{col}` using IQR multiplier {self.iqr_multiplier}.")
+            if report["Removed Outlier Rows"] > 0:
+                entries.append(
+                    f"Removed {report['Removed Outlier Rows']} rows with an outlier in any of "
+                    f"{len(report['Removed Outliers'])} columns (joint IQR bounds).")
+        return entries
+
+    def to_dict(self):
+        return {
+            "imputation_strategies": self.imputation_strategies,
+            "outlier_strategy": self.outlier_strategy,
+            "iqr_multiplier": self.iqr_multiplier,
+            "outlier_columns": self.outlier_columns,
+            # NaN (e.g. the fill for an all-missing column) is not valid JSON, so it is stored as null
+            "fill_values": {col: None if _is_nan(value) else value for col, value in self.fill_values.items()},
+            "group_by": self.group_by,
+            "min_group_size": self.min_group_size,
+            # JSON objects need string keys, so group fills are stored as [key values, fill] pairs
+            "group_fill_values": {col: [[list(group), value] for group, value in fills.items()]
+                                  for col, fills in self.group_fill_values.items()},
+            "bounds": {col: list(bounds) for col, bounds in self.bounds.items()},
+            "fitted": self.fitted,
+        }
+
+    @classmethod
+    def from_dict(cls, config):
+        pipeline = cls(config["imputation_strategies"], config["outlier_strategy"],
+                       config["iqr_multiplier"], config["outlier_columns"],
+                       group_by=config.get("group_by"), min_group_size=config.get("min_group_size", MIN_GROUP_SIZE))
+        pipeline.fill_values = {col: np.nan if value is None else value
+                                for col, value in config.get("fill_values", {}).items()}
+        pipeline.group_fill_values = {col: {tuple(group): value for group, value in fills}
+                                      for col, fills in config.get("group_fill_values", {}).items()}
+        pipeline.bounds = {col: tuple(bounds) for col, bounds in config.get("bounds", {}).items()}
+        pipeline.fitted = config.get("fitted", False)
+        return pipeline
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, allow_nan=False)
+
+    @classmethod
+    def from_json(cls, payload):
+        return cls.from_dict(json.loads(payload))
@@ -0,0 +1,107 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pandas as pd
+import streamlit as st
+
+
+# Full applies that finish within this many seconds are swapped in by the same rerun
+INLINE_APPLY_SECONDS = 1.0
+# Set to the number of full applies that may run at once across all sessions
+CLEANING_WORKERS_ENV = "QULAB_CLEANING_WORKERS"
+DEFAULT_CLEANING_WORKERS = 4
+
+
+@st.cache_resource
+def cleaning_executor():
+    """The background executor shared by every session; sessions only keep their job's Future.
+
+    A new apply supersedes the session's previous one, so each session has at
+    most one job queued or running.
+    """
+    workers = int(os.environ.get(CLEANING_WORKERS_ENV) or DEFAULT_CLEANING_WORKERS)
+    return ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="cleaning")
+
+
+def fit_cleaning(pipeline, df):
+    """Fit `pipeline` on `df` and clean it; returns (cleaned_df, (log_entries, fitted pipeline))."""
+    cleaned_df, report = pipeline.fit_transform(df)
+    return cleaned_df, (pipeline.log_entries(report), pipeline)
+
+
+def start_cleaning_job(pipeline):
+    """Clean the full raw dataset on the shared background executor.
+
+    Results already in the lineage cache are reused, and jobs that finish
+    within INLINE_APPLY_SECONDS are applied straight away; otherwise the
+    result is swapped in by `collect_cleaning_job()` on a later rerun.
+    """
+    raw_df = st.session_state.raw_data
+    params = pipeline.to_dict()
+    job = {"Input": raw_df, "Params": params, "Submitted": time.monotonic()}
+    cached = st.session_state.lineage.lookup("Cleaning", raw_df, params)
+    if cached is not None:
+        job["Result"] = cached
+    else:
+        job["Future"] = cleaning_executor().submit(fit_cleaning, pipeline, raw_df)
+        wait([job["Future"]], timeout=INLINE_APPLY_SECONDS)
+    previous = st.session_state.get("cleaning_job")
+    if previous is not None and "Future" in previous:
+        # A newer apply supersedes a pending one
+        previous["Future"].cancel()
+    st.session_state.cleaning_job = job
+    return collect_cleaning_job()
+
+
+def cleaning_job_pending():
+    job = st.session_state.get("cleaning_job")
+    return job is not None and "Future" in job and not job["Future"].done()
+
+
+def collect_cleaning_job():
+    """Swap a finished cleaning job into `cleaned_data` and log it.
+
+    Returns a status message once the job has been collected, otherwise None.
+    Results computed from a raw dataset that has since been replaced are
+    discarded.
+    """
+    job = st.session_state.get("cleaning_job")
+    if job is None or cleaning_job_pending():
+        return None
+    st.session_state.cleaning_job = None
+    if job["Input"] is not st.session_state.raw_data:
+        return None
+
+    cached = "Future" not in job
+    if not cached:
+        if job["Future"].cancelled():
+            return None
+        error = job["Future"].exception()
+        if error is not None:
+            return f"Data cleaning failed: {error}"
+    cleaned_df, (log_entries, fitted_pipeline) = job["Result"] if cached else job["Future"].result()
+    cleaned_hash = st.session_state.lineage.record(
+        "Cleaning", job["Input"], job["Params"], cleaned_df, (log_entries, fitted_pipeline))
+    st.session_state.cleaning_pipeline = fitted_pipeline
+    st.session_state.cleaned_data = cleaned_df
+    if cached:
+        log_entries = [
+            f"Re-applied cleaning settings; served cached result `{cleaned_hash[:12]}` for identical input and parameters."]
+        message = "Data cleaning and preprocessing applied successfully! (served from the lineage cache)"
+    else:
+        log_entries = log_entries + [f"Cleaned dataset version: `{cleaned_hash[:12]}`."]
+        message = "Data cleaning and preprocessing applied successfully!"
+
+    # Update provenance logs
+    timestamp = pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
+    st.session_state.provenance_logs.extend([
+        {
+            "Timestamp": timestamp,
+            "Action": "Data Cleaning & Preprocessing",
+            "Description": entry,
+            "User": "Risk_Manager_001"
+        }
+        for entry in log_entries
+    ])
+    return message
@@ -0,0 +1,205 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+PARALLEL_BACKENDS = ["thread", "process"]
+# Workers are started fresh rather than forked: the Streamlit server is multithreaded, and forking a
+# multithreaded process can copy a lock another thread holds and deadlock the child
+PROCESS_START_METHOD = "spawn"
+
+_PROCESS_POOL = {"pool": None, "workers": 0}
+_PROCESS_POOL_LOCK = threading.Lock()
+
+
+def resolve_n_jobs(n_jobs):
+    """Number of workers; values below 1 mean one per available core."""
+    if n_jobs is None or n_jobs < 1:
+        return os.cpu_count() or 1
+    return int(n_jobs)
+
+
+def process_pool(n_jobs):
+    """The shared worker process pool, with at least `n_jobs` workers.
+
+    One pool serves every session and run, so worker start-up is paid once;
+    it is only replaced when more workers are requested or it has broken.
+    """
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL["pool"] is None or _PROCESS_POOL["workers"] < n_jobs:
+            if _PROCESS_POOL["pool"] is not None:
+                # Work already submitted to the old pool still completes
+                _PROCESS_POOL["pool"].shutdown(wait=False)
+            _PROCESS_POOL["pool"] = ProcessPoolExecutor(
+                max_workers=n_jobs, mp_context=multiprocessing.get_context(PROCESS_START_METHOD))
+            _PROCESS_POOL["workers"] = n_jobs
+        return _PROCESS_POOL["pool"]
+
+
+def _discard_process_pool(pool):
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL["pool"] is pool:
+            _PROCESS_POOL["pool"], _PROCESS_POOL["workers"] = None, 0
+
+
+def column_groups(n_columns, n_groups):
+    """Split column indexes into at most `n_groups` contiguous, ordered groups."""
+    return [group.tolist() for group in np.array_split(np.arange(n_columns), max(n_groups, 1)) if len(group)]
+
+
+class _SharedArray:
+    """A NumPy array in a named shared-memory segment that workers attach to by name."""
+
+    def __init__(self, shape, dtype, name=None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        size = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self.shm.buf)
+
+    @property
+    def spec(self):
+        return self.shm.name, self.shape, self.dtype.str
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        return cls(shape, dtype, name=name)
+
+    def close(self):
+        del self.array
+        self.shm.close()
+
+
+def _attach_columns(specs, group):
+    # Only the group's columns are mapped; the others stay None so kernels index by column position
+    return [_SharedArray.attach(specs[j]) if j in group else None for j in range(len(specs))]
+
+
+def _run_shared_group(kernel, group, input_specs, shared_specs, output_specs, args):
+    attached = {"inputs": {}, "shared": {}, "outputs": {}}
+    views = {"inputs": {}, "shared": {}, "outputs": {}}
+    try:
+        for name, specs in input_specs.items():
+            attached["inputs"][name] = _attach_columns(specs, set(group))
+            views["inputs"][name] = [None if block is None else block.array for block in attached["inputs"][name]]
+        for name, spec in shared_specs.items():
+            attached["shared"][name] = _SharedArray.attach(spec)
+            views["shared"][name] = attached["shared"][name].array
+        for name, spec in output_specs.items():
+            if isinstance(spec, list):
+                attached["outputs"][name] = _attach_columns(spec, set(group))
+                views["outputs"][name] = [None if block is None else block.array
+                                          for block in attached["outputs"][name]]
+            else:
+                attached["outputs"][name] = _SharedArray.attach(spec)
+                views["outputs"][name] = attached["outputs"][name].array
+        return kernel(group, views["inputs"], views["shared"], views["outputs"], *args)
+    finally:
+        for blocks in attached.values():
+            for block in blocks.values():
+                for column_block in block if isinstance(block, list) else [block]:
+                    if column_block is not None:
+                        column_block.close()
+
+
+def _output_dtypes(dtype, n_columns):
+    """Per-column dtypes for a list-valued output spec, or None for one (n_columns, n_rows) array."""
+    if isinstance(dtype, (list, tuple)):
+        if len(dtype) != n_columns:
+            raise ValueError("Per-column output dtypes must have one entry per column.")
+        return [np.dtype(d) for d in dtype]
+    return None
+
+
+def map_column_groups(kernel, inputs, shared=None, outputs=None, args=(), n_jobs=1, backend="thread"):
+    """Run `kernel` over contiguous column groups and gather its per-column results in column order.
+
+    `inputs` maps names to sequences of equal-length 1-D column arrays, each
+    in its own dtype, and `shared` to 1-D arrays every column needs (e.g. a
+    row mask). `outputs` maps names to a dtype, which becomes one
+    (n_columns, n_rows) array, or to a list of per-column dtypes, which
+    becomes a list of 1-D arrays; the kernel fills them in place. The kernel
+    is called as `kernel(group, inputs, shared, outputs, *args)` and returns
+    one result per column in `group`. With the process backend the groups
+    run in the shared `process_pool()` and every column is copied once,
+    straight from the caller's array into its own shared-memory segment, so
+    workers never pickle column data and no converted copies are made. The
+    kernel must then be a module-level function. Returns (results, outputs).
+    """
+    shared = shared or {}
+    outputs = outputs or {}
+    n_columns = len(next(iter(inputs.values()))) if inputs else 0
+    n_rows = len(inputs[next(iter(inputs))][0]) if n_columns else 0
+    n_jobs = min(resolve_n_jobs(n_jobs), max(n_columns, 1))
+    if backend not in PARALLEL_BACKENDS:
+        raise ValueError(f"Unknown parallel backend '{backend}'.")
+    output_dtypes = {name: _output_dtypes(dtype, n_columns) for name, dtype in outputs.items()}
+
+    if n_jobs == 1 or backend == "thread":
+        output_arrays = {
+            name: np.empty((n_columns, n_rows), dtype=dtype) if output_dtypes[name] is None
+            else [np.empty(n_rows, dtype=d) for d in output_dtypes[name]]
+            for name, dtype in outputs.items()}
+        groups = column_groups(n_columns, n_jobs)
+        if n_jobs == 1:
+            results = [kernel(group, inputs, shared, output_arrays, *args) for group in groups]
+        else:
+            with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+                futures = [pool.submit(kernel, group, inputs, shared, output_arrays, *args) for group in groups]
+                results = [future.result() for future in futures]
+        return [result for group_results in results for result in group_results], output_arrays
+
+    blocks = []
+
+    def allocate(shape, dtype):
+        block = _SharedArray(shape, dtype)
+        blocks.append(block)
+        return block
+
+    try:
+        input_specs, shared_specs, output_specs, output_blocks = {}, {}, {}, {}
+        for name, columns in inputs.items():
+            input_specs[name] = []
+            for column in columns:
+                block = allocate((n_rows,), column.dtype)
+                block.array[...] = column
+                input_specs[name].append(block.spec)
+        for name, values in shared.items():
+            block = allocate(np.shape(values), np.asarray(values).dtype)
+            block.array[...] = values
+            shared_specs[name] = block.spec
+        for name, dtype in outputs.items():
+            if output_dtypes[name] is None:
+                output_blocks[name] = allocate((n_columns, n_rows), dtype)
+                output_specs[name] = output_blocks[name].spec
+            else:
+                output_blocks[name] = [allocate((n_rows,), d) for d in output_dtypes[name]]
+                output_specs[name] = [block.spec for block in output_blocks[name]]
+
+        pool = process_pool(n_jobs)
+        try:
+            futures = [pool.submit(_run_shared_group, kernel, group, input_specs, shared_specs, output_specs, args)
+                       for group in column_groups(n_columns, n_jobs)]
+            results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool on the next call
+            _discard_process_pool(pool)
+            raise
+        output_arrays = {
+            name: [block.array.copy() for block in block_list] if isinstance(block_list, list)
+            else block_list.array.copy()
+            for name, block_list in output_blocks.items()}
+        return [result for group_results in results for result in group_results], output_arrays
+    finally:
+        for block in blocks:
+            block.close()
+            block.shm.unlink()
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_NUM_RECORDS = 1000
+DEFAULT_SEED = 42
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# Categorical columns: (categories, sampling probabilities)
+CATEGORICAL_SPECS = {
+    "Gender": (["Male", "Female"], [0.6, 0.4]),
+    "Married": (["Yes", "No"], [0.7, 0.3]),
+    "Dependents": (["0", "1", "2", "3+"], [0.5, 0.2, 0.15, 0.15]),
+    "Education": (["Graduate", "Not Graduate"], [0.75, 0.25]),
+    "Self_Employed": (["Yes", "No"], [0.15, 0.85]),
+    "Property_Area": (["Urban", "Semiurban", "Rural"], [0.35, 0.35, 0.3]),
+    "Loan_Status": (["Y", "N"], [0.7, 0.3]),
+}
+
+LOAN_AMOUNT_TERMS = np.array([12, 36, 60, 120, 180, 240, 360, 480], dtype=np.int16)
+LOAN_AMOUNT_TERM_P = [0.01, 0.02, 0.02, 0.05, 0.1, 0.08, 0.6, 0.12]
+
+# Columns that receive intentionally injected missing values
+MISSING_COLUMNS = ["Gender", "Married", "Dependents",
+                   "Self_Employed", "LoanAmount", "Credit_History"]
+MISSING_RATE = 0.05
+
+# Loan IDs are unique, so a categorical would not save anything over a string column. Arrow storage
+# is explicit: on pandas 2 a bare StringDtype() keeps one Python object per ID
+LOAN_ID_DTYPE = pd.StringDtype("pyarrow")
+
+COLUMN_ORDER = [
+    "Loan_ID", "Gender", "Married", "Dependents", "Education", "Self_Employed",
+    "ApplicantIncome", "CoapplicantIncome", "LoanAmount", "Loan_Amount_Term",
+    "Credit_History", "Property_Area", "Loan_Status",
+]
+
+
+def _categorical(rng, n, name, missing):
+    """Sample a categorical column directly as int8 codes."""
+    categories, p = CATEGORICAL_SPECS[name]
+    codes = rng.choice(len(categories), size=n, p=p).astype(np.int8)
+    if missing is not None:
+        codes[missing] = -1
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _loan_ids(start, stop):
+    """Loan IDs for rows [start, stop) as a fixed-width NumPy string array."""
+    if stop <= start:
+        return np.array([], dtype="U5")
+    return np.char.add("L", np.char.zfill(np.arange(start, stop).astype("U"), 4))
+
+
+def _generate_chunk(rng, start, n):
+    """Generate rows [start, start + n) of the synthetic loan dataset."""
+    # One uniform draw per (row, column) decides all injected missing values at once
+    missing = rng.random((n, len(MISSING_COLUMNS)), dtype=np.float32) < MISSING_RATE
+    missing_by_col = {col: missing[:, i] for i, col in enumerate(MISSING_COLUMNS)}
+
+    loan_amount = rng.integers(90, 700, n, dtype=np.int32).astype(np.float32)
+    loan_amount[missing_by_col["LoanAmount"]] = np.nan
+
+    credit_history = rng.choice(
+        np.array([0.0, 1.0, np.nan], dtype=np.float32), size=n, p=[0.1, 0.8, 0.1])
+    credit_history[missing_by_col["Credit_History"]] = np.nan
+
+    data = {
+        "Loan_ID": pd.array(_loan_ids(start, start + n), dtype=LOAN_ID_DTYPE),
+        "Gender": _categorical(rng, n, "Gender", missing_by_col["Gender"]),
+        "Married": _categorical(rng, n, "Married", missing_by_col["Married"]),
+        "Dependents": _categorical(rng, n, "Dependents", missing_by_col["Dependents"]),
+        "Education": _categorical(rng, n, "Education", None),
+        "Self_Employed": _categorical(rng, n, "Self_Employed", missing_by_col["Self_Employed"]),
+        "ApplicantIncome": rng.integers(1500, 7000, n, dtype=np.int32),
+        "CoapplicantIncome": rng.integers(0, 3000, n, dtype=np.int32),
+        "LoanAmount": loan_amount,
+        "Loan_Amount_Term": rng.choice(LOAN_AMOUNT_TERMS, size=n, p=LOAN_AMOUNT_TERM_P),
+        "Credit_History": credit_history,
+        "Property_Area": _categorical(rng, n, "Property_Area", None),
+        "Loan_Status": _categorical(rng, n, "Loan_Status", None),
+    }
+    return pd.DataFrame(data, index=pd.RangeIndex(start, start + n))[COLUMN_ORDER]
+
+
+def iter_loan_data(num_records, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the synthetic loan dataset in chunks of at most `chunk_size` rows.
+
+    Each chunk draws from its own `np.random.Generator`, spawned from `seed` by
+    chunk index, so the output is identical for the same
+    (num_records, seed, chunk_size) no matter how the chunks are consumed.
+    """
+    if num_records < 0:
+        raise ValueError("num_records must be non-negative.")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive.")
+
+    num_chunks = -(-num_records // chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(num_chunks)
+    for i, chunk_seed in enumerate(seeds):
+        start = i * chunk_size
+        n = min(chunk_size, num_records - start)
+        yield _generate_chunk(np.random.default_rng(chunk_seed), start, n)
+
+
+def generate_loan_data(num_records=DEFAULT_NUM_RECORDS, seed=DEFAULT_SEED, chunk_size=DEFAULT_CHUNK_SIZE,
+                       sketch=None):
+    """Generate the full synthetic loan dataset as a single compact DataFrame.
+
+    Each chunk is copied into preallocated column arrays as soon as it is
+    generated and then dropped, so peak memory is the output plus one chunk.
+    A `sketch` (e.g. `sketches.ProfileSketch`) is updated with every chunk.
+    """
+    if num_records < 0:
+        raise ValueError("num_records must be non-negative.")
+    columns = None
+    loan_ids = []
+    for chunk in iter_loan_data(num_records, seed=seed, chunk_size=chunk_size):
+        if columns is None:
+            columns = {col: np.empty(num_records, dtype=_storage(chunk[col]).dtype) for col in COLUMN_ORDER
+                       if col != "Loan_ID"}
+        if sketch is not None:
+            sketch.update(chunk)
+        rows = slice(chunk.index[0], chunk.index[0] + len(chunk))
+        for col, values in columns.items():
+            values[rows] = _storage(chunk[col])
+        # Per-chunk Arrow string arrays are already compact; they are joined once at the end
+        loan_ids.append(chunk["Loan_ID"].reset_index(drop=True))
+        del chunk
+    if columns is None:
+        return _generate_chunk(np.random.default_rng(seed), 0, 0)
+
+    data = {}
+    for col in COLUMN_ORDER:
+        if col == "Loan_ID":
+            data[col] = pd.concat(loan_ids, ignore_index=True).array
+        elif col in CATEGORICAL_SPECS:
+            data[col] = pd.Categorical.from_codes(columns.pop(col), categories=CATEGORICAL_SPECS[col][0])
+        else:
+            data[col] = columns.pop(col)
+    # copy=False keeps the assembled arrays as they are instead of consolidating them into new blocks
+    return pd.DataFrame(data, copy=False)
+
+
+def _storage(series):
+    """The NumPy array a column is assembled in: category codes or the values themselves."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy()
+    return series.to_numpy()
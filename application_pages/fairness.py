@@ -0,0 +1,651 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from application_pages.profiling import dataset_fingerprint
+
+
+DEFAULT_BOOTSTRAP_REPLICATES = 2000
+# Replicates are drawn in fixed-size chunks with one spawned seed each, so results do not depend on n_jobs
+BOOTSTRAP_CHUNK_SIZE = 10_000
+DEFAULT_PERMUTATIONS = 10_000
+# Upper bound on null approval counts held at once (permutations x groups)
+PERMUTATION_CHUNK_ELEMENTS = 2 ** 22
+# Finest cubes up to this many cells are counted with a dense bincount; larger ones factorize observed cells
+MAX_DENSE_CUBE_CELLS = 2 ** 22
+DEFAULT_MIN_SUPPORT = 30
+# Mixed-radix cell codes are int64, so the product of the radices must stay below this
+MAX_CELL_CODE = 2 ** 63
+# Upper bound on float64 values per column block, counting one ECDF array per group
+DISPARITY_BLOCK_ELEMENTS = 2 ** 24
+DEFAULT_CALIBRATION_BINS = 10
+# Selection-rate ratio below which the four-fifths rule flags disparate impact
+FOUR_FIFTHS = 0.8
+
+
+def _factorize(series):
+    """Integer group codes (-1 for missing) and group labels; categoricals reuse their codes."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy().astype(np.int64), series.cat.categories
+    codes, uniques = pd.factorize(series)
+    return codes.astype(np.int64), uniques
+
+
+def positive_outcomes(target, positive_outcome):
+    """Factorize the target once; returns (has_target, is_positive) boolean arrays."""
+    codes, uniques = _factorize(target)
+    matches = np.flatnonzero(np.asarray(uniques == positive_outcome))
+    positive_code = matches[0] if len(matches) else -2
+    return codes >= 0, codes == positive_code
+
+
+def demographic_parity(df, attributes, target_column, positive_outcome):
+    """Approval rates and demographic parity difference for several sensitive attributes at once.
+
+    The target is factorized once. Each attribute is then counted with one
+    `bincount` over its group codes with the outcome as the lowest bit, which
+    yields group sizes and approvals together; codes are built one attribute
+    at a time, so scratch memory stays O(rows) however many attributes are
+    given. Rows missing the target or the attribute are ignored for that
+    attribute. Returns {attribute: result} with "Approval Rates", "Group
+    Counts", "Group Approvals" and "Demographic Parity Difference";
+    attributes with fewer than two observed groups are omitted.
+    """
+    attributes = [attr for attr in attributes if attr in df.columns]
+    if target_column not in df.columns or not attributes:
+        return {}
+    has_target, is_positive = positive_outcomes(df[target_column], positive_outcome)
+
+    results = {}
+    for attr in attributes:
+        codes, groups = _factorize(df[attr])
+        # Rows without a target or group land in a trailing bin pair that is dropped
+        codes[(codes < 0) | ~has_target] = len(groups)
+        codes *= 2
+        codes += is_positive
+        counts = np.bincount(codes, minlength=2 * (len(groups) + 1)).reshape(-1, 2)[:len(groups)]
+        del codes
+        group_totals, group_approvals = counts.sum(axis=1), counts[:, 1]
+        observed = np.flatnonzero(group_totals)
+        if len(observed) < 2:
+            continue
+        rates = group_approvals[observed] / group_totals[observed]
+        groups = groups[observed]
+        results[attr] = {
+            "Approval Rates": dict(zip(groups.tolist(), rates.tolist())),
+            "Group Counts": dict(zip(groups.tolist(), group_totals[observed].tolist())),
+            "Group Approvals": dict(zip(groups.tolist(), group_approvals[observed].tolist())),
+            "Demographic Parity Difference": float(rates.max() - rates.min()),
+        }
+    return results
+
+
+def _bootstrap_dpd_chunk(cell_probabilities, n_rows, replicates, seed):
+    """DPD for `replicates` multinomial resamples of the (group, outcome) cell counts."""
+    rng = np.random.default_rng(seed)
+    cells = rng.multinomial(n_rows, cell_probabilities, size=replicates).reshape(replicates, -1, 2)
+    totals = cells.sum(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rates = np.where(totals > 0, cells[:, :, 1] / totals, np.nan)
+    # A group can vanish from a small resample; the DPD is taken over the groups present
+    return np.nanmax(rates, axis=1) - np.nanmin(rates, axis=1)
+
+
+def bootstrap_dpd(group_counts, group_approvals, replicates=DEFAULT_BOOTSTRAP_REPLICATES, confidence=0.95,
+                  seed=0, n_jobs=1):
+    """Percentile bootstrap confidence interval for the demographic parity difference.
+
+    Resampling applicants with replacement only changes how many fall into
+    each (group, outcome) cell, so each replicate is one multinomial draw
+    over those cells rather than a pass over the rows: thousands of
+    replicates form a single (replicates x cells) matrix. With `n_jobs` > 1
+    chunks of replicates are drawn in a process pool; chunk seeds are
+    spawned from `seed`, so the interval is the same for any `n_jobs`.
+    """
+    counts = np.asarray(list(group_counts.values()), dtype=np.int64)
+    approvals = np.asarray([group_approvals[group] for group in group_counts], dtype=np.int64)
+    n_rows = int(counts.sum())
+    cell_probabilities = np.column_stack([counts - approvals, approvals]).ravel() / max(n_rows, 1)
+    chunk_sizes = [min(BOOTSTRAP_CHUNK_SIZE, replicates - start) for start in range(0, replicates, BOOTSTRAP_CHUNK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    args = [(cell_probabilities, n_rows, size, chunk_seed) for size, chunk_seed in zip(chunk_sizes, seeds)]
+    if n_jobs > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(args))) as pool:
+            dpds = np.concatenate(list(pool.map(_bootstrap_dpd_chunk, *zip(*args))))
+    else:
+        dpds = np.concatenate([_bootstrap_dpd_chunk(*chunk_args) for chunk_args in args])
+    alpha = (1 - confidence) / 2
+    lower, upper = np.nanquantile(dpds, [alpha, 1 - alpha])
+    return {
+        "Confidence": confidence,
+        "Lower": float(lower),
+        "Upper": float(upper),
+        "Std Error": float(np.nanstd(dpds, ddof=1)),
+        "Replicates": replicates,
+        "Seed": seed,
+    }
+
+
+def permutation_test_dpd(df, attribute, target_column, positive_outcome, permutations=DEFAULT_PERMUTATIONS, seed=0):
+    """Permutation p-value for the demographic parity difference of one attribute.
+
+    Under the null hypothesis group membership is exchangeable with the
+    outcome. Shuffling group labels across applicants keeps the group sizes
+    and the number of approvals fixed, and the DPD only depends on how many
+    approvals each group receives. Those counts follow a multivariate
+    hypergeometric distribution, so each permutation is drawn directly with
+    `Generator.multivariate_hypergeometric`. A permutation then costs
+    O(groups) rather than a shuffle of every applicant, like the bootstrap.
+    Draws are made in chunks of at most `PERMUTATION_CHUNK_ELEMENTS` counts.
+    Returns None when fewer than two groups are observed.
+    """
+    if attribute not in df.columns or target_column not in df.columns:
+        return None
+    codes, _ = _factorize(df[attribute])
+    has_target, is_positive = positive_outcomes(df[target_column], positive_outcome)
+    keep = (codes >= 0) & has_target
+    codes, is_positive = codes[keep], is_positive[keep]
+    group_sizes = np.bincount(codes)
+    group_approvals = np.bincount(codes[is_positive], minlength=len(group_sizes))
+    observed = np.flatnonzero(group_sizes)
+    if len(observed) < 2:
+        return None
+    group_sizes, group_approvals = group_sizes[observed], group_approvals[observed]
+
+    def dpd(approvals):
+        rates = approvals / group_sizes
+        return rates.max(axis=-1) - rates.min(axis=-1)
+
+    observed_dpd = float(dpd(group_approvals))
+    n_approved = int(group_approvals.sum())
+
+    rng = np.random.default_rng(seed)
+    chunk = max(1, PERMUTATION_CHUNK_ELEMENTS // len(group_sizes))
+    null = np.empty(permutations)
+    for start in range(0, permutations, chunk):
+        size = min(chunk, permutations - start)
+        null[start:start + size] = dpd(rng.multivariate_hypergeometric(group_sizes, n_approved, size=size))
+
+    # Ties count as at least as extreme; a tolerance absorbs floating-point noise in the rates
+    exceed = int(np.count_nonzero(null >= observed_dpd - 1e-12))
+    return {
+        "Observed DPD": observed_dpd,
+        "P-Value": (exceed + 1) / (permutations + 1),
+        "Null Mean": float(null.mean()),
+        "Null 95th Percentile": float(np.quantile(null, 0.95)),
+        "Permutations": permutations,
+        "Seed": seed,
+    }
+
+
+def parity_ranking(results):
+    """One row per attribute, largest demographic parity difference first."""
+    rows = []
+    for attr, result in results.items():
+        rates = pd.Series(result["Approval Rates"])
+        counts = pd.Series(result["Group Counts"])
+        rows.append({
+            "Attribute": attr,
+            "Groups": len(rates),
+            "Demographic Parity Difference": result["Demographic Parity Difference"],
+            "Highest Approval Group": f"{rates.idxmax()} ({rates.max():.1%})",
+            "Lowest Approval Group": f"{rates.idxmin()} ({rates.min():.1%})",
+            "Smallest Group Size": int(counts.min()),
+        })
+    columns = ["Attribute", "Groups", "Demographic Parity Difference", "Highest Approval Group",
+               "Lowest Approval Group", "Smallest Group Size"]
+    ranking = pd.DataFrame(rows, columns=columns)
+    return ranking.sort_values("Demographic Parity Difference", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def _fits_cell_code(radices):
+    """Whether every mixed-radix code for `radices` fits in int64 (checked in exact integer arithmetic)."""
+    return np.prod(np.asarray(radices, dtype=object)) < MAX_CELL_CODE
+
+
+def _mixed_radix_strides(radices):
+    return np.concatenate([[1], np.cumprod(radices[:-1])]).astype(np.int64)
+
+
+def intersectional_cube(df, attributes, target_column, positive_outcome, min_support=DEFAULT_MIN_SUPPORT,
+                        max_order=None):
+    """Approval rates for every combination of up to `max_order` of the given attributes.
+
+    Each attribute is encoded once and the codes are combined into one
+    mixed-radix cell code per row (with a reserved digit for a missing
+    value), so the finest cube is built with a single grouped count. When
+    high-cardinality attributes would overflow an int64 cell code, the
+    observed cells are numbered with `groupby(...).ngroup()` instead. Every
+    coarser subgroup (e.g. Gender x Married out of Gender x Married x
+    Property_Area) is rolled up from those cells rather than from the rows.
+    Subgroups with fewer than `min_support` applicants are pruned.
+
+    Returns a dict with "Overall Rate", "Applicants", "Cells" (subgroups
+    evaluated), "Pruned" (subgroups below the support) and "Subgroups": a
+    DataFrame with one column per attribute (None where it is rolled up),
+    "Subgroup", "Order", "Applicants", "Approvals", "Approval Rate" and
+    "Gap vs Overall", worst-off first.
+    """
+    attributes = [attr for attr in attributes if attr in df.columns]
+    max_order = len(attributes) if max_order is None else min(max_order, len(attributes))
+    has_target, is_positive = positive_outcomes(df[target_column], positive_outcome)
+
+    factorized = [_factorize(df[attr]) for attr in attributes]
+    radices = np.array([len(groups) + 1 for _, groups in factorized], dtype=np.int64)
+    positive = is_positive[has_target]
+
+    if _fits_cell_code(radices):
+        strides = _mixed_radix_strides(radices)
+        joint = np.zeros(int(has_target.sum()), dtype=np.int64)
+        for (codes, groups), stride in zip(factorized, strides):
+            codes = codes[has_target]
+            joint += np.where(codes < 0, len(groups), codes) * stride
+        n_cells = int(np.prod(radices)) if len(radices) else 1
+        if n_cells <= MAX_DENSE_CUBE_CELLS:
+            counts = np.bincount(joint * 2 + positive, minlength=2 * n_cells).reshape(-1, 2)
+            cells = np.flatnonzero(counts.sum(axis=1))
+            counts = counts[cells]
+        else:
+            cell_codes, cells = pd.factorize(joint)
+            counts = np.bincount(cell_codes * 2 + positive, minlength=2 * len(cells)).reshape(-1, 2)
+        digits = (cells[:, None] // strides) % radices
+    else:
+        # Number the observed cells directly; each cell's digits come from its first row
+        row_digits = pd.DataFrame({
+            i: np.where(codes[has_target] < 0, len(groups), codes[has_target])
+            for i, (codes, groups) in enumerate(factorized)})
+        cell_codes = row_digits.groupby(list(row_digits.columns), sort=False).ngroup().to_numpy()
+        first_rows = np.unique(cell_codes, return_index=True)[1]
+        digits = row_digits.to_numpy(dtype=np.int64)[first_rows]
+        counts = np.bincount(cell_codes * 2 + positive, minlength=2 * len(first_rows)).reshape(-1, 2)
+    totals, approvals = counts.sum(axis=1), counts[:, 1]
+    overall_rate = approvals.sum() / max(totals.sum(), 1)
+
+    frames, evaluated, pruned = [], 0, 0
+    for order in range(1, max_order + 1):
+        for subset in itertools.combinations(range(len(attributes)), order):
+            subset = list(subset)
+            observed = (digits[:, subset] < radices[subset] - 1).all(axis=1)
+            sub_digits = digits[observed][:, subset]
+            if _fits_cell_code(radices[subset]):
+                sub_strides = _mixed_radix_strides(radices[subset])
+                keys, inverse = np.unique((sub_digits * sub_strides).sum(axis=1), return_inverse=True)
+                key_digits = (keys[:, None] // sub_strides) % radices[subset]
+            else:
+                key_digits, inverse = np.unique(sub_digits, axis=0, return_inverse=True)
+            inverse = inverse.ravel()
+            sub_totals = np.bincount(inverse, weights=totals[observed], minlength=len(key_digits))
+            sub_approvals = np.bincount(inverse, weights=approvals[observed], minlength=len(key_digits))
+            evaluated += len(key_digits)
+            supported = sub_totals >= min_support
+            pruned += int((~supported).sum())
+            if not supported.any():
+                continue
+            key_digits = key_digits[supported]
+            frame = pd.DataFrame({
+                attributes[i]: factorized[i][1][key_digits[:, j]].astype(object)
+                for j, i in enumerate(subset)})
+            frame["Order"] = order
+            frame["Applicants"] = sub_totals[supported].astype(np.int64)
+            frame["Approvals"] = sub_approvals[supported].astype(np.int64)
+            frames.append(frame)
+
+    columns = attributes + ["Subgroup", "Order", "Applicants", "Approvals", "Approval Rate", "Gap vs Overall"]
+    subgroups = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+    subgroups = subgroups.reindex(columns=columns)
+    subgroups[attributes] = subgroups[attributes].astype(object).where(subgroups[attributes].notna(), None)
+    subgroups["Subgroup"] = [
+        " & ".join(f"{attr}={value}" for attr, value in zip(attributes, row) if value is not None)
+        for row in subgroups[attributes].itertuples(index=False)]
+    subgroups["Approval Rate"] = subgroups["Approvals"] / subgroups["Applicants"]
+    subgroups["Gap vs Overall"] = subgroups["Approval Rate"] - overall_rate
+    subgroups = subgroups.sort_values(["Approval Rate", "Applicants"], ascending=[True, False], kind="stable")
+    return {
+        "Overall Rate": float(overall_rate),
+        "Applicants": int(totals.sum()),
+        "Cells": evaluated,
+        "Pruned": pruned,
+        "Subgroups": subgroups.reset_index(drop=True),
+    }
+
+
+def _block_disparity(values, codes, n_groups, pairs):
+    """KS, Wasserstein and SMD for every group pair and every column of an (applicants x columns) block."""
+    order = np.argsort(values, axis=0, kind="stable")
+    ordered = np.take_along_axis(values, order, axis=0)
+    ordered_codes = codes[order]
+    present = ~np.isnan(ordered)
+    # Step widths between consecutive sorted values; NaNs sort last and contribute no width
+    steps = np.nan_to_num(np.diff(ordered, axis=0), nan=0.0)
+    is_step = steps > 0
+
+    ecdf = np.empty((n_groups,) + steps.shape)
+    means = np.empty((n_groups, values.shape[1]))
+    variances = np.empty((n_groups, values.shape[1]))
+    for g in range(n_groups):
+        member = (ordered_codes == g) & present
+        counts = member.sum(axis=0)
+        np.divide(np.cumsum(member, axis=0)[:-1], counts, out=ecdf[g], where=counts > 0)
+        ecdf[g][:, counts == 0] = np.nan
+        group_values = np.where(member, ordered, 0.0)
+        means[g] = _ratio(group_values.sum(axis=0), counts)
+        squares = np.where(member, (ordered - means[g]) ** 2, 0.0).sum(axis=0)
+        variances[g] = _ratio(squares, counts - 1)
+
+    ks = np.empty((len(pairs), values.shape[1]))
+    wasserstein = np.empty_like(ks)
+    smd = np.empty_like(ks)
+    for k, (g, h) in enumerate(pairs):
+        gap = np.abs(ecdf[g] - ecdf[h])
+        # The ECDFs only change after the last of a run of tied values
+        ks[k] = np.where(is_step, gap, 0.0).max(axis=0, initial=0.0)
+        wasserstein[k] = (gap * steps).sum(axis=0)
+        smd[k] = _ratio(means[g] - means[h], np.sqrt((variances[g] + variances[h]) / 2))
+        missing = np.isnan(gap[0]) if len(gap) else np.ones(values.shape[1], dtype=bool)
+        ks[k][missing] = wasserstein[k][missing] = np.nan
+    return ks, wasserstein, smd
+
+
+def distribution_disparity(df, attribute, features, block_elements=DISPARITY_BLOCK_ELEMENTS):
+    """Ranked two-sample disparities between the groups of `attribute` for many numeric features.
+
+    Columns are processed in blocks sized to `block_elements`. Each block is
+    sorted once along the rows with a single batched `argsort`; every group's
+    ECDF is then a cumulative count along that shared order, so the
+    Kolmogorov-Smirnov statistic (largest ECDF gap), the Wasserstein-1
+    distance (area between ECDFs) and the standardized mean difference are
+    vectorized across all columns of the block. Each group pair is compared;
+    the table reports the largest value over pairs and the pair with the
+    largest KS statistic, ranked by that statistic. Missing values are
+    skipped per feature.
+    """
+    features = [col for col in features if col in df.columns]
+    columns = ["Feature", "KS Statistic", "Wasserstein Distance", "Standardized Mean Difference", "Groups"]
+    if attribute not in df.columns or not features:
+        return pd.DataFrame(columns=columns)
+    codes, groups = _factorize(df[attribute])
+    keep = codes >= 0
+    observed = np.flatnonzero(np.bincount(codes[keep], minlength=len(groups)))
+    if len(observed) < 2:
+        return pd.DataFrame(columns=columns)
+    remap = np.full(len(groups), -1, dtype=np.intp)
+    remap[observed] = np.arange(len(observed))
+    codes, groups = remap[codes[keep]], groups[observed]
+    n_groups = len(groups)
+    pairs = list(itertools.combinations(range(n_groups), 2))
+
+    block = max(1, block_elements // max(len(codes) * (n_groups + 4), 1))
+    rows = []
+    for start in range(0, len(features), block):
+        names = features[start:start + block]
+        values = np.empty((len(codes), len(names)))
+        for j, col in enumerate(names):
+            values[:, j] = df[col].to_numpy(np.float64, na_value=np.nan)[keep]
+        ks, wasserstein, smd = _block_disparity(values, codes, n_groups, pairs)
+        for j, col in enumerate(names):
+            if np.isnan(ks[:, j]).all():
+                continue
+            worst = int(np.nanargmax(ks[:, j]))
+            g, h = pairs[worst]
+            rows.append({
+                "Feature": col,
+                "KS Statistic": float(ks[worst, j]),
+                "Wasserstein Distance": float(np.nanmax(wasserstein[:, j])),
+                "Standardized Mean Difference": float(np.fmax.reduce(np.abs(smd[:, j]))),
+                "Groups": f"{groups[g]} vs {groups[h]}",
+            })
+    table = pd.DataFrame(rows, columns=columns)
+    return table.sort_values("KS Statistic", ascending=False, ignore_index=True)
+
+
+def _group_outcomes(df, attribute, label_column, positive_label):
+    """Group codes, group labels and the positive-label flag for rows that have both group and label."""
+    codes, groups = _factorize(df[attribute])
+    has_label, is_positive = positive_outcomes(df[label_column], positive_label)
+    keep = (codes >= 0) & has_label
+    return codes, groups, is_positive, keep
+
+
+def confusion_tensor(group_codes, n_groups, actual, predicted):
+    """(group x label x prediction) count tensor from one `bincount`; index 1 is the positive class."""
+    cells = group_codes * 4 + actual.astype(np.intp) * 2 + predicted.astype(np.intp)
+    return np.bincount(cells, minlength=n_groups * 4).reshape(n_groups, 2, 2)
+
+
+def _ratio(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), np.nan)
+
+
+def _spread(values):
+    """max - min over the group axis, ignoring groups where the rate is undefined."""
+    return np.fmax.reduce(values, axis=-1) - np.fmin.reduce(values, axis=-1)
+
+
+def confusion_rates(tensor):
+    """Per-group rates from a (..., group, label, prediction) tensor; leading axes are kept.
+
+    Works unchanged on a stack of tensors, e.g. one per decision threshold.
+    """
+    tn, fp = tensor[..., 0, 0], tensor[..., 0, 1]
+    fn, tp = tensor[..., 1, 0], tensor[..., 1, 1]
+    return {
+        "Applicants": tn + fp + fn + tp,
+        "Selection Rate": _ratio(fp + tp, tn + fp + fn + tp),
+        "True Positive Rate": _ratio(tp, fn + tp),
+        "False Positive Rate": _ratio(fp, tn + fp),
+        "Precision": _ratio(tp, fp + tp),
+    }
+
+
+def fairness_metrics(rates):
+    """Group-fairness summary from `confusion_rates` output; arrays keep any leading axes."""
+    selection = rates["Selection Rate"]
+    return {
+        "Demographic Parity Difference": _spread(selection),
+        "Disparate Impact Ratio": _ratio(np.fmin.reduce(selection, axis=-1), np.fmax.reduce(selection, axis=-1)),
+        "Equal Opportunity Difference": _spread(rates["True Positive Rate"]),
+        "Equalized Odds Difference": np.maximum(_spread(rates["True Positive Rate"]),
+                                                _spread(rates["False Positive Rate"])),
+        "Predictive Parity Difference": _spread(rates["Precision"]),
+    }
+
+
+def fairness_suite(df, attribute, label_column, positive_label, prediction_column, positive_prediction,
+                   score_column=None, approve_below=True, n_bins=DEFAULT_CALIBRATION_BINS):
+    """Group-fairness metrics of model decisions against observed outcomes.
+
+    All metrics are derived from a single (group x label x prediction) count
+    tensor. With `score_column` (a score in [0, 1]; with `approve_below` it is
+    a risk and the approval probability is 1 - score) a calibration table is
+    added, built from one more `bincount` over
+    (group x score bin x label) with the scores as weights. Returns a dict with
+    "Group Metrics" (DataFrame), "Summary", "Four-Fifths Rule Passed",
+    "Confusion Tensor", "Groups" and, when scores are given, "Calibration" and
+    "Calibration Error" (per-group expected calibration error).
+    """
+    for column in [attribute, label_column, prediction_column] + ([score_column] if score_column else []):
+        if column not in df.columns:
+            raise ValueError(f"Column '{column}' not found in the data.")
+    codes, groups, actual, keep = _group_outcomes(df, attribute, label_column, positive_label)
+    has_prediction, predicted = positive_outcomes(df[prediction_column], positive_prediction)
+    keep &= has_prediction
+    tensor = confusion_tensor(codes[keep], len(groups), actual[keep], predicted[keep])
+    observed = np.flatnonzero(tensor.sum(axis=(1, 2)))
+    tensor, groups = tensor[observed], groups[observed]
+
+    rates = confusion_rates(tensor)
+    summary = {name: float(value) for name, value in fairness_metrics(rates).items()}
+    result = {
+        "Groups": groups.tolist(),
+        "Confusion Tensor": tensor,
+        "Group Metrics": pd.DataFrame(rates, index=pd.Index(groups, name=attribute)),
+        "Summary": summary,
+        "Four-Fifths Rule Passed": bool(summary["Disparate Impact Ratio"] >= FOUR_FIFTHS),
+    }
+    if score_column:
+        scores = df[score_column].to_numpy(np.float64, na_value=np.nan)
+        result.update(_calibration_by_group(
+            codes, groups, observed, actual, 1.0 - scores if approve_below else scores, keep, n_bins, attribute))
+    return result
+
+
+def _calibration_by_group(codes, groups, observed, actual, scores, keep, n_bins, attribute):
+    keep = keep & ~np.isnan(scores)
+    # Remap codes so only groups present in the confusion tensor get rows
+    group_index = np.full(codes.max(initial=0) + 1, -1, dtype=np.intp)
+    group_index[observed] = np.arange(len(observed))
+    group_codes = group_index[codes[keep]]
+    valid = group_codes >= 0
+    group_codes, scores, actual = group_codes[valid], scores[keep][valid], actual[keep][valid]
+
+    bins = np.minimum((np.clip(scores, 0.0, 1.0) * n_bins).astype(np.intp), n_bins - 1)
+    cells = (group_codes * n_bins + bins) * 2 + actual
+    size = len(groups) * n_bins * 2
+    counts = np.bincount(cells, minlength=size).reshape(len(groups), n_bins, 2)
+    score_sums = np.bincount(cells, weights=scores, minlength=size).reshape(len(groups), n_bins, 2).sum(axis=2)
+    totals = counts.sum(axis=2)
+    predicted_rate = _ratio(score_sums, totals)
+    observed_rate = _ratio(counts[..., 1], totals)
+    error = np.nansum(totals * np.abs(predicted_rate - observed_rate), axis=1) / np.maximum(totals.sum(axis=1), 1)
+
+    group_idx, bin_idx = np.nonzero(totals)
+    calibration = pd.DataFrame({
+        attribute: groups[group_idx],
+        "Score Bin": [f"{b / n_bins:.1f}-{(b + 1) / n_bins:.1f}" for b in bin_idx],
+        "Applicants": totals[group_idx, bin_idx],
+        "Mean Predicted Approval": predicted_rate[group_idx, bin_idx],
+        "Observed Rate": observed_rate[group_idx, bin_idx],
+    })
+    return {
+        "Calibration": calibration,
+        "Calibration Error": dict(zip(groups.tolist(), error.tolist())),
+    }
+
+
+def threshold_sweep(df, attribute, label_column, positive_label, score_column, thresholds, approve_below=True):
+    """Fairness metrics for every decision threshold from one sort of the scores.
+
+    Rows are sorted once by (group, score); for each threshold a
+    `searchsorted` per group gives how many applicants fall on the approval
+    side, and cumulative positive-label counts turn that into a
+    (threshold x group x label x prediction) tensor. With `approve_below`
+    an applicant is approved when score < threshold (scores are risks), else
+    when score >= threshold. Returns a DataFrame indexed by threshold with the
+    `fairness_metrics` columns plus the overall "Selection Rate".
+    """
+    codes, groups, actual, keep = _group_outcomes(df, attribute, label_column, positive_label)
+    scores = df[score_column].to_numpy(np.float64, na_value=np.nan)
+    keep &= ~np.isnan(scores)
+    codes, actual, scores = codes[keep], actual[keep], scores[keep]
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+
+    order = np.lexsort((scores, codes))
+    codes, actual, scores = codes[order], actual[order], scores[order]
+    n_groups = len(groups)
+    starts = np.searchsorted(codes, np.arange(n_groups + 1))
+    # Cumulative positives per position, with a leading zero so slices give counts
+    cum_positive = np.concatenate([[0], np.cumsum(actual)])
+
+    # Scores strictly below the threshold; a score equal to it is approved only when approving above
+    below = np.empty((len(thresholds), n_groups), dtype=np.int64)
+    for g in range(n_groups):
+        below[:, g] = starts[g] + np.searchsorted(scores[starts[g]:starts[g + 1]], thresholds, side="left")
+    start, end = starts[:-1], starts[1:]
+    positives = cum_positive[end] - cum_positive[start]
+    negatives = (end - start) - positives
+    positives_below = cum_positive[below] - cum_positive[start]
+    negatives_below = (below - start) - positives_below
+
+    tensor = np.empty((len(thresholds), n_groups, 2, 2), dtype=np.int64)
+    if approve_below:
+        tensor[..., 1, 1], tensor[..., 0, 1] = positives_below, negatives_below
+    else:
+        tensor[..., 1, 1], tensor[..., 0, 1] = positives - positives_below, negatives - negatives_below
+    tensor[..., 1, 0] = positives - tensor[..., 1, 1]
+    tensor[..., 0, 0] = negatives - tensor[..., 0, 1]
+    tensor = tensor[:, (end - start) > 0]
+
+    rates = confusion_rates(tensor)
+    sweep = pd.DataFrame(fairness_metrics(rates), index=pd.Index(thresholds, name="Threshold"))
+    sweep.insert(0, "Selection Rate", _ratio(tensor[..., :, 1].sum(axis=(1, 2)), tensor.sum(axis=(1, 2, 3))))
+    return sweep
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_parity(fingerprint, attributes, target_column, positive_outcome, _df):
+    return demographic_parity(_df, list(attributes), target_column, positive_outcome)
+
+
+def get_demographic_parity(df, attributes, target_column, positive_outcome):
+    """Memoized `demographic_parity`, keyed by the dataset fingerprint and arguments."""
+    return _cached_parity(dataset_fingerprint(df), tuple(attributes), target_column, positive_outcome, df)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_cube(fingerprint, attributes, target_column, positive_outcome, min_support, max_order, _df):
+    return intersectional_cube(_df, list(attributes), target_column, positive_outcome, min_support, max_order)
+
+
+def get_intersectional_cube(df, attributes, target_column, positive_outcome, min_support=DEFAULT_MIN_SUPPORT,
+                            max_order=None):
+    """Memoized `intersectional_cube`, keyed by the dataset fingerprint and arguments."""
+    return _cached_cube(dataset_fingerprint(df), tuple(attributes), target_column, positive_outcome,
+                        min_support, max_order, df)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def get_bootstrap_dpd(group_counts, group_approvals, replicates=DEFAULT_BOOTSTRAP_REPLICATES, confidence=0.95,
+                      seed=0, n_jobs=1):
+    """Memoized `bootstrap_dpd`; the counts are small, so they are the cache key themselves."""
+    return bootstrap_dpd(group_counts, group_approvals, replicates, confidence, seed, n_jobs)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_fairness_suite(fingerprint, attribute, label_column, positive_label, prediction_column,
+                           positive_prediction, score_column, approve_below, n_bins, _df):
+    return fairness_suite(_df, attribute, label_column, positive_label, prediction_column, positive_prediction,
+                          score_column, approve_below, n_bins)
+
+
+def get_fairness_suite(df, attribute, label_column, positive_label, prediction_column, positive_prediction,
+                       score_column=None, approve_below=True, n_bins=DEFAULT_CALIBRATION_BINS):
+    """Memoized `fairness_suite`, keyed by the dataset fingerprint and arguments."""
+    return _cached_fairness_suite(dataset_fingerprint(df), attribute, label_column, positive_label,
+                                  prediction_column, positive_prediction, score_column, approve_below, n_bins, df)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_threshold_sweep(fingerprint, attribute, label_column, positive_label, score_column, thresholds,
+                            approve_below, _df):
+    return threshold_sweep(_df, attribute, label_column, positive_label, score_column, thresholds, approve_below)
+
+
+def get_threshold_sweep(df, attribute, label_column, positive_label, score_column, thresholds, approve_below=True):
+    """Memoized `threshold_sweep`, keyed by the dataset fingerprint and arguments."""
+    return _cached_threshold_sweep(dataset_fingerprint(df), attribute, label_column, positive_label, score_column,
+                                   tuple(thresholds), approve_below, df)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _cached_permutation_test(fingerprint, attribute, target_column, positive_outcome, permutations, seed, _df):
+    return permutation_test_dpd(_df, attribute, target_column, positive_outcome, permutations, seed)
+
+
+def get_permutation_test(df, attribute, target_column, positive_outcome, permutations=DEFAULT_PERMUTATIONS, seed=0):
+    """Memoized `permutation_test_dpd`, keyed by the dataset fingerprint and arguments."""
+    return _cached_permutation_test(dataset_fingerprint(df), attribute, target_column, positive_outcome,
+                                    permutations, seed, df)
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_distribution_disparity(fingerprint, attribute, features, _df):
+    return distribution_disparity(_df, attribute, list(features))
+
+
+def get_distribution_disparity(df, attribute, features):
+    """Memoized `distribution_disparity`, keyed by the dataset fingerprint and arguments."""
+    return _cached_distribution_disparity(dataset_fingerprint(df), attribute, tuple(features), df)
@@ -0,0 +1,269 @@
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from application_pages.data_generator import COLUMN_ORDER, CATEGORICAL_SPECS, LOAN_ID_DTYPE
+
+
+DEFAULT_CHUNK_SIZE = 250_000
+
+# Directory that server-side file paths must resolve into; defaults to ./data
+LOCAL_DATA_DIR_ENV = "QULAB_DATA_DIR"
+
+# Expected loan schema: column -> target dtype kind
+LOAN_SCHEMA = {
+    "Loan_ID": "id",
+    "Gender": "category",
+    "Married": "category",
+    "Dependents": "category",
+    "Education": "category",
+    "Self_Employed": "category",
+    "ApplicantIncome": "int32",
+    "CoapplicantIncome": "int32",
+    "LoanAmount": "float32",
+    "Loan_Amount_Term": "int16",
+    "Credit_History": "float32",
+    "Property_Area": "category",
+    "Loan_Status": "category",
+}
+
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".txt": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+
+
+def detect_format(source):
+    """Infer the file format from a path or an uploaded file's name."""
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    suffix = os.path.splitext(str(name))[1].lower()
+    if suffix not in FILE_FORMATS:
+        raise ValueError(
+            f"Unsupported file type '{suffix or name}'. Expected one of: {', '.join(sorted(FILE_FORMATS))}.")
+    return FILE_FORMATS[suffix]
+
+
+def local_data_dir():
+    """Directory that local ingestion paths are restricted to."""
+    return os.path.realpath(os.environ.get(LOCAL_DATA_DIR_ENV) or os.path.join(os.getcwd(), "data"))
+
+
+def resolve_local_path(path):
+    """Resolve a user-supplied server path, refusing anything outside `local_data_dir()`.
+
+    Symlinks and '..' are resolved first, so neither can be used to escape the directory.
+    """
+    root = local_data_dir()
+    resolved = os.path.realpath(os.path.join(root, os.path.expanduser(str(path))))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f"Local files must be inside '{root}'.")
+    if not os.path.isfile(resolved):
+        raise ValueError(f"No file found at '{path}' in '{root}'.")
+    return resolved
+
+
+def validate_schema(columns):
+    """Check that all expected loan columns are present and return any extra columns."""
+    missing = [col for col in LOAN_SCHEMA if col not in columns]
+    if missing:
+        raise ValueError(
+            f"Input is missing required columns: {', '.join(missing)}.")
+    return [col for col in columns if col not in LOAN_SCHEMA]
+
+
+def _iter_csv(source, chunk_size):
+    csv_dtypes = {col: "category" for col, kind in LOAN_SCHEMA.items() if kind == "category"}
+    csv_dtypes["Loan_ID"] = str
+    with pd.read_csv(source, chunksize=chunk_size, dtype=csv_dtypes) as reader:
+        yield from reader
+
+
+def _iter_parquet(source, chunk_size):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(source)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+def _iter_arrow(source, chunk_size):
+    import pyarrow as pa
+
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        batches = pa.ipc.open_stream(source)
+    for batch in batches:
+        for offset in range(0, batch.num_rows, chunk_size):
+            yield batch.slice(offset, chunk_size).to_pandas()
+
+
+def _arrow_allocated_bytes():
+    import pyarrow as pa
+
+    return pa.total_allocated_bytes()
+
+
+def iter_file_chunks(source, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream a CSV, Parquet or Arrow IPC file as raw pandas chunks."""
+    file_format = file_format or detect_format(source)
+    readers = {"csv": _iter_csv, "parquet": _iter_parquet, "arrow": _iter_arrow}
+    if file_format not in readers:
+        raise ValueError(f"Unsupported file format '{file_format}'.")
+    return readers[file_format](source, chunk_size)
+
+
+def _to_category(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if categories.dtype != object and not pd.api.types.is_string_dtype(categories):
+            series = series.cat.rename_categories(categories.astype(str))
+        return series
+    return series.astype(object).where(series.isna(), series.astype(str)).astype("category")
+
+
+def _fits_integer(values, dtype):
+    if np.isnan(values).any() or not np.array_equal(values, np.trunc(values)):
+        return False
+    limits = np.iinfo(dtype)
+    return not len(values) or (values.min() >= limits.min and values.max() <= limits.max)
+
+
+def coerce_chunk(chunk):
+    """Coerce a raw chunk to the compact loan schema.
+
+    Returns the coerced chunk and the number of non-null values per column that
+    could not be parsed and were set to missing.
+    """
+    coerced = {}
+    out = {}
+    for col in chunk.columns:
+        kind = LOAN_SCHEMA.get(col)
+        series = chunk[col]
+        if kind == "category":
+            out[col] = _to_category(series)
+        elif kind == "id":
+            if not pd.api.types.is_string_dtype(series.dtype):
+                series = series.astype(object).where(series.isna(), series.astype(str))
+            out[col] = series.astype(LOAN_ID_DTYPE)
+        elif kind in ("int16", "int32", "float32"):
+            numeric = pd.to_numeric(series, errors="coerce")
+            bad = int(numeric.isna().sum() - series.isna().sum())
+            if bad:
+                coerced[col] = bad
+            values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+            # Integer columns fall back to float32 when they contain missing, fractional or out-of-range values
+            if kind != "float32" and _fits_integer(values, kind):
+                out[col] = values.astype(kind)
+            else:
+                out[col] = values.astype(np.float32)
+        else:
+            out[col] = series
+    return pd.DataFrame(out, index=chunk.index), coerced
+
+
+def _combine_chunks(chunks):
+    """Concatenate coerced chunks, unifying categories and numeric dtypes."""
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+
+    for col, kind in LOAN_SCHEMA.items():
+        if kind == "category":
+            known = list(CATEGORICAL_SPECS.get(col, ([], None))[0])
+            seen = pd.Index(known)
+            for chunk in chunks:
+                seen = seen.append(chunk[col].cat.categories.difference(seen))
+            for i, chunk in enumerate(chunks):
+                chunks[i] = chunk.assign(**{col: chunk[col].cat.set_categories(seen)})
+        elif kind in ("int16", "int32") and any(chunk[col].dtype != kind for chunk in chunks):
+            for i, chunk in enumerate(chunks):
+                chunks[i] = chunk.assign(**{col: chunk[col].astype(np.float32)})
+    return pd.concat(chunks, ignore_index=True)
+
+
+def ingest_file(source, file_format=None, chunk_size=DEFAULT_CHUNK_SIZE, dtype_backend="numpy",
+                track_memory=True, sketch=None):
+    """Stream a file into a compact loan DataFrame with schema validation.
+
+    `dtype_backend="pyarrow"` returns Arrow-backed columns instead of the
+    NumPy/categorical dtypes the audit pages use by default. Returns the frame
+    and an ingestion report with throughput and, when `track_memory` is set,
+    peak memory (tracing slows ingestion down noticeably). tracemalloc only
+    sees Python and NumPy allocations, so for Parquet and Arrow input the
+    Arrow memory pool is sampled after every chunk and its largest growth is
+    reported separately and added to the peak. A `sketch` (e.g.
+    `sketches.ProfileSketch`) is updated with every coerced chunk.
+    """
+    file_format = file_format or detect_format(source)
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if track_memory:
+        tracemalloc.reset_peak()
+    peak_bytes = None
+    arrow_allocated = _arrow_allocated_bytes if track_memory and file_format in ("parquet", "arrow") else None
+    arrow_baseline = arrow_peak = arrow_allocated() if arrow_allocated else 0
+    start = time.perf_counter()
+
+    chunks = []
+    coerced_total = {}
+    extra_columns = []
+    try:
+        for i, raw_chunk in enumerate(iter_file_chunks(source, file_format, chunk_size)):
+            if arrow_allocated:
+                arrow_peak = max(arrow_peak, arrow_allocated())
+            if i == 0:
+                extra_columns = validate_schema(raw_chunk.columns)
+            chunk, coerced = coerce_chunk(raw_chunk)
+            del raw_chunk
+            if sketch is not None:
+                sketch.update(chunk)
+            for col, count in coerced.items():
+                coerced_total[col] = coerced_total.get(col, 0) + count
+            chunks.append(chunk)
+
+        if not chunks:
+            raise ValueError("Input file contains no rows.")
+
+        df = _combine_chunks(chunks)
+        del chunks
+        ordered = [col for col in COLUMN_ORDER if col in df.columns] + extra_columns
+        df = df[ordered]
+        if dtype_backend == "pyarrow":
+            df = df.convert_dtypes(dtype_backend="pyarrow")
+        if arrow_allocated:
+            arrow_peak = max(arrow_peak, arrow_allocated())
+
+        elapsed = time.perf_counter() - start
+        if track_memory:
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            peak_bytes += arrow_peak - arrow_baseline
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    report = {
+        "Source": str(getattr(source, "name", source)),
+        "Format": file_format,
+        "Rows": len(df),
+        "Chunks": i + 1,
+        "Seconds": round(elapsed, 3),
+        "Rows/sec": round(len(df) / elapsed) if elapsed > 0 else None,
+        "Peak Memory (MB)": round(peak_bytes / 1e6, 1) if peak_bytes is not None else None,
+        "Arrow Memory (MB)": round((arrow_peak - arrow_baseline) / 1e6, 1) if arrow_allocated else None,
+        "Frame Memory (MB)": round(float(df.memory_usage(deep=True).sum()) / 1e6, 1),
+        "Coerced Values": coerced_total,
+        "Extra Columns": extra_columns,
+    }
+    return df, report
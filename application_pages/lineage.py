@@ -0,0 +1,110 @@
+import datetime
+import hashlib
+import json
+from collections import OrderedDict
+
+import pandas as pd
+
+from application_pages.profiling import dataset_fingerprint
+
+
+def params_fingerprint(params):
+    """Stable hash of a JSON-serializable parameter dict."""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+class LineageGraph:
+    """Content-addressed lineage DAG with a cache of transformation results.
+
+    Nodes are dataset content hashes; each edge records the stage and the
+    parameters that turned an input hash into an output hash. Transformations
+    run through `run()` are cached by (stage, input hash, parameter hash), so
+    re-applying identical settings returns the earlier output without
+    recomputing it.
+    """
+
+    def __init__(self, cache_size=4):
+        self.cache_size = cache_size
+        self.nodes = {}
+        self.edges = OrderedDict()
+        self._cache = OrderedDict()
+
+    def _add_node(self, df, stage):
+        fingerprint = dataset_fingerprint(df)
+        if fingerprint not in self.nodes:
+            self.nodes[fingerprint] = {
+                "Stage": stage,
+                "Rows": len(df),
+                "Columns": len(df.columns),
+                "Created": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        return fingerprint
+
+    def _add_edge(self, stage, input_hash, params, output_hash):
+        key = (stage, input_hash, params_fingerprint(params))
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if key in self.edges:
+            self.edges[key]["Runs"] += 1
+            self.edges[key]["Last Run"] = now
+        else:
+            self.edges[key] = {
+                "Stage": stage,
+                "Input": input_hash,
+                "Output": output_hash,
+                "Parameters": json.dumps(params, sort_keys=True, default=str),
+                "Runs": 1,
+                "Last Run": now,
+            }
+
+    def record_source(self, stage, df, params):
+        """Register a dataset with no upstream input (e.g. an ingestion) and return its hash."""
+        output_hash = self._add_node(df, stage)
+        self._add_edge(stage, None, params, output_hash)
+        return output_hash
+
+    def lookup(self, stage, input_df, params):
+        """Cached (output_df, details) of an earlier identical transformation, or None."""
+        key = (stage, dataset_fingerprint(input_df), params_fingerprint(params))
+        if key not in self._cache:
+            return None
+        self._cache.move_to_end(key)
+        return self._cache[key]
+
+    def record(self, stage, input_df, params, output_df, details):
+        """Add a completed transformation to the graph and the result cache; returns the output hash."""
+        input_hash = self._add_node(input_df, "Input")
+        self._cache[(stage, input_hash, params_fingerprint(params))] = (output_df, details)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        output_hash = self._add_node(output_df, stage)
+        self._add_edge(stage, input_hash, params, output_hash)
+        return output_hash
+
+    def run(self, stage, input_df, params, transform):
+        """Apply `transform(input_df) -> (output_df, details)`, or reuse a cached result.
+
+        Returns (output_df, details, output_hash, cached).
+        """
+        result = self.lookup(stage, input_df, params)
+        cached = result is not None
+        output_df, details = result if cached else transform(input_df)
+        output_hash = self.record(stage, input_df, params, output_df, details)
+        return output_df, details, output_hash, cached
+
+    def to_frame(self):
+        """Lineage edges as a DataFrame, oldest first."""
+        columns = ["Stage", "Input", "Output", "Parameters", "Runs", "Last Run"]
+        return pd.DataFrame(list(self.edges.values()), columns=columns)
+
+    def to_dot(self):
+        """Graphviz DOT source for `st.graphviz_chart`."""
+        lines = ["digraph lineage {", "  rankdir=LR;", "  node [shape=box, fontsize=10];"]
+        for fingerprint, node in self.nodes.items():
+            label = f"{node['Stage']}\\n{fingerprint[:10]}\\n{node['Rows']} rows"
+            lines.append(f'  "{fingerprint}" [label="{label}"];')
+        for edge in self.edges.values():
+            if edge["Input"] is not None and edge["Input"] != edge["Output"]:
+                lines.append(f'  "{edge["Input"]}" -> "{edge["Output"]}" [label="{edge["Stage"]}", fontsize=9];')
+        lines.append("}")
+        return "\n".join(lines)
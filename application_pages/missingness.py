@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from application_pages.profiling import dataset_fingerprint
+
+
+MISSINGNESS_CHUNK_SIZE = 1_000_000
+# Cap on mask cells per chunk, which also keeps float32 products exact (< 2**24 rows)
+_MAX_CHUNK_CELLS = 2 ** 24
+
+
+def pack_missing_patterns(mask):
+    """Pack an (n_rows, n_columns) boolean mask into one row of 64-bit words per row."""
+    packed = np.packbits(mask, axis=1)
+    words = np.zeros((len(mask), -(-packed.shape[1] // 8) * 8), dtype=np.uint8)
+    words[:, :packed.shape[1]] = packed
+    return words.view(np.uint64)
+
+
+def _hash_words(words):
+    # Chain a bijective 64-bit mixer over the words; single-word patterns need no hashing
+    if words.shape[1] == 1:
+        return words[:, 0]
+    hashes = pd.util.hash_array(words[:, 0])
+    for j in range(1, words.shape[1]):
+        hashes = pd.util.hash_array(hashes ^ words[:, j])
+    return hashes
+
+
+def _group_patterns(words, weights=None):
+    """Distinct packed rows and their (weighted) counts, grouped by a hash of each row's words."""
+    codes, _ = pd.factorize(_hash_words(words))
+    first = np.empty(codes.max() + 1 if len(codes) else 0, dtype=np.intp)
+    first[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)
+    representatives = words[first]
+    if not (words == representatives[codes]).all():
+        # Hash collision between different patterns: group by the exact words instead
+        representatives, codes = np.unique(words, axis=0, return_inverse=True)
+        codes = codes.ravel()
+    counts = np.bincount(codes, weights=weights, minlength=len(representatives))
+    return representatives, counts.astype(np.int64)
+
+
+def missingness_patterns(df, columns=None, chunk_size=MISSINGNESS_CHUNK_SIZE, max_patterns=1000):
+    """Missing-value patterns and the co-missingness matrix in one chunked pass.
+
+    Each row's null pattern is packed into a bitset; patterns are counted by
+    hashing the packed words, and co-missingness (how often two columns are
+    missing in the same row) is accumulated as `M.T @ M` over row chunks. The
+    pattern table lists the `max_patterns` most frequent patterns; the
+    distinct pattern count is exact.
+    """
+    columns = list(df.columns if columns is None else columns)
+    n_cols = len(columns)
+    co_missing = np.zeros((n_cols, n_cols), dtype=np.int64)
+    chunk_patterns, chunk_counts = [], []
+    frame = df[columns]
+    chunk_size = max(1, min(chunk_size, _MAX_CHUNK_CELLS // max(n_cols, 1)))
+
+    for start in range(0, len(df), chunk_size):
+        mask = np.ascontiguousarray(frame.iloc[start:start + chunk_size].isna().to_numpy())
+        block = mask.astype(np.float32)
+        co_missing += (block.T @ block).astype(np.int64)
+        representatives, counts = _group_patterns(pack_missing_patterns(mask))
+        chunk_patterns.append(representatives)
+        chunk_counts.append(counts)
+
+    if len(chunk_patterns) > 1:
+        patterns_words, pattern_counts = _group_patterns(
+            np.concatenate(chunk_patterns), np.concatenate(chunk_counts))
+    elif chunk_patterns:
+        patterns_words, pattern_counts = chunk_patterns[0], chunk_counts[0]
+    else:
+        patterns_words, pattern_counts = pack_missing_patterns(np.zeros((0, n_cols), dtype=bool)), np.zeros(0, np.int64)
+
+    order = np.argsort(-pattern_counts, kind="stable")
+    top = order[:max_patterns]
+    bits = np.unpackbits(patterns_words[top].view(np.uint8), axis=1, count=n_cols).astype(bool)
+    column_names = np.array([str(col) for col in columns], dtype=object)
+    patterns = pd.DataFrame({
+        "Missing Columns": [", ".join(column_names[row]) or "(complete)" for row in bits],
+        "Columns Missing": bits.sum(axis=1),
+        "Rows": pattern_counts[top],
+        "Percentage": pattern_counts[top] / max(len(df), 1) * 100,
+    })
+    complete = patterns_words.any(axis=1) == 0 if n_cols else np.ones(len(patterns_words), dtype=bool)
+
+    return {
+        "Rows": len(df),
+        "Columns": columns,
+        "Distinct Patterns": len(pattern_counts),
+        "Complete Rows": int(pattern_counts[complete].sum()),
+        "Patterns": patterns,
+        "Co-Missingness": pd.DataFrame(co_missing, index=columns, columns=columns),
+    }
+
+
+def conditional_co_missingness(report):
+    """P(column missing | row's index column missing) for columns with any missing values."""
+    co_missing = report["Co-Missingness"]
+    counts = pd.Series(np.diag(co_missing), index=co_missing.index)
+    cols = counts[counts > 0].index
+    return co_missing.loc[cols, cols].div(counts[cols], axis=0)
+
+
+def top_co_missing_pairs(report, n=5):
+    """Column pairs most often missing together, as (column, column, rows) tuples."""
+    co_missing = report["Co-Missingness"].to_numpy()
+    columns = report["Columns"]
+    i, j = np.triu_indices(len(columns), k=1)
+    counts = co_missing[i, j]
+    order = np.argsort(-counts, kind="stable")[:n]
+    return [(columns[i[k]], columns[j[k]], int(counts[k])) for k in order if counts[k] > 0]
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_missingness(fingerprint, _df):
+    return missingness_patterns(_df)
+
+
+def get_missingness_report(df):
+    """Memoized missingness-pattern report, keyed by the dataset fingerprint."""
+    return _cached_missingness(dataset_fingerprint(df), df)
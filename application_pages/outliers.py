@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from application_pages.profiling import dataset_fingerprint
+
+
+IQR_QUARTILES = [0.25, 0.75]
+
+
+def iqr_quartiles(df, columns):
+    """Q1 and Q3 of every column from a single `quantile` call over the numeric block."""
+    quartiles = df[list(columns)].quantile(IQR_QUARTILES)
+    quartiles.index = ["25%", "75%"]
+    return quartiles
+
+
+def profile_quartiles(profile):
+    """Q1/Q3 table from a sketch-mode dataset profile, or None so exact quartiles are computed."""
+    if profile.get("Mode") != "Sketch":
+        return None
+    return profile["Numeric Stats"].loc[["25%", "75%"]]
+
+
+def iqr_outlier_bounds(quartiles, multiplier=1.5):
+    """Per-column IQR bounds from a quartile table with "25%" and "75%" rows."""
+    q1, q3 = quartiles.loc["25%"], quartiles.loc["75%"]
+    iqr = q3 - q1
+    return pd.DataFrame({
+        "Q1": q1,
+        "Q3": q3,
+        "IQR": iqr,
+        "Lower Bound": q1 - multiplier * iqr,
+        "Upper Bound": q3 + multiplier * iqr,
+    })
+
+
+def scan_outliers(df, columns, multiplier=1.5, quartiles=None):
+    """Flag IQR outliers in all `columns` at once.
+
+    Quartiles are computed in one pass unless given (e.g. from a dataset
+    profile), so trying another multiplier only re-runs the comparisons.
+    Returns a dict with the bounds table, an (n_rows, n_columns) boolean
+    outlier mask and per-column lower/upper counts. Missing values are never
+    flagged, and columns without bounds (no observed values) are skipped.
+    """
+    columns = list(columns)
+    if quartiles is None:
+        quartiles = iqr_quartiles(df, columns)
+    bounds = iqr_outlier_bounds(quartiles[columns], multiplier)
+    checked = np.flatnonzero(bounds[["Lower Bound", "Upper Bound"]].notna().all(axis=1).to_numpy())
+    below = np.zeros((len(df), len(columns)), dtype=bool)
+    above = np.zeros((len(df), len(columns)), dtype=bool)
+    if len(checked):
+        values = df[[columns[j] for j in checked]].to_numpy(dtype=np.float64, na_value=np.nan)
+        below[:, checked] = values < bounds["Lower Bound"].to_numpy()[checked]
+        above[:, checked] = values > bounds["Upper Bound"].to_numpy()[checked]
+    mask = below | above
+    return {
+        "Columns": columns,
+        "Multiplier": multiplier,
+        "Bounds": bounds,
+        "Mask": mask,
+        "Lower Counts": pd.Series(below.sum(axis=0), index=columns),
+        "Upper Counts": pd.Series(above.sum(axis=0), index=columns),
+        "Rows With Outliers": int(mask.any(axis=1).sum()),
+    }
+
+
+def outlier_summary(scan, rows):
+    """Bounds plus outlier counts and percentages per column."""
+    summary = scan["Bounds"].copy()
+    summary["Lower Outliers"] = scan["Lower Counts"]
+    summary["Upper Outliers"] = scan["Upper Counts"]
+    summary["Outlier Percentage"] = (
+        (scan["Lower Counts"] + scan["Upper Counts"]) / max(rows, 1)) * 100
+    return summary
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_outlier_summary(fingerprint, columns, multiplier, quartile_key, _df, _quartiles):
+    scan = scan_outliers(_df, list(columns), multiplier, _quartiles)
+    return outlier_summary(scan, len(_df)), scan["Rows With Outliers"]
+
+
+def get_outlier_summary(df, columns, multiplier=1.5, quartiles=None):
+    """Memoized all-columns outlier summary; returns (summary table, rows with any outlier).
+
+    `quartiles` (e.g. `profile_quartiles(profile)` in sketch mode) replaces
+    the exact quartile scan and is part of the cache key.
+    """
+    columns = tuple(columns)
+    quartile_key = None
+    if quartiles is not None:
+        quartiles = quartiles[list(columns)]
+        quartile_key = tuple(map(tuple, quartiles.to_numpy(dtype=np.float64).tolist()))
+    return _cached_outlier_summary(
+        dataset_fingerprint(df), columns, float(multiplier), quartile_key, df, quartiles)
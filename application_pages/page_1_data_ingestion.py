@@ -1,7 +1,32 @@
 
 import streamlit as st
-import pandas as pd
-import numpy as np
+import datetime
+
+from application_pages.data_generator import (
+    DEFAULT_NUM_RECORDS, DEFAULT_SEED, generate_loan_data)
+from application_pages.ingestion import FILE_FORMATS, ingest_file, local_data_dir, resolve_local_path
+from application_pages.profiling import (
+    get_dataset_profile, missing_value_table, profiling_settings, show_profile_mode, store_streamed_profile,
+    stream_sketch, summary_table)
+from application_pages.sketches import hll_relative_error, kll_rank_error
+
+
+def _load_raw_data(df, description, params, sketch=None):
+    """Replace the raw dataset, reset downstream results and log the load."""
+    st.session_state.raw_data = df
+    if sketch is not None:
+        store_streamed_profile(df, sketch)
+    st.session_state.lineage.record_source("Ingestion", df, params)
+    st.session_state.cleaned_data = None
+    st.session_state.simulated_results = None
+    new_log_entry = {
+        "Timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Action": "Data Ingestion",
+        "Description": description,
+        "User": "Risk_Manager_001"
+    }
+    st.session_state.provenance_logs.append(new_log_entry)
+    st.success(f"Loaded {len(df)} records.")
 
 
 def main():
@@ -33,46 +58,101 @@ Your journey through these stages will build a robust assurance case, evidencing
     **Underlying concept:** Data ingestion and initial exploration are fundamental steps in any data-driven workflow, providing the necessary context for subsequent analysis and model development. It ensures that the data being used is understood and relevant to the business problem.
     """)
 
+    st.markdown("#### Load Loan Application Data")
+    st.markdown("""
+    **Risk Manager's Action:** Start from the synthetic sample portfolio, or ingest a real application extract (CSV, Parquet or Arrow IPC). Files are streamed in chunks, validated against the expected loan schema and stored in a compact form.
+    """)
+
+    data_source = st.radio(
+        "Data Source:",
+        options=["Synthetic Sample Data", "Upload File", "Local File Path"],
+        horizontal=True,
+        key="data_source"
+    )
+
+    if data_source == "Synthetic Sample Data":
+        col1, col2 = st.columns(2)
+        with col1:
+            num_records = st.number_input(
+                "Number of Records:", min_value=100, max_value=50_000_000,
+                value=DEFAULT_NUM_RECORDS, step=1000, key="synthetic_num_records")
+        with col2:
+            seed = st.number_input(
+                "Random Seed:", min_value=0, value=DEFAULT_SEED, step=1, key="synthetic_seed")
+        if st.button("Generate Synthetic Data"):
+            # In sketch mode the profile is built from the generated chunks as they stream past
+            sketch = stream_sketch()
+            _load_raw_data(
+                generate_loan_data(int(num_records), seed=int(seed), sketch=sketch),
+                f"Generated {int(num_records)} synthetic loan applications with seed {int(seed)}.",
+                {"source": "synthetic", "num_records": int(num_records), "seed": int(seed)}, sketch)
+    else:
+        if data_source == "Upload File":
+            source = st.file_uploader(
+                "Upload a loan application extract:",
+                type=[suffix.lstrip(".") for suffix in FILE_FORMATS])
+        else:
+            source = st.text_input(
+                "Path to a loan application extract:",
+                help=f"Relative to, and restricted to, the server data directory '{local_data_dir()}'.") or None
+        if source is not None and st.button("Ingest File"):
+            try:
+                if isinstance(source, str):
+                    source = resolve_local_path(source)
+                sketch = stream_sketch()
+                with st.spinner("Streaming file in chunks..."):
+                    df, report = ingest_file(source, sketch=sketch)
+            except (ValueError, OSError) as e:
+                st.error(f"Ingestion failed: {e}")
+            else:
+                st.session_state.ingestion_report = report
+                _load_raw_data(
+                    df, f"Ingested {report['Rows']} records from '{report['Source']}' ({report['Format']}) at {report['Rows/sec']} rows/sec.",
+                    {"source": report["Source"], "format": report["Format"]}, sketch)
+
     # Generate synthetic loan data
     if st.session_state.raw_data is None:
-        num_records = 1000
-        data = {
-            "Loan_ID": [f"L{i:04d}" for i in range(num_records)],
-            "Gender": np.random.choice(["Male", "Female"], num_records, p=[0.6, 0.4]),
-            "Married": np.random.choice(["Yes", "No"], num_records, p=[0.7, 0.3]),
-            "Dependents": np.random.choice(["0", "1", "2", "3+"], num_records, p=[0.5, 0.2, 0.15, 0.15]),
-            "Education": np.random.choice(["Graduate", "Not Graduate"], num_records, p=[0.75, 0.25]),
-            "Self_Employed": np.random.choice(["Yes", "No"], num_records, p=[0.15, 0.85]),
-            "ApplicantIncome": np.random.randint(1500, 7000, num_records),
-            "CoapplicantIncome": np.random.randint(0, 3000, num_records),
-            "LoanAmount": np.random.randint(90, 700, num_records),
-            "Loan_Amount_Term": np.random.choice([12, 36, 60, 120, 180, 240, 360, 480], num_records, p=[0.01, 0.02, 0.02, 0.05, 0.1, 0.08, 0.6, 0.12]),
-            "Credit_History": np.random.choice([0.0, 1.0, np.nan], num_records, p=[0.1, 0.8, 0.1]),
-            "Property_Area": np.random.choice(["Urban", "Semiurban", "Rural"], num_records, p=[0.35, 0.35, 0.3]),
-            "Loan_Status": np.random.choice(["Y", "N"], num_records, p=[0.7, 0.3]),
-        }
-
-        df = pd.DataFrame(data)
-        # Introduce some missing values intentionally for demonstration
-        for col in ["Gender", "Married", "Dependents", "Self_Employed", "LoanAmount", "Credit_History"]:
-            missing_indices = np.random.choice(
-                df.index, int(num_records * 0.05), replace=False)
-            df.loc[missing_indices, col] = np.nan
-
-        st.session_state.raw_data = df.copy()
+        st.session_state.raw_data = generate_loan_data(
+            DEFAULT_NUM_RECORDS, seed=DEFAULT_SEED)
+        st.session_state.lineage.record_source(
+            "Ingestion", st.session_state.raw_data,
+            {"source": "synthetic", "num_records": DEFAULT_NUM_RECORDS, "seed": DEFAULT_SEED})
+
+    if st.session_state.get("ingestion_report"):
+        with st.expander("Last Ingestion Report"):
+            st.json(st.session_state.ingestion_report)
 
     st.markdown("#### Raw Loan Application Data Sample")
     st.dataframe(st.session_state.raw_data.head())
 
+    with st.expander("Profiling Mode"):
+        st.markdown("""
+        Exact profiling scans the full dataset. Sketch profiling builds mergeable per-chunk sketches (KLL quantiles, HyperLogLog distinct counts, streaming moments), trading a bounded error for constant memory on very large portfolios.
+        """)
+        settings = profiling_settings()
+        mode = st.radio("Statistics:", options=["Exact", "Sketch"],
+                        index=["Exact", "Sketch"].index(settings["Mode"]),
+                        horizontal=True, key="profiling_mode")
+        quantile_k = st.slider(
+            "Quantile sketch size (k):", min_value=50, max_value=2000, step=50,
+            value=settings["Quantile K"], key="profiling_quantile_k")
+        st.caption(f"Approximate quantile rank error at k = {quantile_k}: {kll_rank_error(quantile_k):.2%}.")
+        hll_precision = st.slider(
+            "Distinct-count sketch precision (log2 registers):", min_value=8, max_value=16,
+            value=settings["HLL Precision"], key="profiling_hll_precision")
+        st.caption(f"Approximate distinct-count relative error at precision {hll_precision}: "
+                   f"{hll_relative_error(hll_precision):.2%}.")
+        st.session_state.profiling_settings = {
+            "Mode": mode, "Quantile K": quantile_k, "HLL Precision": hll_precision}
+
+    profile = get_dataset_profile(st.session_state.raw_data)
+
     st.markdown("#### Dataset Summary Statistics")
-    st.write(st.session_state.raw_data.describe(include='all'))
+    show_profile_mode(profile)
+    st.write(summary_table(profile))
 
     st.markdown("#### Missing Values Overview")
-    missing_data = st.session_state.raw_data.isnull().sum().to_frame(name="Missing Count")
-    missing_data["Missing Percentage"] = (
-        missing_data["Missing Count"] / len(st.session_state.raw_data)) * 100
-    st.dataframe(missing_data[missing_data["Missing Count"] > 0].sort_values(
-        by="Missing Percentage", ascending=False))
+    st.dataframe(missing_value_table(profile))
 
     st.markdown("""
     --- 
@@ -1,6 +1,5 @@
 
 import streamlit as st
-import pandas as pd
 import datetime
 
 
@@ -19,7 +18,56 @@ def main():
     st.dataframe(st.session_state.metadata)
 
     st.markdown("#### Provenance Logs")
-    st.dataframe(st.session_state.provenance_logs)
+    provenance_logs = st.session_state.provenance_logs
+    st.dataframe(provenance_logs.to_frame())
+
+    with st.expander("Filter Provenance Logs"):
+        log_frame = provenance_logs.to_frame()
+        col1, col2 = st.columns(2)
+        with col1:
+            action_filter = st.multiselect(
+                "Action:", options=sorted(log_frame["Action"].unique()), key="provenance_action_filter")
+        with col2:
+            user_filter = st.multiselect(
+                "User:", options=sorted(log_frame["User"].unique()), key="provenance_user_filter")
+        date_range = st.date_input("Date Range:", value=(), key="provenance_date_filter")
+        start = end = None
+        if len(date_range) == 2:
+            start = date_range[0].strftime("%Y-%m-%d 00:00:00")
+            end = date_range[1].strftime("%Y-%m-%d 23:59:59")
+        st.dataframe(provenance_logs.query(
+            action=action_filter or None, user=user_filter or None, start=start, end=end))
+
+    st.markdown("#### Provenance Log Integrity")
+    st.markdown("""
+    Every log entry is chained to the hash of the previous entry, and a Merkle checkpoint is recorded every few entries. Editing, reordering or deleting any past entry changes every later hash, so a recorded chain head proves the log has not been altered since.
+    """)
+    st.code(f"Chain head: {provenance_logs.head}\nEntries: {len(provenance_logs)}, checkpoints: {len(provenance_logs.checkpoints)}")
+    verify_scope = st.radio(
+        "Verification scope:", ["Full chain", "Since last checkpoint"], horizontal=True,
+        key="provenance_verify_scope")
+    if st.button("Verify Provenance Log"):
+        result = provenance_logs.verify(from_checkpoint=-1 if verify_scope == "Since last checkpoint" else None)
+        if result["Valid"]:
+            st.success(
+                f"Provenance log verified: {result['Entries Verified']} entries rehashed from entry "
+                f"{result['Verified From Entry']} in {result['Seconds']}s.")
+        else:
+            st.error(
+                f"Provenance log failed verification (first invalid entry: {result['First Invalid Entry']}, "
+                f"invalid checkpoints: {result['Invalid Checkpoints']}, "
+                f"entries stored without a hash: {result['Entries Missing Hash']}).")
+
+    st.markdown("#### Dataset Lineage Graph")
+    st.markdown("""
+    Each box is a dataset version identified by its content hash; each arrow is a transformation with the exact parameters that produced it. Re-running a stage with identical settings on the same input reuses the cached result instead of recomputing it.
+    """)
+    lineage = st.session_state.lineage
+    if lineage.nodes:
+        st.graphviz_chart(lineage.to_dot())
+        st.dataframe(lineage.to_frame())
+    else:
+        st.info("No datasets have been recorded yet.")
 
     st.markdown("#### Document Data Lineage")
     st.markdown("""
@@ -38,14 +86,10 @@ def main():
                 "Description": action_description,
                 "User": user_name
             }
-            st.session_state.provenance_logs = pd.concat(
-                [st.session_state.provenance_logs,
-                    pd.DataFrame([new_log_entry])],
-                ignore_index=True
-            )
+            st.session_state.provenance_logs.append(new_log_entry)
             st.success("Provenance log updated successfully!")
             # Display updated logs immediately
-            st.dataframe(st.session_state.provenance_logs)
+            st.dataframe(st.session_state.provenance_logs.to_frame())
         else:
             st.warning("Please provide a description for the data action.")
 
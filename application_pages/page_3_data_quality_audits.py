@@ -1,9 +1,106 @@
 
 import streamlit as st
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from application_pages.charts import bar_chart, box_chart
+from application_pages.data_generator import generate_loan_data
+from application_pages.drift import DriftMonitor, drift_risk_entries
+from application_pages.ingestion import FILE_FORMATS, ingest_file
+from application_pages.missingness import conditional_co_missingness, get_missingness_report
+from application_pages.outliers import get_outlier_summary, profile_quartiles
+from application_pages.profiling import (
+    dataset_fingerprint, get_dataset_profile, missing_value_table, show_profile_mode)
+
+
+DRIFT_TABLE_FORMAT = {"PSI": "{:.4f}", "KS": "{:.4f}", "JS": "{:.4f}",
+                      "Baseline Missing %": "{:.2f}", "Current Missing %": "{:.2f}"}
+
+
+def _drift_monitor(baseline):
+    """The session's drift monitor, rebuilt when the audited baseline changes."""
+    monitor = st.session_state.get("drift_monitor")
+    if monitor is None or monitor.baseline_fingerprint != dataset_fingerprint(baseline):
+        monitor = DriftMonitor(baseline)
+        st.session_state.drift_monitor = monitor
+    return monitor
+
+
+def _process_drift_batch(monitor, batch, batch_label):
+    """Add a batch to the monitor and raise register entries for features in alert."""
+    metrics = monitor.update(batch)
+    st.session_state.drift_batch_metrics = metrics
+    entries = drift_risk_entries(metrics, st.session_state.risk_register, batch_label)
+    if entries:
+        st.session_state.risk_register = pd.concat(
+            [st.session_state.risk_register, pd.DataFrame(entries)], ignore_index=True)
+    alerts = list(metrics.index[metrics["Alert"]])
+    log_entries = [{
+        "Action": "Drift Batch Processed",
+        "Description": f"{batch_label}: {len(batch)} applications compared to the audited baseline. "
+                       f"Features in alert: {', '.join(alerts) if alerts else 'none'}.",
+    }]
+    log_entries += [{
+        "Action": "Risk Register Update",
+        "Description": f"Added risk '{entry['Risk Name']}' (ID: {entry['Risk ID']}) with score {entry['Risk Score']} from drift monitoring.",
+    } for entry in entries]
+    st.session_state.provenance_logs.extend(log_entries)
+    return alerts, entries
+
+
+def drift_monitoring_section():
+    st.markdown("#### Data Drift Monitoring")
+    st.markdown("""
+    **Risk Manager's Action:** The audited dataset is a snapshot, but new applications keep arriving. Feed new batches through the monitor to compare them with the audited baseline. Features whose distribution shifts beyond the thresholds are raised as open risks in the Risk Register.
+    """)
+    monitor = _drift_monitor(st.session_state.raw_data)
+
+    batch_source = st.radio(
+        "New batch source:", ["Synthetic Batch", "Upload Batch File"], horizontal=True, key="drift_batch_source")
+    if batch_source == "Synthetic Batch":
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            batch_size = st.number_input(
+                "Batch size:", min_value=100, max_value=1_000_000, value=1000, step=100, key="drift_batch_size")
+        with col2:
+            batch_seed = st.number_input(
+                "Batch seed:", min_value=0, value=1, step=1, key="drift_batch_seed")
+        with col3:
+            income_shift = st.slider(
+                "Applicant income shift (%):", min_value=-50, max_value=50, value=0, step=5,
+                key="drift_income_shift",
+                help="Scale ApplicantIncome in the generated batch to simulate a shift in the applicant population.")
+        if st.button("Process Synthetic Batch"):
+            batch = generate_loan_data(int(batch_size), seed=int(batch_seed))
+            if income_shift:
+                batch["ApplicantIncome"] = batch["ApplicantIncome"] * (1 + income_shift / 100)
+            st.session_state.drift_last_result = _process_drift_batch(
+                monitor, batch,
+                f"Batch {monitor.batches + 1} (synthetic, seed {int(batch_seed)}, income shift {income_shift}%)")
+    else:
+        source = st.file_uploader(
+            "Upload a batch of new applications:",
+            type=[suffix.lstrip(".") for suffix in FILE_FORMATS], key="drift_batch_file")
+        if source is not None and st.button("Process Uploaded Batch"):
+            try:
+                batch, report = ingest_file(source, track_memory=False)
+            except (ValueError, OSError) as e:
+                st.error(f"Could not read batch: {e}")
+            else:
+                st.session_state.drift_last_result = _process_drift_batch(
+                    monitor, batch, f"Batch {monitor.batches + 1} ('{report['Source']}')")
+
+    if monitor.batches:
+        alerts, entries = st.session_state.get("drift_last_result", ([], []))
+        if alerts:
+            st.error(f"Drift alert on: {', '.join(alerts)}. {len(entries)} new risk(s) added to the Risk Register.")
+        st.markdown("##### Latest Batch vs. Baseline")
+        st.dataframe(st.session_state.drift_batch_metrics.style.format(DRIFT_TABLE_FORMAT))
+        st.markdown(f"##### All {monitor.batches} Batches ({monitor.rows} applications) vs. Baseline")
+        st.dataframe(monitor.cumulative_metrics().style.format(DRIFT_TABLE_FORMAT))
+        st.dataframe(monitor.history_frame())
+    st.markdown(r"""
+    **Population Stability Index** $PSI = \sum_i (a_i - e_i) \ln(a_i / e_i)$ compares the share of applications in each baseline bin ($e_i$) and in the new data ($a_i$); values above $0.25$ are commonly treated as a significant shift. **KS** is the largest gap between the two cumulative distributions (numerical features), and **JS** is the Jensen–Shannon divergence (0 = identical, 1 = disjoint). Bins are fixed from the baseline, so each batch only updates running counts.
+    """)
 
 
 def main():
@@ -18,33 +115,43 @@ def main():
     """)
 
     if st.session_state.raw_data is not None:
-        df = st.session_state.raw_data.copy()
+        df = st.session_state.raw_data
 
         st.markdown("#### Missing Values Analysis")
         st.markdown("""
         **Risk Manager's Action:** Review the visual representation of missing values. A high percentage of missing data in critical features can indicate a significant data quality risk that needs immediate attention.
         """)
-        missing_data = df.isnull().sum().to_frame(name="Missing Count")
-        missing_data["Missing Percentage"] = (
-            missing_data["Missing Count"] / len(df)) * 100
-        missing_data = missing_data[missing_data["Missing Count"] > 0].sort_values(
-            by="Missing Percentage", ascending=False)
+        profile = get_dataset_profile(st.session_state.raw_data)
+        missing_data = missing_value_table(profile)
+        show_profile_mode(profile)
 
         if not missing_data.empty:
-            fig_missing, ax_missing = plt.subplots(figsize=(10, 6))
-            sns.barplot(x=missing_data.index, y="Missing Percentage",
-                        data=missing_data, ax=ax_missing, palette="viridis")
-            ax_missing.set_title("Percentage of Missing Values Per Feature")
-            ax_missing.set_ylabel("Missing Percentage (%)")
-            ax_missing.set_xlabel("Features")
-            ax_missing.tick_params(axis='x', rotation=45)
-            st.pyplot(fig_missing)
+            st.image(bar_chart(
+                tuple(missing_data.index), tuple(missing_data["Missing Percentage"]),
+                title="Percentage of Missing Values Per Feature", xlabel="Features",
+                ylabel="Missing Percentage (%)", palette="viridis", rotation=45))
             st.markdown(f"""
             The bar chart above shows the percentage of missing values for each feature. Features with a significant proportion of missing data (e.g., Credit_History, Gender, Married) will require careful handling during the cleaning phase.
             """)
             st.markdown(r"""
             A common threshold for concern is often around $5-10%$ missing data for a single feature. If a feature exceeds this, its utility and reliability might be compromised, influencing model accuracy and fairness. For example, if a feature like Credit_History is $10%$ missing, it means $10%$ of our loan applicants lack this crucial information, potentially leading to biased loan decisions if not handled properly.
             """)
+
+            st.markdown("##### Missingness Patterns")
+            st.markdown("""
+            **Risk Manager's Action:** Check which features go missing *together*. Values that are missing in the same rows (for example `Credit_History` and `LoanAmount`) often share a root cause, such as an incomplete upstream feed, and imputing them independently can hide that systematic gap.
+            """)
+            missingness = get_missingness_report(st.session_state.raw_data)
+            col1, col2 = st.columns(2)
+            col1.metric("Distinct Missingness Patterns", missingness["Distinct Patterns"])
+            col2.metric("Complete Rows",
+                        f"{missingness['Complete Rows'] / max(missingness['Rows'], 1):.1%}")
+            st.dataframe(missingness["Patterns"].head(20))
+            st.markdown(r"""
+            The matrix below shows $P(\text{column missing} \mid \text{row feature missing})$: each row is conditioned on that feature being missing. Off-diagonal values well above the column's overall missing rate indicate features that fail together.
+            """)
+            st.dataframe(conditional_co_missingness(missingness).style.format(
+                "{:.2f}").background_gradient(cmap="Reds", vmin=0, vmax=1))
         else:
             st.info("No missing values found in the dataset.")
 
@@ -53,13 +160,26 @@ def main():
         **Risk Manager's Action:** Examine the box plots for numerical features to identify outliers. Outliers can distort statistical analyses and model training, leading to inaccurate risk assessments. Understanding their presence is key to mitigating their impact.
         """)
 
-        numerical_cols = df.select_dtypes(include=np.number).columns.tolist()
+        numerical_cols = list(profile["Numerical Columns"])
         if "Loan_Amount_Term" in numerical_cols:  # Exclude if it's more categorical than numerical in context
             numerical_cols.remove("Loan_Amount_Term")
         if "Credit_History" in numerical_cols:
             numerical_cols.remove("Credit_History")
 
         if numerical_cols:
+            outlier_multiplier = st.slider(
+                "IQR multiplier for the outlier summary:",
+                min_value=1.0, max_value=3.0, value=1.5, step=0.1,
+                key="outlier_summary_multiplier"
+            )
+            # In sketch mode the bounds come from the profile's sketch quartiles
+            outlier_table, rows_with_outliers = get_outlier_summary(
+                df, numerical_cols, outlier_multiplier, profile_quartiles(profile))
+            st.markdown("##### Outlier Summary Across All Numerical Features")
+            st.dataframe(outlier_table.sort_values(by="Outlier Percentage", ascending=False))
+            st.markdown(
+                f"{rows_with_outliers} of {len(df)} applications ({rows_with_outliers / max(len(df), 1):.1%}) have at least one outlying value at multiplier {outlier_multiplier}.")
+
             selected_col = st.selectbox(
                 "Select a numerical column to detect outliers:",
                 options=numerical_cols,
@@ -68,11 +188,9 @@ def main():
 
             if selected_col:
                 st.markdown(f"##### Outliers in `{selected_col}`")
-                fig_outlier, ax_outlier = plt.subplots(figsize=(8, 4))
-                sns.boxplot(x=df[selected_col],
-                            ax=ax_outlier, palette="rocket")
-                ax_outlier.set_title(f"Box Plot of {selected_col}")
-                st.pyplot(fig_outlier)
+                st.image(box_chart(
+                    st.session_state.raw_data, selected_col, title=f"Box Plot of {selected_col}"))
+                st.dataframe(outlier_table.loc[[selected_col]])
                 st.markdown(r"""
                 The box plot above visualizes the distribution of data for a numerical feature. Points extending significantly beyond the "whiskers" of the box are considered outliers. These often represent extreme values that might be data entry errors or genuine, but unusual, observations. For instance, in `ApplicantIncome`, unusually high incomes might be outliers. These outliers can inflate variance and affect statistical significance, potentially misleading the model's understanding of typical loan applicant behavior.
                 Mathematically, outliers are often defined as values that fall below $Q1 - 1.5 \times IQR$ or above $Q3 + 1.5 \times IQR$, where $Q1$ is the first quartile, $Q3$ is the third quartile, and $IQR$ is the Interquartile Range ($Q3 - Q1$).
@@ -80,6 +198,8 @@ def main():
         else:
             st.info("No numerical features found for outlier detection.")
 
+        drift_monitoring_section()
+
         st.markdown("""
         --- 
         **Risk Manager's Insight:** You've now identified critical data quality issues: missing values and outliers. These findings directly inform the necessity of data cleaning and preprocessing steps to ensure the data is fit for model consumption and that model risk is minimized.
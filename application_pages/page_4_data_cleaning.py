@@ -1,10 +1,66 @@
 
+import json
+import os
+import time
+
 import streamlit as st
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from application_pages.cleaning import (
+    GROUP_IMPUTATION_STRATEGIES, MIN_GROUP_SIZE, OUTLIER_STRATEGIES, CleaningPipeline)
+from application_pages.cleaning_jobs import cleaning_job_pending, start_cleaning_job
+from application_pages.profiling import (
+    dataset_fingerprint, get_dataset_profile, get_stratified_sample, show_profile_mode)
+
+
+PREVIEW_SAMPLE_SIZE = 5000
+TARGET_COLUMN = "Loan_Status"
+PREVIEW_STRATA_COLUMN = TARGET_COLUMN
+PREVIEW_STATS = ["mean", "std", "min", "max"]
+# Identifier-like columns make meaningless imputation groups; grouping by the target would leak it into features
+MAX_GROUP_KEY_CARDINALITY = 50
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _cached_preview(fingerprint, config, numerical_cols, _sample):
+    pipeline = CleaningPipeline.from_dict(json.loads(config))
+    cleaned, report = pipeline.fit_transform(_sample)
+    numerical_cols = list(numerical_cols)
+    before = _sample[numerical_cols].agg(PREVIEW_STATS).T
+    after = cleaned[numerical_cols].agg(PREVIEW_STATS).T
+    stats = pd.DataFrame(index=numerical_cols)
+    for stat in PREVIEW_STATS:
+        stats[f"{stat.title()} (Before)"] = before[stat]
+        stats[f"{stat.title()} (After)"] = after[stat]
+    missing = pd.DataFrame({"Before Cleaning": _sample.isna().sum(), "After Cleaning": cleaned.isna().sum()})
+    return stats, missing[missing["Before Cleaning"] > 0], pipeline.log_entries(report), report
+
+
+def preview_cleaning(pipeline, sample, numerical_cols):
+    """Clean `sample` with the pipeline's settings; memoized by (sample hash, settings).
+
+    Returns (before/after stats, before/after missing counts, log entries, report).
+    """
+    config = json.dumps(pipeline.to_dict(), sort_keys=True, default=str)
+    return _cached_preview(dataset_fingerprint(sample), config, tuple(numerical_cols), sample)
+
+
+@st.fragment(run_every=1.0)
+def cleaning_job_status():
+    """Poll a running full apply and rerun the page once it has finished."""
+    job = st.session_state.get("cleaning_job")
+    if job is None or "Future" not in job:
+        return
+    if job["Future"].done():
+        st.rerun()
+    elapsed = time.monotonic() - job["Submitted"]
+    st.info(
+        f"Applying cleaning to the full dataset in the background ({elapsed:.0f}s elapsed). "
+        "You can keep adjusting the preview; the cleaned data appears here as soon as the job finishes.",
+        icon="⏳")
+
 
 def main():
     st.markdown("### Step 4: Data Cleaning and Preprocessing")
@@ -22,7 +78,8 @@ def main():
             "No raw data available. Please go to 'Data Ingestion & Overview' to load the data.")
         return
 
-    df = st.session_state.raw_data.copy()
+    df = st.session_state.raw_data
+    raw_profile = get_dataset_profile(st.session_state.raw_data)
 
     st.markdown("#### Raw Data Sample (Before Cleaning)")
     st.dataframe(df.head())
@@ -33,7 +90,7 @@ def main():
     """)
 
     # Identify columns with missing values
-    missing_cols = df.columns[df.isnull().any()].tolist()
+    missing_cols = raw_profile["Missing Counts"][raw_profile["Missing Counts"] > 0].index.tolist()
     imputation_strategies = {}
 
     for col in missing_cols:
@@ -53,6 +110,28 @@ def main():
         )
         imputation_strategies[col] = strategy
 
+    group_candidates = [
+        col for col in df.columns
+        if col not in raw_profile["Numerical Columns"] and col != TARGET_COLUMN
+        and raw_profile["Cardinality"][col] <= MAX_GROUP_KEY_CARDINALITY]
+    group_imputed_cols = [col for col, strategy in imputation_strategies.items()
+                          if strategy in GROUP_IMPUTATION_STRATEGIES]
+    group_by = {}
+    min_group_size = MIN_GROUP_SIZE
+    if group_imputed_cols and group_candidates:
+        st.markdown("##### Group-Aware Imputation")
+        st.markdown("""
+        Global medians blur real differences between segments of the portfolio. Choose one or more categorical features to compute the median or mean **within each segment** instead (for example, `LoanAmount` per `Property_Area`). Segments with too few observed values fall back to the global statistic.
+        """)
+        group_keys = st.multiselect(
+            "Impute numerical features within groups of:",
+            options=group_candidates, default=[], key="impute_group_keys")
+        if group_keys:
+            min_group_size = st.number_input(
+                "Minimum observed values per group:", min_value=1, max_value=10_000,
+                value=MIN_GROUP_SIZE, step=5, key="impute_min_group_size")
+            group_by = {col: group_keys for col in group_imputed_cols}
+
     st.markdown(r"""
     For numerical features like `LoanAmount`, replacing missing values with the **median** avoids skewing the distribution with extreme values that a mean might introduce. If the data for `ApplicantIncome` is missing, using the median ensures that the imputed values are typical for the dataset. For categorical features such as `Gender` or `Married`, using the **mode** (most frequent category) is a common strategy to maintain the overall distribution of categories. Removing rows with missing values can lead to data loss and potential sampling bias if missingness is not random.
     """)
@@ -62,21 +141,20 @@ def main():
     **Risk Manager's Action:** Configure how to handle outliers in numerical features. Outliers, if not addressed, can disproportionately influence model training, leading to erroneous predictions. Capping them to a certain threshold ensures extreme values don't dominate the model's learning, while preserving data points that might still carry some information.
     """)
 
-    numerical_cols = df.select_dtypes(include=np.number).columns.tolist()
+    numerical_cols = list(raw_profile["Numerical Columns"])
     if "Loan_Amount_Term" in numerical_cols:
         # Often treated as categorical
         numerical_cols.remove("Loan_Amount_Term")
 
     outlier_handling_strategy = st.selectbox(
         "Select outlier handling strategy:",
-        options=["None", "Cap Outliers (IQR Method)",
-                 "Remove Outliers (IQR Method)"],
+        options=OUTLIER_STRATEGIES,
         index=1,  # Default to capping
         key="outlier_strategy"
     )
 
     iqr_multiplier = 1.5
-    if outlier_handling_strategy in ["Cap Outliers (IQR Method)", "Remove Outliers (IQR Method)"]:
+    if outlier_handling_strategy != "None":
         iqr_multiplier = st.slider(
             "IQR Multiplier for Outlier Detection:",
             min_value=1.0, max_value=3.0, value=1.5, step=0.1,
@@ -85,88 +163,73 @@ def main():
         st.markdown(r"""
         The Interquartile Range (IQR) method defines outliers as values falling outside $[Q1 - k \times IQR, Q3 + k \times IQR]$, where $Q1$ is the first quartile, $Q3$ is the third quartile, $IQR = Q3 - Q1$, and $k$ is the multiplier (typically $1.5$ for mild outliers, $3.0$ for extreme outliers). A lower multiplier (e.g., $1.5$) will identify more points as outliers, potentially cleaning more aggressively, while a higher multiplier (e.g., $3.0$) will be more conservative.
         """)
+        if outlier_handling_strategy.startswith("Remove"):
+            st.markdown("""
+            **Remove Outliers** computes every feature's bounds from the same data and drops a row if any feature is outside its bounds, so the result does not depend on the order of the features. **Sequential** is the earlier behaviour: each feature's bounds are computed after rows flagged by the previous features have been dropped.
+            """)
+
+    with st.expander("Execution Settings"):
+        st.markdown("""
+        Wide feature tables can be cleaned in parallel: column groups are shared out across a pool of workers. Threads suit most tables; processes avoid Python's interpreter lock for very wide ones and read the columns from shared memory. The cleaned data and the audit log are identical whichever setting you choose.
+        """)
+        execution_mode = st.selectbox(
+            "Execution mode:", options=["Serial", "Threads", "Processes"], index=0,
+            key="cleaning_execution_mode")
+        n_workers = 1
+        if execution_mode != "Serial":
+            n_workers = st.number_input(
+                "Parallel workers:", min_value=1, max_value=64, value=os.cpu_count() or 1, step=1,
+                key="cleaning_workers")
+
+    pipeline = CleaningPipeline(
+        imputation_strategies, outlier_handling_strategy, iqr_multiplier, numerical_cols,
+        n_jobs=int(n_workers), backend="process" if execution_mode == "Processes" else "thread",
+        group_by=group_by, min_group_size=min_group_size)
+
+    st.markdown("#### Instant Preview")
+    sample = get_stratified_sample(
+        st.session_state.raw_data, PREVIEW_SAMPLE_SIZE,
+        PREVIEW_STRATA_COLUMN if PREVIEW_STRATA_COLUMN in df.columns else None)
+    stratified = f", stratified by `{PREVIEW_STRATA_COLUMN}`" if PREVIEW_STRATA_COLUMN in df.columns else ""
+    st.markdown(f"""
+    **Risk Manager's Action:** Adjust the settings above and see their effect immediately. The preview fits and applies your current settings to a fixed sample of {len(sample):,} of the {len(df):,} applications{stratified}, so fill values and bounds may differ slightly from the full apply.
+    """)
+    preview_stats, preview_missing, preview_log, preview_report = preview_cleaning(
+        pipeline, sample, numerical_cols)
+    st.caption(f"Sample rows: {preview_report['Rows In']:,} before, {preview_report['Rows Out']:,} after cleaning.")
+    st.dataframe(preview_stats)
+    if not preview_missing.empty:
+        st.dataframe(preview_missing)
+    with st.expander("Preview Audit Log"):
+        st.markdown("\n".join(f"- {entry}" for entry in preview_log) or "No changes.")
 
     if st.button("Apply Cleaning and Preprocessing"):
-        cleaned_df = df.copy()
-        log_entries = []
-
-        # Apply missing value imputation
-        for col, strategy in imputation_strategies.items():
-            if strategy == "Median":
-                median_val = cleaned_df[col].median()
-                cleaned_df[col].fillna(median_val, inplace=True)
-                log_entries.append(
-                    f"Imputed missing values in `{col}` with median ({median_val}).")
-            elif strategy == "Mean":
-                mean_val = cleaned_df[col].mean()
-                cleaned_df[col].fillna(mean_val, inplace=True)
-                log_entries.append(
-                    f"Imputed missing values in `{col}` with mean ({mean_val}).")
-            elif strategy == "Mode":
-                mode_val = cleaned_df[col].mode()[0]
-                cleaned_df[col].fillna(mode_val, inplace=True)
-                log_entries.append(
-                    f"Imputed missing values in `{col}` with mode ({mode_val}).")
-            elif strategy == "Remove Rows":
-                initial_rows = len(cleaned_df)
-                cleaned_df.dropna(subset=[col], inplace=True)
-                rows_removed = initial_rows - len(cleaned_df)
-                log_entries.append(
-                    f"Removed {rows_removed} rows with missing values in `{col}`.")
-
-        # Apply outlier handling
-        if outlier_handling_strategy != "None":
-            for col in numerical_cols:
-                Q1 = cleaned_df[col].quantile(0.25)
-                Q3 = cleaned_df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - iqr_multiplier * IQR
-                upper_bound = Q3 + iqr_multiplier * IQR
-
-                if outlier_handling_strategy == "Cap Outliers (IQR Method)":
-                    num_capped_lower = (cleaned_df[col] < lower_bound).sum()
-                    num_capped_upper = (cleaned_df[col] > upper_bound).sum()
-                    cleaned_df[col] = np.where(
-                        cleaned_df[col] < lower_bound, lower_bound, cleaned_df[col])
-                    cleaned_df[col] = np.where(
-                        cleaned_df[col] > upper_bound, upper_bound, cleaned_df[col])
-                    if num_capped_lower > 0 or num_capped_upper > 0:
-                        log_entries.append(
-                            f"Capped {num_capped_lower} lower and {num_capped_upper} upper outliers in `{col}` using IQR multiplier {iqr_multiplier}.")
-                elif outlier_handling_strategy == "Remove Outliers (IQR Method)":
-                    initial_rows = len(cleaned_df)
-                    cleaned_df = cleaned_df[~(
-                        (cleaned_df[col] < lower_bound) | (cleaned_df[col] > upper_bound))]
-                    rows_removed = initial_rows - len(cleaned_df)
-                    if rows_removed > 0:
-                        log_entries.append(
-                            f"Removed {rows_removed} rows containing outliers in `{col}` using IQR multiplier {iqr_multiplier}.")
-
-        st.session_state.cleaned_data = cleaned_df.reset_index(drop=True)
-        st.success("Data cleaning and preprocessing applied successfully!")
-
-        # Update provenance logs
-        current_provenance_logs = st.session_state.provenance_logs.copy()
-        for entry in log_entries:
-            new_log_entry = {
-                "Timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "Action": "Data Cleaning & Preprocessing",
-                "Description": entry,
-                "User": "Risk_Manager_001"
-            }
-            current_provenance_logs = pd.concat(
-                [current_provenance_logs, pd.DataFrame([new_log_entry])],
-                ignore_index=True
-            )
-        st.session_state.provenance_logs = current_provenance_logs
+        message = start_cleaning_job(pipeline)
+        if message is not None:
+            st.success(message)
+
+    if cleaning_job_pending():
+        cleaning_job_status()
 
     if st.session_state.cleaned_data is not None:
         st.markdown("#### Cleaned Data Sample (After Preprocessing)")
         st.dataframe(st.session_state.cleaned_data.head())
 
+        if st.session_state.get("cleaning_pipeline") is not None:
+            with st.expander("Fitted Cleaning Pipeline"):
+                st.markdown("""
+                The fill values and outlier bounds learned from the raw data. Download them to apply exactly the same cleaning to new application batches without refitting.
+                """)
+                pipeline_json = st.session_state.cleaning_pipeline.to_json()
+                st.code(pipeline_json, language="json")
+                st.download_button(
+                    "Download Cleaning Pipeline (JSON)", data=pipeline_json,
+                    file_name="cleaning_pipeline.json", mime="application/json")
+
         st.markdown("#### Comparison: Missing Values Before vs. After Cleaning")
-        missing_before = df.isnull().sum()
-        missing_after = st.session_state.cleaned_data.isnull().sum()
+        cleaned_profile = get_dataset_profile(st.session_state.cleaned_data)
+        missing_before = raw_profile["Missing Counts"]
+        missing_after = cleaned_profile["Missing Counts"]
 
         comparison_df = pd.DataFrame({
             "Before Cleaning": missing_before,
@@ -184,8 +247,9 @@ def main():
         st.markdown("""
         **Risk Manager's Insight:** Observe how the descriptive statistics (mean, max, min, std) for numerical features have changed after outlier handling. Significant changes might indicate effective outlier mitigation, leading to a more stable dataset for modeling. However, be cautious that overly aggressive cleaning can remove valuable information.
         """)
-        st.dataframe(pd.concat([df[numerical_cols].describe().add_prefix("Raw_"),
-                                st.session_state.cleaned_data[numerical_cols].describe().add_prefix("Cleaned_")], axis=1))
+        show_profile_mode(raw_profile)
+        st.dataframe(pd.concat([raw_profile["Numeric Stats"][numerical_cols].add_prefix("Raw_"),
+                                cleaned_profile["Numeric Stats"][numerical_cols].add_prefix("Cleaned_")], axis=1))
 
     st.markdown("""
     --- 
@@ -1,40 +1,91 @@
 
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
+from application_pages.charts import bar_chart, box_chart
+from application_pages.fairness import (
+    DEFAULT_BOOTSTRAP_REPLICATES, DEFAULT_MIN_SUPPORT, DEFAULT_PERMUTATIONS, get_bootstrap_dpd,
+    get_demographic_parity, get_distribution_disparity, get_intersectional_cube, get_permutation_test,
+    parity_ranking)
+from application_pages.profiling import dataset_fingerprint, get_dataset_profile
 
-def calculate_demographic_parity(df, sensitive_attr, target_column, positive_outcome):
-    """Calculate demographic parity metrics for a given sensitive attribute."""
-    if sensitive_attr not in df.columns or target_column not in df.columns:
-        return None
 
-    # Filter out rows with missing values in sensitive_attr or target_column
-    df_filtered = df[[sensitive_attr, target_column]].dropna()
+WORST_OFF_SUBGROUPS = 10
+BOOTSTRAP_SEED = 0
+PERMUTATION_SEED = 0
+SIGNIFICANCE_LEVEL = 0.05
+# Above this many replicates the process pool pays for its start-up cost
+POOL_REPLICATES = 200_000
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _cached_group_summary(fingerprint, value_col, group_col, _df):
+    return _df[[group_col, value_col]].dropna().groupby(group_col, observed=True)[value_col].describe()
+
 
-    if df_filtered.empty:
-        return None
+def group_summary(df, value_col, group_col):
+    """Memoized `describe()` of `value_col` per `group_col`, keyed by the dataset fingerprint."""
+    return _cached_group_summary(dataset_fingerprint(df), value_col, group_col, df)
 
-    # Calculate approval rates for each group
-    approval_rates = {}
-    for group in df_filtered[sensitive_attr].unique():
-        group_data = df_filtered[df_filtered[sensitive_attr] == group]
-        approval_rate = (group_data[target_column] ==
-                         positive_outcome).sum() / len(group_data)
-        approval_rates[group] = approval_rate
 
-    if len(approval_rates) < 2:
-        return None
+def log_bias_result(attribute, dpd, confidence, confidence_interval, p_value):
+    """Append one "Bias Detection & Analysis" provenance entry."""
+    st.session_state.provenance_logs.append({
+        "Timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Action": "Bias Detection & Analysis",
+        "Description": (
+            f"Calculated demographic parity for '{attribute}'. DPD: {dpd:.4f} "
+            f"({confidence:.0%} CI [{confidence_interval['Lower']:.4f}, {confidence_interval['Upper']:.4f}], "
+            f"{confidence_interval['Replicates']} bootstrap replicates; permutation p-value {p_value:.4f})"),
+        "User": "Risk_Manager_001"
+    })
 
-    # Calculate demographic parity difference
-    dpd = max(approval_rates.values()) - min(approval_rates.values())
 
-    return {
-        "Approval Rates": approval_rates,
-        "Demographic Parity Difference": dpd
-    }
+def calculate_demographic_parity(df, sensitive_attr, target_column, positive_outcome):
+    """Calculate demographic parity metrics for a given sensitive attribute."""
+    return get_demographic_parity(df, [sensitive_attr], target_column, positive_outcome).get(sensitive_attr)
+
+
+def intersectional_analysis(df, categorical_cols, target_column, positive_outcome):
+    """Approval rates across combinations of sensitive attributes, worst-off subgroups first."""
+    st.markdown("#### Intersectional Analysis")
+    st.markdown("""
+    **Risk Manager's Action:** Bias can be hidden when attributes are examined one at a time: a model may treat women and unmarried applicants fairly overall, yet disadvantage unmarried women in rural areas. Select several attributes to compare approval rates across every combination of them. Subgroups with too few applicants are left out because their rates are too noisy to act on.
+    """)
+    default_attrs = [attr for attr in ["Gender", "Married", "Property_Area"] if attr in categorical_cols]
+    attrs = st.multiselect(
+        "Attributes to intersect:", options=categorical_cols, default=default_attrs, key="intersectional_attrs")
+    if len(attrs) < 2:
+        st.info("Select at least two attributes to analyze their intersections.")
+        return
+    col1, col2 = st.columns(2)
+    with col1:
+        min_support = st.number_input(
+            "Minimum applicants per subgroup:", min_value=1, max_value=100_000, value=DEFAULT_MIN_SUPPORT,
+            step=10, key="intersectional_min_support")
+    with col2:
+        max_order = st.slider(
+            "Maximum number of attributes combined:", min_value=1, max_value=len(attrs), value=len(attrs),
+            key="intersectional_max_order")
+
+    cube = get_intersectional_cube(df, attrs, target_column, positive_outcome, int(min_support), max_order)
+    st.caption(
+        f"{cube['Cells']:,} subgroups evaluated across {cube['Applicants']:,} applicants; "
+        f"{cube['Pruned']:,} pruned below {int(min_support)} applicants. Overall approval rate: {cube['Overall Rate']:.1%}.")
+    subgroups = cube["Subgroups"]
+    if subgroups.empty:
+        st.warning("No subgroup has enough applicants at this minimum support.")
+        return
+    st.markdown(f"**{WORST_OFF_SUBGROUPS} Worst-Off Subgroups (lowest approval rate):**")
+    st.dataframe(
+        subgroups.head(WORST_OFF_SUBGROUPS)[["Subgroup", "Order", "Applicants", "Approval Rate", "Gap vs Overall"]]
+        .style.format({"Approval Rate": "{:.1%}", "Gap vs Overall": "{:+.1%}"}),
+        hide_index=True)
+    with st.expander("All Subgroups"):
+        st.dataframe(subgroups.drop(columns=attrs), hide_index=True)
 
 
 def main():
@@ -53,7 +104,7 @@ def main():
             "No cleaned data available. Please go to 'Data Cleaning and Preprocessing' to prepare the data.")
         return
 
-    df_cleaned = st.session_state.cleaned_data.copy()
+    df_cleaned = st.session_state.cleaned_data
 
     st.markdown("#### Select Sensitive Attribute for Bias Analysis")
     st.markdown("""
@@ -74,6 +125,24 @@ def main():
         st.error("No categorical features available for bias analysis.")
         return
 
+    # Target column and positive outcome
+    target_column = "Loan_Status"
+    positive_outcome = "Y"  # Assuming "Y" means approved
+
+    if target_column not in df_cleaned.columns:
+        st.error(
+            f"Target column '{target_column}' not found in the cleaned data.")
+        return
+
+    st.markdown("#### Demographic Parity Across All Attributes")
+    st.markdown("""
+    **Risk Manager's Action:** Start with the overview. Every categorical attribute is ranked by its demographic parity difference, all computed in a single pass over the data, so you can see where the largest approval gaps are before drilling into one attribute below.
+    """)
+    all_parity = get_demographic_parity(df_cleaned, categorical_cols, target_column, positive_outcome)
+    ranking = parity_ranking(all_parity)
+    if not ranking.empty:
+        st.dataframe(ranking.style.format({"Demographic Parity Difference": "{:.4f}"}), hide_index=True)
+
     # Default to Gender if available, otherwise first categorical column
     default_sensitive_attr = "Gender" if "Gender" in categorical_cols else categorical_cols[0]
     default_index = categorical_cols.index(
@@ -92,17 +161,7 @@ def main():
     **Risk Manager's Action:** Examine the approval rates across different groups of the selected sensitive attribute. Significant disparities might indicate potential bias that could be perpetuated by the model.
     """)
 
-    # Target column and positive outcome
-    target_column = "Loan_Status"
-    positive_outcome = "Y"  # Assuming "Y" means approved
-
-    if target_column not in df_cleaned.columns:
-        st.error(
-            f"Target column '{target_column}' not found in the cleaned data.")
-        return
-
-    bias_metrics_result = calculate_demographic_parity(
-        df_cleaned, selected_sensitive_attr, target_column, positive_outcome)
+    bias_metrics_result = all_parity.get(selected_sensitive_attr)
 
     if bias_metrics_result is None:
         st.warning(
@@ -114,36 +173,59 @@ def main():
         st.markdown(f"**Approval Rates by {selected_sensitive_attr}:**")
         st.dataframe(pd.DataFrame({"Approval Rate": approval_rates}).T)
 
+        with st.expander("Confidence Interval and Significance Settings"):
+            col1, col2 = st.columns(2)
+            with col1:
+                replicates = st.number_input(
+                    "Bootstrap replicates:", min_value=100, max_value=5_000_000,
+                    value=DEFAULT_BOOTSTRAP_REPLICATES, step=1000, key="bootstrap_replicates")
+            with col2:
+                confidence = st.selectbox(
+                    "Confidence level:", options=[0.90, 0.95, 0.99], index=1,
+                    format_func=lambda level: f"{level:.0%}", key="bootstrap_confidence")
+            use_pool = st.checkbox(
+                f"Draw replicates in a process pool (worthwhile above {POOL_REPLICATES:,} replicates)",
+                value=False, key="bootstrap_process_pool")
+            permutations = st.number_input(
+                "Permutations for the significance test:", min_value=100, max_value=1_000_000,
+                value=DEFAULT_PERMUTATIONS, step=1000, key="permutation_count")
+        confidence_interval = get_bootstrap_dpd(
+            bias_metrics_result["Group Counts"], bias_metrics_result["Group Approvals"], int(replicates),
+            confidence, BOOTSTRAP_SEED, (os.cpu_count() or 1) if use_pool else 1)
+        permutation_test = get_permutation_test(
+            df_cleaned, selected_sensitive_attr, target_column, positive_outcome, int(permutations), PERMUTATION_SEED)
+
         st.metric(
             label=f"Demographic Parity Difference (max_rate - min_rate) for '{selected_sensitive_attr}'",
             value=f"{dpd:.4f}",
             delta=None,
             delta_color="inverse"
         )
+        st.caption(
+            f"{confidence:.0%} bootstrap confidence interval: [{confidence_interval['Lower']:.4f}, "
+            f"{confidence_interval['Upper']:.4f}] (standard error {confidence_interval['Std Error']:.4f}; "
+            f"{confidence_interval['Replicates']:,} replicates, seed {BOOTSTRAP_SEED}).")
+        p_value = permutation_test["P-Value"]
+        st.caption(
+            f"Permutation test: p = {p_value:.4f} over {permutation_test['Permutations']:,} shuffles of "
+            f"'{selected_sensitive_attr}' (seed {PERMUTATION_SEED}); a DPD this large is "
+            + ("unlikely to arise by chance." if p_value < SIGNIFICANCE_LEVEL
+               else f"not significant at the {SIGNIFICANCE_LEVEL} level."))
 
         st.markdown(r"""
         **Demographic parity** is achieved when the proportion of positive outcomes (e.g., loan approvals) is roughly equal across different groups of a sensitive attribute. The **Demographic Parity Difference** quantifies this:
         $$ DPD = \max_{g \in G} P(\text{Outcome}=Y| \text{Group}=g) - \min_{g \in G} P(\text{Outcome}=Y| \text{Group}=g) $$
         A DPD close to zero indicates better demographic parity. A large difference (e.g., greater than $0.1$) suggests a significant disparity that might indicate bias. For instance, if the approval rate for 'Male' applicants is $0.70$ and for 'Female' applicants is $0.55$, the DPD would be $0.15$, which is a notable disparity warranting further investigation.
+
+        The **permutation test** asks whether a gap this large could appear by chance: group labels are shuffled across applicants many times, and the p-value is the share of shuffles whose DPD is at least the observed one. A small p-value (e.g., below $0.05$) means the disparity is unlikely to be sampling noise.
         """)
 
         # Visualize approval rates
-        fig_parity, ax_parity = plt.subplots(figsize=(10, 6))
-        sns.barplot(x=list(approval_rates.keys()), y=list(
-            approval_rates.values()), ax=ax_parity, palette="pastel")
-        ax_parity.set_title(
-            f"Loan Approval Rates by {selected_sensitive_attr}")
-        ax_parity.set_xlabel(selected_sensitive_attr)
-        ax_parity.set_ylabel("Approval Rate")
-        ax_parity.set_ylim(0, 1)
-
-        # Add value labels on bars
-        for i, (group, rate) in enumerate(approval_rates.items()):
-            ax_parity.text(
-                i, rate + 0.02, f"{rate:.3f}", ha='center', va='bottom', fontsize=10)
-
-        st.pyplot(fig_parity)
-        plt.close(fig_parity)
+        # Bars are labelled with their approval rates
+        st.image(bar_chart(
+            tuple(approval_rates.keys()), tuple(approval_rates.values()),
+            title=f"Loan Approval Rates by {selected_sensitive_attr}", xlabel=selected_sensitive_attr,
+            ylabel="Approval Rate", palette="pastel", ylim=(0, 1), annotate=True))
 
         # Store bias metrics in session state
         if "bias_metrics" not in st.session_state:
@@ -151,21 +233,19 @@ def main():
 
         st.session_state.bias_metrics[selected_sensitive_attr] = {
             "Approval Rates": approval_rates,
-            "Demographic Parity Difference": dpd
+            "Demographic Parity Difference": dpd,
+            "DPD Confidence Interval": confidence_interval,
+            "Permutation Test": permutation_test,
         }
 
-        # Update provenance logs
-        import datetime
-        new_log_entry = {
-            "Timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "Action": "Bias Detection & Analysis",
-            "Description": f"Calculated demographic parity for '{selected_sensitive_attr}'. DPD: {dpd:.4f}",
-            "User": "Risk_Manager_001"
-        }
-        st.session_state.provenance_logs = pd.concat(
-            [st.session_state.provenance_logs, pd.DataFrame([new_log_entry])],
-            ignore_index=True
-        )
+        # Reruns (e.g. picking another numerical feature) reproduce the same result; log each result once
+        result_key = (dataset_fingerprint(df_cleaned), selected_sensitive_attr, target_column, positive_outcome,
+                      int(replicates), confidence, int(permutations))
+        if result_key not in st.session_state.logged_bias_results:
+            st.session_state.logged_bias_results.add(result_key)
+            log_bias_result(selected_sensitive_attr, dpd, confidence, confidence_interval, p_value)
+
+    intersectional_analysis(df_cleaned, categorical_cols, target_column, positive_outcome)
 
     st.markdown("#### Conditional Distribution of Key Numerical Features")
     st.markdown("""
@@ -181,14 +261,18 @@ def main():
         numerical_cols.remove("Loan_ID")
 
     # Exclude binary/categorical numerical features (Credit_History, etc.)
-    # Keep only continuous numerical features with more than 10 unique values
+    # Keep only continuous numerical features with more than 10 unique values,
+    # read from the memoized dataset profile rather than rescanning each column
+    cardinality = get_dataset_profile(df_cleaned)["Cardinality"]
     continuous_numerical_cols = []
     for col in numerical_cols:
         # More than 10 unique values suggests continuous data
-        if df_cleaned[col].nunique() > 10:
+        if cardinality[col] > 10:
             continuous_numerical_cols.append(col)
 
     numerical_cols = continuous_numerical_cols
+    # The disparity table covers every continuous feature, including those left out of the drill-down below
+    disparity_features = [col for col in continuous_numerical_cols if col != "Loan_Status"]
 
     # Remove Loan_Amount from numerical features
     if "Loan_Status" in numerical_cols:
@@ -198,6 +282,16 @@ def main():
     if "Loan_Amount" in numerical_cols:
         numerical_cols.remove("Loan_Amount")
 
+    if disparity_features:
+        st.markdown(f"**Disparity Across All Numerical Features by {selected_sensitive_attr}:**")
+        disparity = get_distribution_disparity(df_cleaned, selected_sensitive_attr, disparity_features)
+        st.dataframe(disparity.style.format({
+            "KS Statistic": "{:.4f}", "Wasserstein Distance": "{:.4f}", "Standardized Mean Difference": "{:.4f}"}),
+            hide_index=True)
+        st.markdown(r"""
+        Every feature is compared between each pair of groups and the largest gap is shown, ranked by the **Kolmogorov-Smirnov statistic** $D = \max_x |F_a(x) - F_b(x)|$, the largest difference between the two groups' cumulative distributions. The **Wasserstein distance** is the area between those distributions, in the feature's own units, and the **standardized mean difference** $|\bar{x}_a - \bar{x}_b| / \sqrt{(s_a^2 + s_b^2)/2}$ is commonly read as notable above $0.1$ and large above $0.2$.
+        """)
+
     if numerical_cols:
         # Default to ApplicantIncome if available
         default_numerical_feature = "ApplicantIncome" if "ApplicantIncome" in numerical_cols else numerical_cols[
@@ -212,26 +306,20 @@ def main():
             key="numerical_feature"
         )
 
-        # Create box plot for the selected numerical feature by sensitive attribute
-        df_plot = df_cleaned[[selected_sensitive_attr,
-                              selected_numerical_feature]].dropna()
-
-        if not df_plot.empty:
-            fig_dist, ax_dist = plt.subplots(figsize=(10, 6))
-            sns.boxplot(x=selected_sensitive_attr, y=selected_numerical_feature,
-                        data=df_plot, ax=ax_dist, palette="light:b", dodge=False)
-            ax_dist.set_title(
-                f"Distribution of {selected_numerical_feature} by {selected_sensitive_attr}")
-            ax_dist.set_xlabel(selected_sensitive_attr)
-            ax_dist.set_ylabel(selected_numerical_feature)
-            st.pyplot(fig_dist)
-            plt.close(fig_dist)
+        # Summary statistics per group; rows missing either column are dropped
+        summary_stats = group_summary(df_cleaned, selected_numerical_feature, selected_sensitive_attr)
+
+        if not summary_stats.empty:
+            # Rows missing either column are skipped when the box statistics are computed
+            st.image(box_chart(
+                st.session_state.cleaned_data, selected_numerical_feature, group_col=selected_sensitive_attr,
+                title=f"Distribution of {selected_numerical_feature} by {selected_sensitive_attr}",
+                xlabel=selected_sensitive_attr, ylabel=selected_numerical_feature, palette="light:b",
+                figsize=(10, 6)))
 
             # Calculate and display summary statistics by group
             st.markdown(
                 f"**Summary Statistics of {selected_numerical_feature} by {selected_sensitive_attr}:**")
-            summary_stats = df_plot.groupby(selected_sensitive_attr)[
-                selected_numerical_feature].describe()
             st.dataframe(summary_stats)
 
             st.markdown(f"""
@@ -2,39 +2,153 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from application_pages.charts import count_chart
+from application_pages.fairness import FOUR_FIFTHS, get_fairness_suite, get_threshold_sweep
+from application_pages.risk_simulation import (
+    DEFAULT_SCENARIOS, applicant_inputs, mock_risk_score, monte_carlo_simulation)
+
+
+TARGET_COLUMN = "Loan_Status"
+POSITIVE_OUTCOME = "Y"
+SWEEP_THRESHOLDS = np.round(np.linspace(0.05, 0.95, 19), 2)
 
 
 def generate_mock_risk_score(df):
     """Generates a mock risk score (probability of default) for each loan application."""
-    # Simple logic: higher risk for poor credit history, lower income relative to loan amount, etc.
-    risk_score = pd.Series(0.0, index=df.index)
+    # Higher risk for poor credit history, a large loan relative to income, no degree and more dependents
+    return pd.Series(mock_risk_score(**applicant_inputs(df)), index=df.index)
+
+
+def run_risk_simulation(df, income_uncertainty_percent, loan_amount_uncertainty_percent,
+                        credit_history_noise_level, human_review_threshold, seed):
+    """Perturb the cleaned data with a seeded generator, score it and flag cases for review."""
+    # A shallow copy shares the cleaned columns; copy-on-write duplicates only the ones written below
+    simulated_df = df.copy(deep=False)
+    rng = np.random.default_rng(seed)
+
+    # Introduce uncertainty into numerical features
+    simulated_df["ApplicantIncome"] = simulated_df["ApplicantIncome"] * \
+        (1 + rng.uniform(-income_uncertainty_percent/100,
+         income_uncertainty_percent/100, len(simulated_df)))
+    simulated_df["LoanAmount"] = simulated_df["LoanAmount"] * (1 + rng.uniform(
+        -loan_amount_uncertainty_percent/100, loan_amount_uncertainty_percent/100, len(simulated_df)))
+
+    # Introduce noise into Credit_History
+    if "Credit_History" in simulated_df.columns:
+        noise_mask = rng.random(
+            len(simulated_df)) < credit_history_noise_level
+        # Flip 0 to 1, or 1 to 0 for noise, in one step so a flipped 0 is not flipped back.
+        # If Credit_History was NaN and noise_mask is True, it remains NaN here, which is fine.
+        flip_mask = noise_mask & simulated_df["Credit_History"].notna()
+        simulated_df.loc[flip_mask, "Credit_History"] = 1.0 - simulated_df.loc[flip_mask, "Credit_History"]
+
+    # Generate mock risk scores based on the (potentially perturbed) data
+    simulated_df["Simulated_Risk_Score"] = generate_mock_risk_score(
+        simulated_df)
+
+    # Determine loan status based on a simple threshold for demonstration
+    # For simplicity, let's say a low risk score leads to "Y" (Approved), high to "N" (Rejected)
+    # This is a mock decision for the purpose of flagging, not a real model prediction.
+    simulated_df["Mock_Loan_Status_Predicted"] = np.where(
+        simulated_df["Simulated_Risk_Score"] < 0.5, "Y", "N"
+    )
+
+    # Flag for human review based on the defined threshold
+    simulated_df["Flagged_for_Human_Review"] = np.where(
+        simulated_df["Simulated_Risk_Score"] > human_review_threshold, "Yes", "No"
+    )
+
+    return simulated_df, None
+
 
-    # Factor 1: Credit History (most significant)
-    # Lower credit history -> higher risk
-    risk_score = risk_score + (1 - df["Credit_History"].fillna(0.5)) * 0.4
+def monte_carlo_overview(simulated_df, results):
+    """Review workload distribution and per-applicant flag probabilities from the Monte Carlo scenarios."""
+    summary = results["Summary"]
+    st.markdown("#### Monte Carlo Oversight Capacity")
+    st.markdown(f"""
+    **Risk Manager's Insight:** A single simulated draw can flag different applications every time. Across {summary['Scenarios']:,} independent scenarios (seed {summary['Seed']}), the number of applications needing review and each applicant's chance of being flagged settle to stable values you can plan reviewer capacity against.
+    """)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Expected Flagged Applications", f"{summary['Expected Flagged']:.1f}",
+                help=f"Standard deviation across scenarios: {summary['Flagged Std']:.1f}")
+    col2.metric("90% Range of Flagged Applications", f"{summary['Flagged P05']:.0f} - {summary['Flagged P95']:.0f}")
+    col3.metric("Applicants With Uncertain Flag", f"{summary['Uncertain Applicants']:,}",
+                help="Flagged in some scenarios but not in others.")
+
+    flagged_counts = pd.Series(results["Flagged Counts"]).value_counts().sort_index()
+    st.bar_chart(flagged_counts.rename_axis("Flagged Applications").rename("Scenarios"))
+
+    st.markdown("**Applications Most Likely to Need Review:**")
+    applicants = results["Applicants"]
+    top = applicants[applicants["Flag Probability"] > 0].sort_values(
+        ["Flag Probability", "Mean Risk Score"], ascending=False).head(10)
+    if top.empty:
+        st.info("No application was flagged in any scenario.")
+    else:
+        columns = [col for col in ["Loan_ID", "ApplicantIncome", "LoanAmount", "Credit_History"]
+                   if col in simulated_df.columns]
+        st.dataframe(simulated_df.loc[top.index, columns].join(top))
+    st.markdown(r"""
+    The **flag probability** is the share of scenarios in which an application's simulated probability of default exceeds $T_{HR}$. The risk score percentiles describe the spread of its score across scenarios (resolved to $0.005$).
+    """)
 
-    # Factor 2: Income to Loan Amount Ratio
-    # Avoid division by zero for LoanAmount, replace with a small epsilon or 1 for safety
-    loan_to_income_ratio = df["LoanAmount"] / \
-        (df["ApplicantIncome"] + df["CoapplicantIncome"] + 1e-6)
-    # Higher ratio -> higher risk, capped
-    risk_score = risk_score + np.clip(loan_to_income_ratio * 0.1, 0, 0.3)
 
-    # Factor 3: Education
-    risk_score = risk_score + \
-        df["Education"].apply(lambda x: 0.05 if x == "Not Graduate" else 0.0)
+def simulated_decision_fairness(simulated_df):
+    """Fairness of the simulated approve/reject decisions against the historical outcomes."""
+    st.markdown("#### Fairness of Simulated Decisions")
+    st.markdown("""
+    **Risk Manager's Insight:** The simulated decisions are compared with the historical `Loan_Status` for each group of a sensitive attribute. Equal opportunity compares approval rates among applicants who were historically approved, equalized odds also compares them among those who were not, predictive parity compares how often an approval was historically justified, and the disparate impact ratio applies the four-fifths rule to selection rates.
+    """)
+    if TARGET_COLUMN not in simulated_df.columns:
+        st.info(f"The data has no '{TARGET_COLUMN}' column to compare the simulated decisions against.")
+        return
+    excluded = {"Loan_ID", TARGET_COLUMN, "Mock_Loan_Status_Predicted", "Flagged_for_Human_Review"}
+    sensitive_cols = [col for col in simulated_df.select_dtypes(include=["object", "category"]).columns
+                      if col not in excluded]
+    if not sensitive_cols:
+        st.info("No categorical attributes are available for a fairness analysis.")
+        return
+    attribute = st.selectbox("Sensitive attribute:", options=sensitive_cols,
+                             index=sensitive_cols.index("Gender") if "Gender" in sensitive_cols else 0,
+                             key="simulation_fairness_attr")
+
+    suite = get_fairness_suite(simulated_df, attribute, TARGET_COLUMN, POSITIVE_OUTCOME,
+                               "Mock_Loan_Status_Predicted", POSITIVE_OUTCOME, "Simulated_Risk_Score")
+    summary = suite["Summary"]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Equal Opportunity Difference", f"{summary['Equal Opportunity Difference']:.4f}")
+    col2.metric("Equalized Odds Difference", f"{summary['Equalized Odds Difference']:.4f}")
+    col3.metric("Predictive Parity Difference", f"{summary['Predictive Parity Difference']:.4f}")
+    col1, col2 = st.columns(2)
+    col1.metric("Disparate Impact Ratio", f"{summary['Disparate Impact Ratio']:.4f}")
+    col2.metric("Four-Fifths Rule", "Passed" if suite["Four-Fifths Rule Passed"] else "Failed")
+    st.dataframe(suite["Group Metrics"].style.format(
+        {col: "{:.4f}" for col in suite["Group Metrics"].columns if col != "Applicants"}))
+    st.markdown(rf"""
+    The **Disparate Impact Ratio** is the lowest group selection rate divided by the highest; under the four-fifths rule a ratio below ${FOUR_FIFTHS}$ indicates adverse impact. The differences are $\max_g - \min_g$ of the true positive rate (equal opportunity), of the true and false positive rates (equalized odds, the larger of the two) and of precision (predictive parity).
+    """)
 
-    # Factor 4: Dependents
-    # More dependents -> slightly higher risk
-    risk_score = risk_score + \
-        df["Dependents"].replace({"3+": "3"}).astype(float) * 0.02
+    st.markdown("##### Calibration by Group")
+    st.markdown("""
+    Applicants are binned by their predicted approval probability ($1 -$ simulated risk score). In a calibrated model the observed approval rate in each bin matches the mean prediction for every group; the calibration error is the applicant-weighted mean absolute gap.
+    """)
+    st.dataframe(pd.Series(suite["Calibration Error"], name="Calibration Error").rename_axis(attribute).to_frame())
+    with st.expander("Calibration table"):
+        st.dataframe(suite["Calibration"], hide_index=True)
 
-    # Ensure risk score is between 0 and 1
-    risk_score = np.clip(risk_score, 0.0, 1.0)
+    st.markdown("##### Decision Threshold Sweep")
+    st.markdown("""
+    Each line shows a fairness metric as the approval cut-off on the risk score moves (applicants below the threshold are approved). The simulation itself approves below $0.5$.
+    """)
+    sweep = get_threshold_sweep(simulated_df, attribute, TARGET_COLUMN, POSITIVE_OUTCOME, "Simulated_Risk_Score",
+                                SWEEP_THRESHOLDS)
+    st.line_chart(sweep.drop(columns="Disparate Impact Ratio"))
+    with st.expander("Threshold sweep table"):
+        st.dataframe(sweep.style.format("{:.4f}"))
 
-    return risk_score
+    st.session_state.setdefault("simulation_fairness", {})[attribute] = {
+        **summary, "Four-Fifths Rule Passed": suite["Four-Fifths Rule Passed"]}
 
 
 def main():
@@ -53,8 +167,6 @@ def main():
             "No cleaned data available. Please go to 'Data Cleaning and Preprocessing' to prepare the data.")
         return
 
-    df_cleaned = st.session_state.cleaned_data.copy()
-
     st.markdown("#### Configure Simulation Parameters")
     st.markdown("""
     **Risk Manager's Action:** Adjust the sliders below to introduce hypothetical uncertainty into key financial features. Consider scenarios where applicants might slightly misreport income or loan amounts are estimated with a margin of error. Also, set the threshold for what constitutes a "high-risk" loan requiring your personal review.
@@ -92,57 +204,52 @@ def main():
     The **Probability of Default (PD)** threshold for human review, denoted as $T_{HR}$, is a critical governance parameter. If a loan application's simulated risk score (PD) exceeds this threshold, i.e., $PD_{simulated} > T_{HR}$, it automatically triggers a manual review by a human expert. This ensures that high-risk cases, or those with uncertain outcomes, are subjected to closer scrutiny, mitigating potential financial losses and reputational damage. For instance, if $T_{HR} = 0.6$, any loan with a $PD_{simulated}$ greater than $0.6$ is flagged.
     """)
 
-    if st.button("Run Risk Simulation"):
-        simulated_df = df_cleaned.copy()
-
-        # Introduce uncertainty into numerical features
-        simulated_df["ApplicantIncome"] = simulated_df["ApplicantIncome"] * \
-            (1 + np.random.uniform(-income_uncertainty_percent/100,
-             income_uncertainty_percent/100, len(simulated_df)))
-        simulated_df["LoanAmount"] = simulated_df["LoanAmount"] * (1 + np.random.uniform(
-            -loan_amount_uncertainty_percent/100, loan_amount_uncertainty_percent/100, len(simulated_df)))
-
-        # Introduce noise into Credit_History
-        if "Credit_History" in simulated_df.columns:
-            noise_mask = np.random.rand(
-                len(simulated_df)) < credit_history_noise_level
-            # Flip 0 to 1, or 1 to 0 for noise. Handle NaN by keeping them NaN or defaulting.
-            simulated_df.loc[noise_mask & (
-                simulated_df["Credit_History"] == 0.0), "Credit_History"] = 1.0
-            simulated_df.loc[noise_mask & (
-                simulated_df["Credit_History"] == 1.0), "Credit_History"] = 0.0
-            # If Credit_History was NaN and noise_mask is True, it remains NaN here, which is fine.
-
-        # Generate mock risk scores based on the (potentially perturbed) data
-        simulated_df["Simulated_Risk_Score"] = generate_mock_risk_score(
-            simulated_df)
-
-        # Determine loan status based on a simple threshold for demonstration
-        # For simplicity, let's say a low risk score leads to "Y" (Approved), high to "N" (Rejected)
-        # This is a mock decision for the purpose of flagging, not a real model prediction.
-        simulated_df["Mock_Loan_Status_Predicted"] = np.where(
-            simulated_df["Simulated_Risk_Score"] < 0.5, "Y", "N"
-        )
+    simulation_seed = st.number_input(
+        "Simulation Random Seed:", min_value=0, value=42, step=1,
+        help="The same seed and parameters always reproduce the same simulated portfolio."
+    )
+    monte_carlo_scenarios = st.number_input(
+        "Monte Carlo Scenarios:", min_value=100, max_value=100_000, value=DEFAULT_SCENARIOS, step=100,
+        key="monte_carlo_scenarios",
+        help="Independent perturbations of the whole portfolio used to estimate flag probabilities and review workload."
+    )
 
-        # Flag for human review based on the defined threshold
-        simulated_df["Flagged_for_Human_Review"] = np.where(
-            simulated_df["Simulated_Risk_Score"] > human_review_threshold, "Yes", "No"
-        )
+    if st.button("Run Risk Simulation"):
+        simulation_params = {
+            "income_uncertainty_percent": income_uncertainty_percent,
+            "loan_amount_uncertainty_percent": loan_amount_uncertainty_percent,
+            "credit_history_noise_level": credit_history_noise_level,
+            "human_review_threshold": human_review_threshold,
+            "seed": int(simulation_seed),
+        }
+        simulated_df, _, simulated_hash, cached = st.session_state.lineage.run(
+            "Risk Simulation", st.session_state.cleaned_data, simulation_params,
+            lambda data: run_risk_simulation(data, income_uncertainty_percent, loan_amount_uncertainty_percent,
+                                             credit_history_noise_level, human_review_threshold,
+                                             int(simulation_seed)))
 
         st.session_state.simulated_results = simulated_df
-        st.success("Risk simulation completed successfully!")
+        monte_carlo_params = {**simulation_params, "scenarios": int(monte_carlo_scenarios)}
+        applicants, monte_carlo_details, _, _ = st.session_state.lineage.run(
+            "Monte Carlo Risk Simulation", st.session_state.cleaned_data, monte_carlo_params,
+            lambda data: monte_carlo_simulation(data, int(monte_carlo_scenarios), income_uncertainty_percent,
+                                                loan_amount_uncertainty_percent, credit_history_noise_level,
+                                                human_review_threshold, int(simulation_seed)))
+        st.session_state.monte_carlo_results = {"Applicants": applicants, **monte_carlo_details}
+        monte_carlo_summary = monte_carlo_details["Summary"]
+        # Fairness results describe the previous simulation's decisions
+        st.session_state.simulation_fairness = {}
+        st.success("Risk simulation completed successfully!" +
+                   (" (served from the lineage cache)" if cached else ""))
 
         # Update provenance logs for simulation
         new_log_entry = {
             "Timestamp": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
             "Action": "Risk Simulation Executed",
-            "Description": f"Simulated with Income Uncertainty: {income_uncertainty_percent}%, Loan Amount Uncertainty: {loan_amount_uncertainty_percent}%, Credit History Noise: {credit_history_noise_level*100}%, Human Review Threshold: {human_review_threshold}",
+            "Description": f"Simulated with Income Uncertainty: {income_uncertainty_percent}%, Loan Amount Uncertainty: {loan_amount_uncertainty_percent}%, Credit History Noise: {credit_history_noise_level*100}%, Human Review Threshold: {human_review_threshold}, Seed: {int(simulation_seed)}, Result version: `{simulated_hash}`, Monte Carlo: {int(monte_carlo_scenarios)} scenarios, expected flagged {monte_carlo_summary['Expected Flagged']:.1f} (90% range {monte_carlo_summary['Flagged P05']:.0f}-{monte_carlo_summary['Flagged P95']:.0f})",
             "User": "Risk_Manager_001"
         }
-        st.session_state.provenance_logs = pd.concat(
-            [st.session_state.provenance_logs, pd.DataFrame([new_log_entry])],
-            ignore_index=True
-        )
+        st.session_state.provenance_logs.append(new_log_entry)
 
     if "simulated_results" in st.session_state and st.session_state.simulated_results is not None:
         st.markdown("#### Simulation Results Overview")
@@ -156,13 +263,10 @@ def main():
         st.dataframe(flagged_counts.rename(
             columns={"count": "Number of Applications"}))
 
-        fig_flagged, ax_flagged = plt.subplots(figsize=(8, 5))
-        sns.countplot(x="Flagged_for_Human_Review",
-                      data=st.session_state.simulated_results, palette="coolwarm", ax=ax_flagged)
-        ax_flagged.set_title("Applications Flagged for Human Review")
-        ax_flagged.set_xlabel("Flagged for Human Review")
-        ax_flagged.set_ylabel("Number of Applications")
-        st.pyplot(fig_flagged)
+        st.image(count_chart(
+            st.session_state.simulated_results, "Flagged_for_Human_Review",
+            title="Applications Flagged for Human Review", xlabel="Flagged for Human Review",
+            ylabel="Number of Applications"))
         st.markdown(r"""
         The bar chart illustrates the distribution of loan applications that require human review based on the set **Probability of Default Threshold** ($T_{HR}$). A higher number of flagged cases might indicate either an overly conservative threshold or a genuinely higher-risk portfolio under the simulated conditions. This visualization immediately tells the Risk Manager how much manual effort might be required to process the loan applications, highlighting operational risk.
         """)
@@ -184,6 +288,11 @@ def main():
             st.info(
                 "No applications were flagged for human review under the current simulation parameters and threshold.")
 
+        if st.session_state.get("monte_carlo_results") is not None:
+            monte_carlo_overview(st.session_state.simulated_results, st.session_state.monte_carlo_results)
+
+        simulated_decision_fairness(st.session_state.simulated_results)
+
         st.markdown("""
         --- 
         **Risk Manager's Action:** You have successfully simulated risk and identified cases requiring human oversight. This process validates the model's behavior under stress and reinforces the importance of human-in-the-loop decision-making for high-risk scenarios. This forms a crucial part of your assurance case.
@@ -3,6 +3,8 @@ import streamlit as st
 import pandas as pd
 import datetime
 
+from application_pages.drift import next_risk_number
+
 
 def main():
     st.markdown("### Step 7: Risk Register & Governance")
@@ -15,16 +17,6 @@ def main():
     **Underlying concept:** A risk register is a key tool in enterprise risk management, providing a structured way to identify, analyze, and monitor risks. Governance refers to the framework of rules, practices, and processes by which an organization is directed and controlled. For ML models, this includes establishing clear responsibilities, audit trails, and decision-making protocols to ensure ethical and compliant AI deployment.
     """)
 
-    # Initialize risk_register in session_state if it doesn't exist
-    if "risk_register" not in st.session_state:
-        st.session_state.risk_register = pd.DataFrame(
-            columns=[
-                "Risk ID", "Risk Name", "Category", "Description",
-                "Likelihood", "Impact", "Risk Score", "Mitigation Strategy",
-                "Status", "Owner", "Date Identified"
-            ]
-        )
-
     st.markdown("#### Current Model Risk Register")
     st.markdown("""
     **Risk Manager's Action:** Review the existing entries in the risk register. These might include risks identified during data quality audits, bias detection, or the risk simulation phase. Your role is to ensure all relevant risks are captured and adequately assessed.
@@ -42,7 +34,7 @@ def main():
 
     with st.form("new_risk_form"):
         risk_id = st.text_input(
-            "Risk ID:", value=f"MR_{len(st.session_state.risk_register) + 1:03d}")
+            "Risk ID:", value=f"MR_{next_risk_number(st.session_state.risk_register):03d}")
         risk_name = st.text_input(
             "Risk Name (e.g., 'Gender Bias in Loan Approval'):")
         category = st.selectbox(
@@ -113,11 +105,7 @@ def main():
                     "Description": f"Added risk '{risk_name}' (ID: {risk_id}) with score {risk_score}.",
                     "User": "Risk_Manager_001"
                 }
-                st.session_state.provenance_logs = pd.concat(
-                    [st.session_state.provenance_logs,
-                        pd.DataFrame([new_log_entry])],
-                    ignore_index=True
-                )
+                st.session_state.provenance_logs.append(new_log_entry)
             else:
                 st.warning(
                     "Please fill in all required fields (Risk Name, Description, Mitigation Strategy).")
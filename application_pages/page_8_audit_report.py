@@ -5,6 +5,20 @@ import datetime
 import io
 import numpy as np
 
+from application_pages.missingness import get_missingness_report, top_co_missing_pairs
+from application_pages.outliers import get_outlier_summary, profile_quartiles
+from application_pages.profiling import get_dataset_profile
+
+
+def _provenance_verification(store):
+    """Full chain verification, rerun only when the chain head or length changes."""
+    key = (store.head, len(store))
+    cached = st.session_state.get("provenance_verification")
+    if cached is None or cached[0] != key:
+        cached = (key, store.verify())
+        st.session_state.provenance_verification = cached
+    return cached[1]
+
 
 def main():
     st.markdown("### Step 8: Audit Report & Insights")
@@ -28,12 +42,17 @@ def main():
         f"Date Generated: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}\n")
     report_content.write(f"Auditor: Risk_Manager_001\n\n")
     report_content.write(f"## 1. Data Ingestion & Overview\n")
+    raw_profile = get_dataset_profile(
+        st.session_state.raw_data) if st.session_state.raw_data is not None else None
+    cleaned_profile = get_dataset_profile(
+        st.session_state.cleaned_data) if st.session_state.cleaned_data is not None else None
+
     if st.session_state.raw_data is not None:
         report_content.write(
             f"  - Initial dataset loaded with {len(st.session_state.raw_data)} records and {len(st.session_state.raw_data.columns)} features.\n")
         report_content.write(
             f"  - Key features include: {", ".join(st.session_state.raw_data.columns.tolist())}.\n")
-        missing_initial = st.session_state.raw_data.isnull().sum().sum()
+        missing_initial = int(raw_profile["Missing Counts"].sum())
         if missing_initial > 0:
             report_content.write(
                 f"  - Initial data scan revealed {missing_initial} missing values across features.\n")
@@ -45,45 +64,55 @@ def main():
             "  - No raw data was loaded during the audit process.\n")
 
     report_content.write(f"\n## 2. Data Provenance & Metadata Management\n")
-    if not st.session_state.provenance_logs.empty:
+    if len(st.session_state.provenance_logs) > 0:
+        last_entry = st.session_state.provenance_logs.last()
         report_content.write(
             f"  - {len(st.session_state.provenance_logs)} provenance log entries recorded.\n")
         report_content.write(
-            f"  - Last recorded action: {st.session_state.provenance_logs.iloc[-1]["Description"]} by {st.session_state.provenance_logs.iloc[-1]["User"]} on {st.session_state.provenance_logs.iloc[-1]["Timestamp"]}.\n")
+            f"  - Last recorded action: {last_entry["Description"]} by {last_entry["User"]} on {last_entry["Timestamp"]}.\n")
+        verification = _provenance_verification(st.session_state.provenance_logs)
+        report_content.write(
+            f"  - Provenance hash chain head: {verification["Chain Head"]}.\n")
+        report_content.write(
+            f"  - Hash chain verification: {"passed" if verification["Valid"] else "FAILED"} "
+            f"({verification["Entries Verified"]} entries, {len(st.session_state.provenance_logs.checkpoints)} Merkle checkpoints).\n")
     else:
         report_content.write("  - No provenance logs were documented.\n")
 
     report_content.write(f"\n## 3. Data Quality Audits\n")
     if st.session_state.raw_data is not None:
-        missing_after_cleaning_check = st.session_state.cleaned_data.isnull().sum().sum(
-        ) if st.session_state.cleaned_data is not None else st.session_state.raw_data.isnull().sum().sum()
-        if missing_after_cleaning_check == 0 and st.session_state.raw_data.isnull().sum().sum() > 0:
+        missing_after_cleaning_check = int(cleaned_profile["Missing Counts"].sum(
+        )) if cleaned_profile is not None else missing_initial
+        if missing_after_cleaning_check == 0 and missing_initial > 0:
             report_content.write(
                 "  - Missing values were successfully addressed during data cleaning.\n")
-        elif missing_after_cleaning_check > 0 and st.session_state.raw_data.isnull().sum().sum() > 0:
+        elif missing_after_cleaning_check > 0 and missing_initial > 0:
             report_content.write(
                 f"  - Some missing values still remain after cleaning ({missing_after_cleaning_check} total).\n")
         else:
             report_content.write(
                 "  - No significant missing data issues or they were fully resolved.\n")
 
-        # Outlier summary (simple check)
-        numerical_cols = st.session_state.raw_data.select_dtypes(
-            include=np.number).columns.tolist()
-        outliers_detected = False
-        for col in numerical_cols:
-            if col in st.session_state.raw_data.columns and not st.session_state.raw_data[col].empty:
-                Q1 = st.session_state.raw_data[col].quantile(0.25)
-                Q3 = st.session_state.raw_data[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                if ((st.session_state.raw_data[col] < lower_bound) | (st.session_state.raw_data[col] > upper_bound)).any():
-                    outliers_detected = True
-                    break
-        if outliers_detected:
+        missingness = get_missingness_report(st.session_state.raw_data)
+        report_content.write(
+            f"  - {missingness["Distinct Patterns"]} distinct missing-value patterns; "
+            f"{missingness["Complete Rows"] / max(missingness["Rows"], 1):.1%} of rows were complete before cleaning.\n")
+        co_missing_pairs = top_co_missing_pairs(missingness, n=3)
+        if co_missing_pairs:
+            report_content.write("  - Features most often missing together: " + ", ".join(
+                f"{col_a} & {col_b} ({rows} rows)" for col_a, col_b, rows in co_missing_pairs) + ".\n")
+
+        # Outlier summary (IQR method, multiplier 1.5, all numerical features in one scan)
+        outlier_table, _ = get_outlier_summary(
+            st.session_state.raw_data, raw_profile["Numerical Columns"],
+            quartiles=profile_quartiles(raw_profile))
+        outlier_counts = outlier_table["Lower Outliers"] + outlier_table["Upper Outliers"]
+        if outlier_counts.sum() > 0:
             report_content.write(
-                "  - Outliers were identified in several numerical features, prompting cleaning actions.\n")
+                "  - Outliers were identified in several numerical features, prompting cleaning actions:\n")
+            for col, count in outlier_counts[outlier_counts > 0].items():
+                report_content.write(
+                    f"    - {col}: {count} values ({outlier_table.loc[col, "Outlier Percentage"]:.2f}%) outside the 1.5 x IQR bounds.\n")
         else:
             report_content.write(
                 "  - No significant outliers were detected or they were effectively handled.\n")
@@ -114,6 +143,16 @@ def main():
                     for subgroup, rate in value.items():
                         report_content.write(
                             f"      - {subgroup}: {rate:.4f}\n")
+                elif metric_name == "DPD Confidence Interval":
+                    report_content.write(
+                        f"    - DPD {value['Confidence']:.0%} Bootstrap Confidence Interval: "
+                        f"[{value['Lower']:.4f}, {value['Upper']:.4f}] (standard error {value['Std Error']:.4f}, "
+                        f"{value['Replicates']} replicates, seed {value['Seed']})\n")
+                elif metric_name == "Permutation Test":
+                    report_content.write(
+                        f"    - Permutation Test p-value: {value['P-Value']:.4f} ({value['Permutations']} permutations, "
+                        f"seed {value['Seed']}; null DPD mean {value['Null Mean']:.4f}, "
+                        f"95th percentile {value['Null 95th Percentile']:.4f})\n")
                 elif isinstance(value, (int, float)):
                     report_content.write(f"    - {metric_name}: {value:.4f}\n")
                 else:
@@ -136,6 +175,21 @@ def main():
             f"  - Risk simulation conducted on {total_simulated} applications.\n")
         report_content.write(
             f"  - {flagged_count} applications ({flagged_count/total_simulated:.2%}) were flagged for human review based on a Probability of Default threshold of {review_threshold_used}.\n")
+        monte_carlo_results = st.session_state.get("monte_carlo_results")
+        if monte_carlo_results is not None:
+            summary = monte_carlo_results["Summary"]
+            report_content.write(
+                f"  - Across {summary['Scenarios']} Monte Carlo scenarios (seed {summary['Seed']}), "
+                f"{summary['Expected Flagged']:.1f} applications are expected to need review "
+                f"(90% range {summary['Flagged P05']:.0f}-{summary['Flagged P95']:.0f}); "
+                f"{summary['Uncertain Applicants']} applicants are flagged in some scenarios but not others.\n")
+        for attribute, metrics in st.session_state.get("simulation_fairness", {}).items():
+            report_content.write(f"  - Fairness of the simulated decisions for '{attribute}':\n")
+            for metric_name, value in metrics.items():
+                if metric_name == "Four-Fifths Rule Passed":
+                    report_content.write(f"    - Four-Fifths Rule: {'Passed' if value else 'Failed'}\n")
+                else:
+                    report_content.write(f"    - {metric_name}: {value:.4f}\n")
         report_content.write(
             "  - This process demonstrated the model's behavior under uncertainty and highlighted the need for human-in-the-loop interventions for high-risk cases.\n")
     else:
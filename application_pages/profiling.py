@@ -0,0 +1,265 @@
+import hashlib
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from application_pages.sketches import (
+    DEFAULT_HLL_PRECISION, DEFAULT_QUANTILE_K, ProfileSketch)
+
+
+QUANTILES = [0.25, 0.5, 0.75]
+SKETCH_CHUNK_SIZE = 500_000
+
+DEFAULT_PROFILING_SETTINGS = {
+    "Mode": "Exact",
+    "Quantile K": DEFAULT_QUANTILE_K,
+    "HLL Precision": DEFAULT_HLL_PRECISION,
+}
+
+# id(df) -> (weakref to df, fingerprint). Pages replace session DataFrames rather
+# than mutating them, so a frame's fingerprint is computed once per object.
+# Streamlit runs sessions on separate threads, so every access holds the lock.
+_FINGERPRINTS = {}
+_FINGERPRINTS_LOCK = threading.Lock()
+
+
+def _update_digest_arrow_strings(digest, values):
+    """Hash Arrow-backed strings from their buffers: validity, per-row byte lengths and the UTF-8 data.
+
+    Each part goes through its own digest, so the result does not depend on how the column is chunked.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    validity, lengths, data = (hashlib.blake2b(digest_size=16) for _ in range(3))
+    array = pa.array(values)
+    for chunk in array.chunks if isinstance(array, pa.ChunkedArray) else [array]:
+        if chunk.null_count:
+            validity.update(chunk.is_valid().to_numpy(zero_copy_only=False).tobytes())
+            # Null slots may still span bytes; filling them makes the lengths and data canonical
+            chunk = pc.fill_null(chunk, "")
+        offset_type = np.int64 if pa.types.is_large_string(chunk.type) else np.int32
+        offsets = np.frombuffer(chunk.buffers()[1], dtype=offset_type)[chunk.offset:chunk.offset + len(chunk) + 1]
+        lengths.update(np.diff(offsets).tobytes())
+        if offsets[-1] > offsets[0]:
+            data.update(memoryview(chunk.buffers()[2])[offsets[0]:offsets[-1]])
+    for part in (validity, lengths, data):
+        digest.update(part.digest())
+
+
+def _update_digest(digest, series):
+    digest.update(f"{series.name}|{series.dtype}|".encode())
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        digest.update(repr(series.cat.categories.tolist()).encode())
+        digest.update(np.ascontiguousarray(series.cat.codes.to_numpy()).tobytes())
+    elif pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+        digest.update(np.ascontiguousarray(
+            series.to_numpy(na_value=np.nan) if series.hasnans else series.to_numpy()).tobytes())
+    elif isinstance(series.dtype, pd.StringDtype) and series.dtype.storage == "pyarrow":
+        _update_digest_arrow_strings(digest, series.array)
+    else:
+        # One uint64 per value, hashed in C; text columns are mostly unique, so factorizing first only adds work
+        digest.update(pd.util.hash_pandas_object(series, index=False, categorize=False).to_numpy().tobytes())
+
+
+def dataset_fingerprint(df):
+    """Return a content hash of a DataFrame (columns, dtypes, values and index length)."""
+    with _FINGERPRINTS_LOCK:
+        cached = _FINGERPRINTS.get(id(df))
+    if cached is not None and cached[0]() is df:
+        return cached[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{len(df)}|".encode())
+    for col in df.columns:
+        _update_digest(digest, df[col])
+    fingerprint = digest.hexdigest()
+
+    with _FINGERPRINTS_LOCK:
+        # Drop entries whose frames have been garbage collected
+        for key in [key for key, (ref, _) in _FINGERPRINTS.items() if ref() is None]:
+            del _FINGERPRINTS[key]
+        _FINGERPRINTS[id(df)] = (weakref.ref(df), fingerprint)
+    return fingerprint
+
+
+def compute_profile(df):
+    """Compute missing counts, moments, quantiles and cardinalities in one profiling pass."""
+    numerical_cols = df.select_dtypes(include=np.number).columns.tolist()
+    other_cols = [col for col in df.columns if col not in numerical_cols]
+    missing_counts = df.isnull().sum()
+
+    numeric = df[numerical_cols]
+    numeric_stats = pd.DataFrame(
+        {
+            "count": len(df) - missing_counts[numerical_cols],
+            "mean": numeric.mean(),
+            "std": numeric.std(),
+            "min": numeric.min(),
+        },
+        index=numerical_cols
+    ).T
+    if numerical_cols:
+        quantiles = numeric.quantile(QUANTILES)
+        quantiles.index = [f"{int(q * 100)}%" for q in QUANTILES]
+        numeric_stats = pd.concat([numeric_stats, quantiles, numeric.max().to_frame("max").T])
+    numeric_stats = numeric_stats.astype(float)
+
+    cardinality = {}
+    top = {}
+    freq = {}
+    for col in other_cols:
+        counts = df[col].value_counts()
+        counts = counts[counts > 0]
+        cardinality[col] = len(counts)
+        if not counts.empty:
+            top[col] = counts.index[0]
+            freq[col] = int(counts.iloc[0])
+    for col in numerical_cols:
+        cardinality[col] = int(df[col].nunique())
+
+    return {
+        "Rows": len(df),
+        "Columns": df.columns.tolist(),
+        "Numerical Columns": numerical_cols,
+        "Missing Counts": missing_counts,
+        "Numeric Stats": numeric_stats,
+        "Cardinality": pd.Series(cardinality, dtype="int64").reindex(df.columns),
+        "Top": top,
+        "Freq": freq,
+        "Mode": "Exact",
+        "Error Bounds": None,
+    }
+
+
+def iter_frame_chunks(df, chunk_size=SKETCH_CHUNK_SIZE):
+    """Yield row slices of an in-memory DataFrame."""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def compute_sketch_profile(chunks, quantile_k=DEFAULT_QUANTILE_K, hll_precision=DEFAULT_HLL_PRECISION):
+    """Build an approximate profile from a chunk stream with mergeable sketches.
+
+    `chunks` can come from `iter_frame_chunks`, `data_generator.iter_loan_data`
+    or `ingestion.iter_file_chunks`, so the full dataset never has to be
+    materialized.
+    """
+    sketch = ProfileSketch(quantile_k=quantile_k, hll_precision=hll_precision)
+    for chunk in chunks:
+        sketch.update(chunk)
+    return sketch.to_profile(QUANTILES)
+
+
+def profiling_settings():
+    """Current profiling mode and sketch parameters chosen on page 1."""
+    return st.session_state.get("profiling_settings", DEFAULT_PROFILING_SETTINGS)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_profile(fingerprint, mode, quantile_k, hll_precision, _df):
+    if mode == "Sketch":
+        return compute_sketch_profile(iter_frame_chunks(_df), quantile_k, hll_precision)
+    return compute_profile(_df)
+
+
+def stream_sketch(settings=None):
+    """A fresh `ProfileSketch` to feed chunks into while loading data, or None outside sketch mode."""
+    settings = settings or profiling_settings()
+    if settings["Mode"] != "Sketch":
+        return None
+    return ProfileSketch(quantile_k=settings["Quantile K"], hll_precision=settings["HLL Precision"])
+
+
+def store_streamed_profile(df, sketch):
+    """Keep the profile a loader built chunk by chunk, so sketch mode does not rescan `df`."""
+    key = (dataset_fingerprint(df), sketch.quantile_k, sketch.hll_precision)
+    st.session_state.streamed_profile = (key, sketch.to_profile(QUANTILES))
+
+
+def get_dataset_profile(df, settings=None):
+    """Return the memoized profile for `df`, keyed by its content fingerprint and profiling settings.
+
+    In sketch mode a profile streamed while the data was loaded is used when
+    it matches the frame and the sketch parameters.
+    """
+    settings = settings or profiling_settings()
+    fingerprint = dataset_fingerprint(df)
+    streamed = st.session_state.get("streamed_profile")
+    if settings["Mode"] == "Sketch" and streamed is not None and \
+            streamed[0] == (fingerprint, settings["Quantile K"], settings["HLL Precision"]):
+        return {**streamed[1], "Fingerprint": fingerprint}
+    profile = dict(_cached_profile(
+        fingerprint, settings["Mode"], settings["Quantile K"], settings["HLL Precision"], df))
+    profile["Fingerprint"] = fingerprint
+    return profile
+
+
+def show_profile_mode(profile):
+    """Caption the error bounds when statistics come from sketches."""
+    if profile.get("Mode") == "Sketch":
+        bounds = profile["Error Bounds"]
+        st.caption(
+            f"Approximate statistics (sketch mode): quantiles within ±{bounds['Quantile Rank Error']:.2%} rank error, "
+            f"distinct counts within ±{bounds['Distinct Count Relative Error']:.2%} relative error. "
+            "Missing counts, min, max and moments are exact.")
+
+
+def missing_value_table(profile):
+    """Missing count/percentage per column with missing values, highest first."""
+    missing_data = profile["Missing Counts"].to_frame(name="Missing Count")
+    missing_data["Missing Percentage"] = (
+        missing_data["Missing Count"] / max(profile["Rows"], 1)) * 100
+    return missing_data[missing_data["Missing Count"] > 0].sort_values(
+        by="Missing Percentage", ascending=False)
+
+
+def summary_table(profile):
+    """Assemble a `describe(include='all')`-style table from a profile."""
+    rows = ["count", "unique", "top", "freq", "mean", "std", "min", "25%", "50%", "75%", "max"]
+    summary = pd.DataFrame(index=rows, columns=profile["Columns"], dtype=object)
+    numeric_stats = profile["Numeric Stats"]
+    for col in profile["Columns"]:
+        if col in numeric_stats.columns:
+            for stat in numeric_stats.index:
+                summary.loc[stat, col] = numeric_stats.loc[stat, col]
+        else:
+            summary.loc["count", col] = profile["Rows"] - int(profile["Missing Counts"][col])
+            summary.loc["unique", col] = profile["Cardinality"][col]
+            summary.loc["top", col] = profile["Top"].get(col)
+            summary.loc["freq", col] = profile["Freq"].get(col)
+    return summary.dropna(how="all")
+
+
+def stratified_sample(df, size, strata=None, seed=0):
+    """Up to `size` rows drawn without replacement, proportionally from each `strata` value.
+
+    Each stratum keeps at least one row, so small groups (and missing strata
+    values) are still represented. Rows keep their original order.
+    """
+    if len(df) <= size:
+        return df
+    rng = np.random.default_rng(seed)
+    if strata is None:
+        return df.iloc[np.sort(rng.choice(len(df), size, replace=False))]
+    codes, _ = pd.factorize(df[strata], use_na_sentinel=False)
+    counts = np.bincount(codes)
+    quotas = np.maximum(np.round(counts * size / len(df)).astype(np.int64), 1)
+    # Shuffle rows within each stratum, then take each stratum's first `quota` rows
+    order = np.lexsort((rng.random(len(df)), codes))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    rank = np.arange(len(df)) - starts[codes[order]]
+    return df.iloc[np.sort(order[rank < quotas[codes[order]]])]
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _cached_sample(fingerprint, size, strata, seed, _df):
+    return stratified_sample(_df, size, strata, seed).reset_index(drop=True)
+
+
+def get_stratified_sample(df, size, strata=None, seed=0):
+    """Memoized stratified sample, keyed by the dataset fingerprint and sampling settings."""
+    return _cached_sample(dataset_fingerprint(df), size, strata, seed, df)
@@ -0,0 +1,405 @@
+import bisect
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+
+PROVENANCE_COLUMNS = ["Timestamp", "Action", "Description", "User"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_USER = "Risk_Manager_001"
+
+# Set to a file path to persist provenance logs in SQLite (WAL mode)
+PROVENANCE_DB_ENV = "QULAB_PROVENANCE_DB"
+
+GENESIS_HASH = "0" * 64
+CHECKPOINT_INTERVAL = 1024
+
+
+_ENTRY_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+
+
+def _chain_hash(previous_hash, values):
+    payload = _ENTRY_ENCODER.encode(values)
+    return hashlib.sha256(f"{previous_hash}|{payload}".encode()).hexdigest()
+
+
+def entry_hash(previous_hash, entry):
+    """SHA-256 of the previous chain hash and the canonical (JSON) form of an entry."""
+    return _chain_hash(previous_hash, [entry[col] for col in PROVENANCE_COLUMNS])
+
+
+def merkle_root(hashes):
+    """Merkle root of a list of hex digests (the last node is paired with itself on odd levels)."""
+    level = [bytes.fromhex(h) for h in hashes]
+    if not level:
+        return GENESIS_HASH
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0].hex()
+
+
+class SQLiteProvenanceBackend:
+    """On-disk provenance log in SQLite with WAL journaling and indexed columns.
+
+    Several sessions may share one file, so writes go through `transaction()`,
+    which takes the write lock up front (BEGIN IMMEDIATE).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # Autocommit mode; transactions are opened explicitly
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self.transaction():
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS provenance_logs ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "timestamp TEXT NOT NULL, action TEXT NOT NULL, "
+                "description TEXT, user TEXT, entry_hash TEXT)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS provenance_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(provenance_logs)")]
+            if "entry_hash" not in columns:
+                # Only rows written before hash chaining may have their hashes backfilled
+                self._conn.execute("ALTER TABLE provenance_logs ADD COLUMN entry_hash TEXT")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO provenance_meta (key, value) "
+                    "SELECT 'legacy_max_id', COALESCE(MAX(id), 0) FROM provenance_logs")
+            self._conn.execute(
+                "INSERT OR IGNORE INTO provenance_meta (key, value) VALUES ('legacy_max_id', 0)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS provenance_checkpoints ("
+                "entries INTEGER PRIMARY KEY, chain_hash TEXT NOT NULL, merkle_root TEXT NOT NULL)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_provenance_action ON provenance_logs(action, timestamp)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_provenance_user ON provenance_logs(user, timestamp)")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_provenance_timestamp ON provenance_logs(timestamp)")
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Hold the database write lock for the block; commit on success, roll back on error."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def write(self, rows, checkpoints=()):
+        """Insert rows and checkpoints (inside `transaction()`); returns the id of the last row."""
+        self._conn.executemany(
+            "INSERT INTO provenance_logs (timestamp, action, description, user, entry_hash) "
+            "VALUES (?, ?, ?, ?, ?)",
+            rows)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO provenance_checkpoints (entries, chain_hash, merkle_root) VALUES (?, ?, ?)",
+            checkpoints)
+        return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM provenance_logs").fetchone()[0]
+
+    def load(self, after_id=0):
+        return self._conn.execute(
+            "SELECT id, timestamp, action, description, user, entry_hash FROM provenance_logs "
+            "WHERE id > ? ORDER BY id", (after_id,)).fetchall()
+
+    def legacy_max_id(self):
+        """Highest id of the rows written before the entry_hash column existed and not yet backfilled."""
+        return self._conn.execute(
+            "SELECT value FROM provenance_meta WHERE key = 'legacy_max_id'").fetchone()[0]
+
+    def load_checkpoints(self):
+        return self._conn.execute(
+            "SELECT entries, chain_hash, merkle_root FROM provenance_checkpoints ORDER BY entries").fetchall()
+
+    def backfill_hashes(self, id_hashes):
+        """Store hashes for the legacy rows and close the backfill window for good."""
+        with self.transaction():
+            self._conn.executemany(
+                "UPDATE provenance_logs SET entry_hash = ? WHERE id = ?",
+                [(h, row_id) for row_id, h in id_hashes])
+            self._conn.execute("UPDATE provenance_meta SET value = 0 WHERE key = 'legacy_max_id'")
+
+    def query(self, action=None, user=None, start=None, end=None):
+        clauses, params = [], []
+        for column, value in (("action", action), ("user", user)):
+            if value is not None:
+                values = [value] if isinstance(value, str) else list(value)
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("timestamp <= ?")
+            params.append(end)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn.execute(
+            f"SELECT timestamp, action, description, user FROM provenance_logs{where} ORDER BY id",
+            params).fetchall()
+        return pd.DataFrame(rows, columns=PROVENANCE_COLUMNS)
+
+
+class ProvenanceStore:
+    """Append-optimized, hash-chained provenance log.
+
+    Entries are appended to per-column Python lists (amortized O(1)) with
+    Action/User indexes, and buffered for batch writes to an optional SQLite
+    backend. `to_frame()` builds the DataFrame view for `st.dataframe`
+    incrementally, only converting entries added since the last call.
+
+    Each entry stores `entry_hash(previous hash, entry)`, so editing any past
+    entry breaks the chain from that point on. Every `checkpoint_interval`
+    entries a checkpoint records the chain hash and the Merkle root of that
+    block's entry hashes; `verify()` rechecks the whole chain in one pass, or
+    only the entries after a trusted checkpoint.
+
+    With a backend, each flush runs in one write transaction: rows other
+    sessions appended since the last sync are loaded first and the local
+    unflushed entries are rechained on top of them, so a database shared by
+    several sessions keeps a single chain. A stored row without a hash is
+    rehashed only if it belongs to the legacy prefix written before hash
+    chaining; anywhere else it is reported by `verify()`.
+    """
+
+    def __init__(self, backend=None, flush_size=64, checkpoint_interval=CHECKPOINT_INTERVAL):
+        self.backend = backend
+        self.flush_size = flush_size
+        self.checkpoint_interval = checkpoint_interval
+        self._columns = {col: [] for col in PROVENANCE_COLUMNS}
+        self._hashes = []
+        self._checkpoints = []
+        self._by_action = {}
+        self._by_user = {}
+        self._timestamps_sorted = True
+        self._missing_hashes = []
+        # Entries before _synced are stored in the backend, whose last row id is _last_row_id
+        self._synced = 0
+        self._synced_checkpoints = 0
+        self._last_row_id = 0
+        self._frame = pd.DataFrame(columns=PROVENANCE_COLUMNS)
+        if backend is not None:
+            backfill = self._load_rows(backend.load(), backend.legacy_max_id())
+            if backfill:
+                backend.backfill_hashes(backfill)
+            self._checkpoints = [
+                {"Entries": entries, "Chain Hash": chain, "Merkle Root": root}
+                for entries, chain, root in backend.load_checkpoints()]
+            self._synced_checkpoints = len(self._checkpoints)
+            self._add_checkpoints()
+            self.flush()
+
+    def __len__(self):
+        return len(self._columns["Timestamp"])
+
+    @property
+    def head(self):
+        """Hash of the latest entry (the genesis hash for an empty log)."""
+        return self._hashes[-1] if self._hashes else GENESIS_HASH
+
+    @property
+    def checkpoints(self):
+        return list(self._checkpoints)
+
+    def _load_rows(self, rows, legacy_max_id=0):
+        """Append stored rows; returns (row id, hash) pairs for the legacy rows to backfill."""
+        backfill = []
+        for row_id, *values, stored_hash in rows:
+            entry = dict(zip(PROVENANCE_COLUMNS, values))
+            if stored_hash is None:
+                if row_id <= legacy_max_id and len(backfill) == len(self):
+                    backfill.append((row_id, entry_hash(self.head, entry)))
+                else:
+                    self._missing_hashes.append(len(self))
+            self._add(entry, stored_hash)
+            self._last_row_id = row_id
+        self._synced = len(self)
+        return backfill
+
+    def _truncate(self, size):
+        """Drop the entries from position `size` on (only ever unflushed ones)."""
+        for position in range(len(self) - 1, size - 1, -1):
+            self._by_action[self._columns["Action"][position]].pop()
+            self._by_user[self._columns["User"][position]].pop()
+        for values in self._columns.values():
+            del values[size:]
+        del self._hashes[size:]
+        self._checkpoints = [c for c in self._checkpoints if c["Entries"] <= size]
+        self._synced_checkpoints = min(self._synced_checkpoints, len(self._checkpoints))
+        if len(self._frame) > size:
+            self._frame = self._frame.iloc[:size]
+
+    def _add(self, entry, stored_hash=None):
+        position = len(self)
+        timestamps = self._columns["Timestamp"]
+        if timestamps and entry["Timestamp"] < timestamps[-1]:
+            self._timestamps_sorted = False
+        for col in PROVENANCE_COLUMNS:
+            self._columns[col].append(entry[col])
+        self._hashes.append(stored_hash or entry_hash(self.head, entry))
+        self._by_action.setdefault(entry["Action"], []).append(position)
+        self._by_user.setdefault(entry["User"], []).append(position)
+
+    def _add_checkpoints(self):
+        covered = self._checkpoints[-1]["Entries"] if self._checkpoints else 0
+        while covered + self.checkpoint_interval <= len(self):
+            end = covered + self.checkpoint_interval
+            checkpoint = {
+                "Entries": end,
+                "Chain Hash": self._hashes[end - 1],
+                "Merkle Root": merkle_root(self._hashes[covered:end]),
+            }
+            self._checkpoints.append(checkpoint)
+            covered = end
+
+    def append(self, entry):
+        """Record one provenance event given as a dict with Action and Description."""
+        self.extend([entry])
+
+    def extend(self, entries):
+        """Record several provenance events with a single backend flush."""
+        now = datetime.datetime.now().strftime(TIMESTAMP_FORMAT)
+        for entry in entries:
+            entry = {
+                "Timestamp": entry.get("Timestamp") or now,
+                "Action": entry["Action"],
+                "Description": entry["Description"],
+                "User": entry.get("User") or DEFAULT_USER,
+            }
+            self._add(entry)
+        self._add_checkpoints()
+        if len(entries) > 1 or len(self) - self._synced >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered entries to the backend in one transaction, after any rows other sessions wrote."""
+        if self.backend is None:
+            return
+        with self.backend.transaction():
+            stored = self.backend.load(after_id=self._last_row_id)
+            if stored:
+                pending = [{col: self._columns[col][position] for col in PROVENANCE_COLUMNS}
+                           for position in range(self._synced, len(self))]
+                self._truncate(self._synced)
+                self._load_rows(stored)
+                for entry in pending:
+                    self._add(entry)
+                self._add_checkpoints()
+            if self._synced == len(self) and self._synced_checkpoints == len(self._checkpoints):
+                return
+            rows = [tuple(self._columns[col][position] for col in PROVENANCE_COLUMNS) + (self._hashes[position],)
+                    for position in range(self._synced, len(self))]
+            checkpoints = [tuple(c.values()) for c in self._checkpoints[self._synced_checkpoints:]]
+            self._last_row_id = self.backend.write(rows, checkpoints)
+            self._synced = len(self)
+            self._synced_checkpoints = len(self._checkpoints)
+
+    def last(self):
+        """The most recent entry as a dict, or None if the log is empty."""
+        if not len(self):
+            return None
+        return {col: values[-1] for col, values in self._columns.items()}
+
+    def verify(self, from_checkpoint=None):
+        """Recompute the hash chain and checkpoint Merkle roots in a single pass.
+
+        With `from_checkpoint` (an index into `checkpoints`, e.g. -1 for the
+        latest) the chain hash stored at that checkpoint is trusted and only
+        later entries are rehashed. Stored entries without a hash outside the
+        legacy prefix always fail verification.
+        """
+        started = time.perf_counter()
+        start, previous = 0, GENESIS_HASH
+        if from_checkpoint is not None and self._checkpoints:
+            checkpoint = self._checkpoints[from_checkpoint]
+            start, previous = checkpoint["Entries"], checkpoint["Chain Hash"]
+
+        first_invalid = None
+        columns = [self._columns[col] for col in PROVENANCE_COLUMNS]
+        for position, values in enumerate(zip(*(values[start:] for values in columns)), start):
+            previous = _chain_hash(previous, list(values))
+            if previous != self._hashes[position]:
+                first_invalid = position
+                break
+
+        invalid_checkpoints = []
+        for checkpoint in self._checkpoints:
+            end = checkpoint["Entries"]
+            if end < start:
+                continue
+            block = self._hashes[end - self.checkpoint_interval:end]
+            if end > len(self) or block[-1] != checkpoint["Chain Hash"] \
+                    or merkle_root(block) != checkpoint["Merkle Root"]:
+                invalid_checkpoints.append(end)
+
+        return {
+            "Valid": first_invalid is None and not invalid_checkpoints and not self._missing_hashes,
+            "Entries Verified": (first_invalid if first_invalid is not None else len(self)) - start,
+            "Verified From Entry": start,
+            "First Invalid Entry": first_invalid,
+            "Invalid Checkpoints": invalid_checkpoints,
+            "Entries Missing Hash": list(self._missing_hashes),
+            "Chain Head": self.head,
+            "Seconds": round(time.perf_counter() - started, 4),
+        }
+
+    def to_frame(self):
+        """DataFrame view of the full log."""
+        start = len(self._frame)
+        if start < len(self):
+            tail = pd.DataFrame(
+                {col: values[start:] for col, values in self._columns.items()},
+                index=pd.RangeIndex(start, len(self)))
+            self._frame = tail if start == 0 else pd.concat([self._frame, tail])
+        return self._frame
+
+    def query(self, action=None, user=None, start=None, end=None):
+        """Entries filtered by Action(s), User(s) and an inclusive timestamp range."""
+        if self.backend is not None:
+            self.flush()
+            return self.backend.query(action, user, start, end)
+
+        positions = None
+        for index, value in ((self._by_action, action), (self._by_user, user)):
+            if value is not None:
+                values = [value] if isinstance(value, str) else value
+                matched = set()
+                for v in values:
+                    matched.update(index.get(v, []))
+                positions = matched if positions is None else positions & matched
+
+        frame = self.to_frame()
+        timestamps = self._columns["Timestamp"]
+        if start is not None or end is not None:
+            if self._timestamps_sorted:
+                lo = bisect.bisect_left(timestamps, start) if start is not None else 0
+                hi = bisect.bisect_right(timestamps, end) if end is not None else len(timestamps)
+                if positions is None:
+                    return frame.iloc[lo:hi]
+                positions = {p for p in positions if lo <= p < hi}
+            else:
+                candidates = positions if positions is not None else range(len(timestamps))
+                positions = {p for p in candidates
+                             if (start is None or timestamps[p] >= start)
+                             and (end is None or timestamps[p] <= end)}
+
+        if positions is None:
+            return frame
+        return frame.iloc[sorted(positions)]
+
+
+def create_provenance_store():
+    """Create the session's provenance store, backed by SQLite if configured."""
+    path = os.environ.get(PROVENANCE_DB_ENV)
+    backend = SQLiteProvenanceBackend(path) if path else None
+    return ProvenanceStore(backend=backend)
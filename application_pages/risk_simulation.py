@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_SCENARIOS = 1000
+# Upper bound on (scenario x applicant) values held at once
+SCENARIO_CHUNK_ELEMENTS = 2 ** 22
+# Per-applicant score histograms use this many bins on [0, 1] for the quantiles
+SCORE_BINS = 200
+# Upper bound on histogram counters held at once (applicants x SCORE_BINS); applicants are scored in blocks
+APPLICANT_BLOCK_CELLS = 2 ** 22
+SCORE_QUANTILES = [0.05, 0.5, 0.95]
+
+
+def applicant_inputs(df):
+    """Float arrays of the risk-score inputs, one entry per applicant."""
+    return {
+        "credit_history": df["Credit_History"].to_numpy(np.float64, na_value=np.nan),
+        "loan_amount": df["LoanAmount"].to_numpy(np.float64, na_value=np.nan),
+        "applicant_income": df["ApplicantIncome"].to_numpy(np.float64, na_value=np.nan),
+        "coapplicant_income": df["CoapplicantIncome"].to_numpy(np.float64, na_value=np.nan),
+        "not_graduate": (df["Education"] == "Not Graduate").to_numpy(bool),
+        "dependents": df["Dependents"].astype(object).replace({"3+": "3"}).astype(float).to_numpy(),
+    }
+
+
+def mock_risk_score(credit_history, loan_amount, applicant_income, coapplicant_income, not_graduate, dependents):
+    """Mock probability of default; inputs broadcast, so (scenarios x applicants) arrays work as well as rows."""
+    # Factor 1: Credit History (most significant); unknown history counts as 0.5
+    risk_score = (1 - np.where(np.isnan(credit_history), 0.5, credit_history)) * 0.4
+    # Factor 2: Loan amount relative to household income, capped
+    loan_to_income_ratio = loan_amount / (applicant_income + coapplicant_income + 1e-6)
+    risk_score = risk_score + np.clip(loan_to_income_ratio * 0.1, 0, 0.3)
+    # Factor 3: Education
+    risk_score = risk_score + np.where(not_graduate, 0.05, 0.0)
+    # Factor 4: Dependents
+    risk_score = risk_score + dependents * 0.02
+    return np.clip(risk_score, 0.0, 1.0)
+
+
+def _histogram_dtype(scenarios):
+    """Narrowest unsigned dtype that can count every scenario in one histogram cell."""
+    return np.uint16 if scenarios <= np.iinfo(np.uint16).max else np.uint32
+
+
+def _histogram_quantiles(histogram, quantiles):
+    """Per-row quantiles from (rows x bins) counts on [0, 1], interpolated linearly within a bin."""
+    n_bins = histogram.shape[1]
+    # A row never sums past the scenario count, so the cumulative counts keep the histogram dtype
+    cumulative = np.cumsum(histogram, axis=1, dtype=histogram.dtype)
+    totals = cumulative[:, -1]
+    result = np.full((len(histogram), len(quantiles)), np.nan)
+    rows = np.flatnonzero(totals)
+    for j, q in enumerate(quantiles):
+        target = q * totals[rows]
+        bins = np.argmax(cumulative[rows] >= target[:, None], axis=1)
+        below = np.where(bins > 0, cumulative[rows, bins - 1], 0)
+        inside = histogram[rows, bins]
+        fraction = np.where(inside > 0, (target - below) / np.maximum(inside, 1), 0.0)
+        result[rows, j] = (bins + fraction) / n_bins
+    return result
+
+
+def monte_carlo_simulation(df, scenarios, income_uncertainty_percent, loan_amount_uncertainty_percent,
+                           credit_history_noise_level, human_review_threshold, seed=0, approval_threshold=0.5):
+    """Run `scenarios` independent perturbations of the portfolio as (scenarios x applicants) arrays.
+
+    Each scenario draws fresh income and loan-amount errors and credit-history
+    flips for every applicant and rescores them with one vectorized
+    `mock_risk_score` call. Applicants are taken in blocks whose score
+    histograms fit in `APPLICANT_BLOCK_CELLS` counters, and each block's
+    scenarios in chunks of at most `SCENARIO_CHUNK_ELEMENTS` values, with
+    seeds spawned from `seed` per block and chunk, so the result depends only
+    on the data and the arguments and memory does not grow with the number of
+    applicants beyond the per-applicant results. Per applicant, flag counts,
+    score sums and a score histogram are accumulated, and the histogram is
+    reduced to score quantiles before the next block; per scenario, the
+    numbers of flagged and approved applications are summed over blocks.
+
+    Returns (applicants, details): `applicants` is indexed like `df` with
+    "Flag Probability", "Mean Risk Score" and score quantile columns
+    (applicants without a computable score get NaN); `details` holds the
+    "Flagged Counts" and "Approved Counts" per scenario and a "Summary".
+    """
+    inputs = applicant_inputs(df)
+    n = len(df)
+    income_error, loan_error = income_uncertainty_percent / 100, loan_amount_uncertainty_percent / 100
+
+    flag_counts = np.zeros(n, dtype=np.int64)
+    valid_counts = np.zeros(n, dtype=np.int64)
+    score_sums = np.zeros(n)
+    score_quantiles = np.full((n, len(SCORE_QUANTILES)), np.nan)
+    flagged_per_scenario = np.zeros(scenarios, dtype=np.int64)
+    approved_per_scenario = np.zeros(scenarios, dtype=np.int64)
+
+    block = max(1, APPLICANT_BLOCK_CELLS // SCORE_BINS)
+    block_starts = range(0, n, block)
+    for block_start, block_seed in zip(block_starts, np.random.SeedSequence(seed).spawn(len(block_starts))):
+        rows = slice(block_start, min(block_start + block, n))
+        m = rows.stop - rows.start
+        block_inputs = {name: values[rows] for name, values in inputs.items()}
+        income, loan = block_inputs.pop("applicant_income"), block_inputs.pop("loan_amount")
+        credit = block_inputs.pop("credit_history")
+        histogram = np.zeros(m * SCORE_BINS, dtype=_histogram_dtype(scenarios))
+        applicant_offsets = np.arange(m) * SCORE_BINS
+
+        chunk = max(1, SCENARIO_CHUNK_ELEMENTS // m)
+        starts = range(0, scenarios, chunk)
+        for start, chunk_seed in zip(starts, block_seed.spawn(len(starts))):
+            size = min(chunk, scenarios - start)
+            rng = np.random.default_rng(chunk_seed)
+            scores = mock_risk_score(
+                np.where(rng.random((size, m)) < credit_history_noise_level, 1 - credit, credit),
+                loan * (1 + rng.uniform(-loan_error, loan_error, (size, m))),
+                income * (1 + rng.uniform(-income_error, income_error, (size, m))),
+                **block_inputs)
+            valid = ~np.isnan(scores)
+            flagged = scores > human_review_threshold
+            flag_counts[rows] += flagged.sum(axis=0)
+            valid_counts[rows] += valid.sum(axis=0)
+            score_sums[rows] += np.where(valid, scores, 0.0).sum(axis=0)
+            bins = np.minimum((np.nan_to_num(scores) * SCORE_BINS).astype(np.intp), SCORE_BINS - 1)
+            # Only the cells this chunk touched are incremented
+            cells, counts = np.unique((bins + applicant_offsets)[valid], return_counts=True)
+            histogram[cells] += counts.astype(histogram.dtype)
+            flagged_per_scenario[start:start + size] += flagged.sum(axis=1)
+            approved_per_scenario[start:start + size] += (scores < approval_threshold).sum(axis=1)
+        score_quantiles[rows] = _histogram_quantiles(histogram.reshape(m, SCORE_BINS), SCORE_QUANTILES)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        applicants = pd.DataFrame({
+            "Flag Probability": np.where(valid_counts > 0, flag_counts / valid_counts, np.nan),
+            "Mean Risk Score": np.where(valid_counts > 0, score_sums / valid_counts, np.nan),
+        }, index=df.index)
+    for j, q in enumerate(SCORE_QUANTILES):
+        applicants[f"Risk Score P{int(q * 100):02d}"] = score_quantiles[:, j]
+
+    p05, p50, p95 = np.quantile(flagged_per_scenario, [0.05, 0.5, 0.95]) if scenarios else (np.nan,) * 3
+    summary = {
+        "Scenarios": scenarios,
+        "Seed": seed,
+        "Expected Flagged": float(flagged_per_scenario.mean()) if scenarios else np.nan,
+        "Flagged Std": float(flagged_per_scenario.std(ddof=1)) if scenarios > 1 else 0.0,
+        "Flagged P05": float(p05),
+        "Flagged Median": float(p50),
+        "Flagged P95": float(p95),
+        "Expected Approved": float(approved_per_scenario.mean()) if scenarios else np.nan,
+        # Applicants whose flag depends on the draw rather than being settled in every scenario
+        "Uncertain Applicants": int(((flag_counts > 0) & (flag_counts < valid_counts)).sum()),
+    }
+    return applicants, {
+        "Flagged Counts": flagged_per_scenario,
+        "Approved Counts": approved_per_scenario,
+        "Summary": summary,
+    }
@@ -0,0 +1,297 @@
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_QUANTILE_K = 200
+DEFAULT_HLL_PRECISION = 12
+
+
+def kll_rank_error(k):
+    """Approximate normalized rank error of a KLL sketch with parameter `k`."""
+    return 2.296 / k ** 0.9723
+
+
+def hll_relative_error(precision):
+    """Standard relative error of a HyperLogLog sketch with 2**precision registers."""
+    return 1.04 / np.sqrt(2 ** precision)
+
+
+class KLLSketch:
+    """Mergeable KLL-style quantile sketch over float values.
+
+    Items live in levels of compactors; an item at level h stands for 2**h
+    original values. Compaction is lazy: only while the sketch holds more
+    items than its total capacity is the lowest full level sorted and every
+    other item (random offset) promoted, so a large batch no longer forces a
+    compaction of every level above it.
+    """
+
+    def __init__(self, k=DEFAULT_QUANTILE_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 8)
+
+    def _retained(self):
+        return sum(len(items) for items in self.levels)
+
+    def _total_capacity(self):
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _compress(self):
+        while self._retained() > self._total_capacity():
+            # Some level must be full whenever the total is over capacity
+            level = next(h for h, items in enumerate(self.levels) if len(items) >= self._capacity(h))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # An odd item stays behind so promoted pairs keep exact weight
+            held = items[-1:] if len(items) % 2 else items[:0]
+            promoted = items[:len(items) - len(held)][self._rng.integers(2)::2]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            self.levels[level] = held
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        if other.k != self.k:
+            raise ValueError("Cannot merge KLL sketches with different k.")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, qs):
+        """Estimated values at quantiles `qs`; exact at 0 and 1."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level_items), 2.0 ** level) for level, level_items in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, cum_weights = items[order], np.cumsum(weights[order])
+        idx = np.searchsorted(cum_weights, qs * cum_weights[-1], side="left")
+        result = items[np.minimum(idx, len(items) - 1)]
+        result = np.where(qs <= 0, self.min, result)
+        return np.where(qs >= 1, self.max, result)
+
+
+class HyperLogLog:
+    """Mergeable HyperLogLog distinct-count sketch with 2**precision registers."""
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18.")
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    @staticmethod
+    def _bit_length(values):
+        # frexp is exact for integers below 2**53, so split into 32-bit halves
+        hi = (values >> np.uint64(32)).astype(np.float64)
+        lo = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        return np.where(hi > 0, np.frexp(hi)[1] + 32, np.frexp(lo)[1])
+
+    def update(self, values):
+        values = pd.Series(values)
+        values = values[values.notna()]
+        if values.empty:
+            return self
+        hashes = pd.util.hash_array(values.to_numpy())
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        remainder = hashes << p
+        # Rank of the first set bit in the remaining 64 - p bits
+        rank = (64 - self._bit_length(remainder) + 1).clip(max=64 - self.precision + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * np.log(m / zeros)
+        return raw
+
+
+class StreamingMoments:
+    """Mergeable count, mean, variance, min and max (Chan et al. pairwise update)."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+        chunk = StreamingMoments()
+        chunk.n = len(values)
+        chunk.mean = float(values.mean())
+        chunk.m2 = float(((values - chunk.mean) ** 2).sum())
+        chunk.min = float(values.min())
+        chunk.max = float(values.max())
+        return self.merge(chunk)
+
+    def merge(self, other):
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.mean += delta * other.n / n
+        self.n = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.n - 1))) if self.n > 1 else np.nan
+
+
+class ProfileSketch:
+    """Per-column sketches that build a dataset profile from a stream of chunks."""
+
+    def __init__(self, quantile_k=DEFAULT_QUANTILE_K, hll_precision=DEFAULT_HLL_PRECISION):
+        self.quantile_k = quantile_k
+        self.hll_precision = hll_precision
+        self.rows = 0
+        self.columns = None
+        self.numerical_cols = None
+        self.missing = {}
+        self.moments = {}
+        self.quantile_sketches = {}
+        self.distinct = {}
+        self.category_counts = {}
+
+    def _init_columns(self, columns, numerical_cols):
+        self.columns = list(columns)
+        self.numerical_cols = list(numerical_cols)
+        for col in self.columns:
+            self.missing[col] = 0
+            self.distinct[col] = HyperLogLog(self.hll_precision)
+        for i, col in enumerate(self.numerical_cols):
+            self.moments[col] = StreamingMoments()
+            self.quantile_sketches[col] = KLLSketch(self.quantile_k, seed=i)
+
+    def update(self, chunk):
+        if self.columns is None:
+            self._init_columns(
+                chunk.columns, chunk.select_dtypes(include=np.number).columns)
+        self.rows += len(chunk)
+        missing = chunk.isnull().sum()
+        for col in self.columns:
+            self.missing[col] += int(missing[col])
+            series = chunk[col]
+            if col in self.moments:
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+                self.moments[col].update(values)
+                self.quantile_sketches[col].update(values)
+                self.distinct[col].update(values)
+            elif isinstance(series.dtype, pd.CategoricalDtype):
+                # Category counts are exact and bounded by the number of categories
+                counts = series.value_counts()
+                merged = self.category_counts.setdefault(col, {})
+                for value, count in counts.items():
+                    merged[value] = merged.get(value, 0) + int(count)
+            else:
+                self.distinct[col].update(series)
+        return self
+
+    def merge(self, other):
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self._init_columns(other.columns, other.numerical_cols)
+        self.rows += other.rows
+        for col in self.columns:
+            self.missing[col] += other.missing[col]
+            self.distinct[col].merge(other.distinct[col])
+        for col in self.numerical_cols:
+            self.moments[col].merge(other.moments[col])
+            self.quantile_sketches[col].merge(other.quantile_sketches[col])
+        for col, counts in other.category_counts.items():
+            merged = self.category_counts.setdefault(col, {})
+            for value, count in counts.items():
+                merged[value] = merged.get(value, 0) + count
+        return self
+
+    def to_profile(self, quantiles=(0.25, 0.5, 0.75)):
+        """Build a profile in the same layout as `profiling.compute_profile`."""
+        columns = self.columns or []
+        numerical_cols = self.numerical_cols or []
+        stats = {}
+        for col in numerical_cols:
+            moments = self.moments[col]
+            qs = self.quantile_sketches[col].quantiles(quantiles)
+            stats[col] = [moments.n, moments.mean if moments.n else np.nan, moments.std,
+                          moments.min if moments.n else np.nan, *qs,
+                          moments.max if moments.n else np.nan]
+        index = ["count", "mean", "std", "min"] + \
+            [f"{int(q * 100)}%" for q in quantiles] + ["max"]
+        numeric_stats = pd.DataFrame(stats, index=index, columns=numerical_cols).astype(float)
+
+        cardinality = {}
+        top = {}
+        freq = {}
+        for col in columns:
+            if col in self.category_counts:
+                counts = {k: v for k, v in self.category_counts[col].items() if v > 0}
+                cardinality[col] = len(counts)
+                if counts:
+                    top[col] = max(counts, key=counts.get)
+                    freq[col] = counts[top[col]]
+            else:
+                cardinality[col] = int(round(self.distinct[col].estimate()))
+
+        return {
+            "Rows": self.rows,
+            "Columns": columns,
+            "Numerical Columns": numerical_cols,
+            "Missing Counts": pd.Series(self.missing, dtype="int64").reindex(columns),
+            "Numeric Stats": numeric_stats,
+            "Cardinality": pd.Series(cardinality, dtype="int64").reindex(columns),
+            "Top": top,
+            "Freq": freq,
+            "Mode": "Sketch",
+            "Error Bounds": {
+                "Quantile Rank Error": kll_rank_error(self.quantile_k),
+                "Distinct Count Relative Error": hll_relative_error(self.hll_precision),
+            },
+        }
@@ -0,0 +1,73 @@
+"""Scaling benchmark for column-parallel cleaning on a wide synthetic table.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_parallel_cleaning --rows 50000 --columns 500
+
+Every timed run is checked against the serial result, so the table also
+confirms that the output does not depend on the number of workers.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from application_pages.cleaning import OUTLIER_STRATEGIES, CleaningPipeline
+from application_pages.column_parallel import PARALLEL_BACKENDS
+
+
+def wide_frame(rows, columns, missing_rate, seed):
+    rng = np.random.default_rng(seed)
+    data = rng.lognormal(mean=8, sigma=0.75, size=(columns, rows)).astype(np.float32)
+    data[rng.random(data.shape) < missing_rate] = np.nan
+    return pd.DataFrame({f"feature_{j:04d}": data[j] for j in range(columns)})
+
+
+def run(df, strategy, n_jobs, backend):
+    pipeline = CleaningPipeline({col: "Median" for col in df.columns}, strategy, 1.5, list(df.columns),
+                                n_jobs=n_jobs, backend=backend)
+    start = time.perf_counter()
+    cleaned, report = pipeline.fit_transform(df)
+    return time.perf_counter() - start, cleaned, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--columns", type=int, default=500)
+    parser.add_argument("--missing-rate", type=float, default=0.05)
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--backends", nargs="+", default=PARALLEL_BACKENDS, choices=PARALLEL_BACKENDS)
+    parser.add_argument("--strategy", default="Cap Outliers (IQR Method)",
+                        choices=OUTLIER_STRATEGIES[1:])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    df = wide_frame(args.rows, args.columns, args.missing_rate, args.seed)
+    print(f"{args.rows:,} rows x {args.columns} columns, {os.cpu_count()} cores available, "
+          f"strategy: {args.strategy}")
+
+    _, expected, expected_report = run(df, args.strategy, 1, "thread")
+    job_counts = sorted({1, *[2 ** i for i in range(1, args.max_jobs.bit_length())], args.max_jobs})
+    rows = []
+    for backend in args.backends:
+        baseline = None
+        for n_jobs in job_counts:
+            timings = []
+            for _ in range(args.repeats):
+                seconds, cleaned, report = run(df, args.strategy, n_jobs, backend)
+                if not (cleaned.equals(expected) and report == expected_report):
+                    raise SystemExit(f"{backend} with {n_jobs} workers differs from the serial result")
+                timings.append(seconds)
+            best = min(timings)
+            baseline = baseline or best
+            rows.append({"Backend": backend, "Workers": n_jobs, "Seconds": round(best, 3),
+                         "Speedup": round(baseline / best, 2)})
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app imports application_pages from the repository root, as `streamlit run app.py` does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
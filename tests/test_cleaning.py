@@ -0,0 +1,82 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from application_pages.cleaning import CleaningPipeline, _filled_quantiles
+from application_pages.data_generator import generate_loan_data
+
+
+def wide_frame(rows=5000, columns=6, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.lognormal(mean=8, sigma=0.75, size=(columns, rows)).astype(np.float32)
+    data[rng.random(data.shape) < 0.05] = np.nan
+    return pd.DataFrame({f"feature_{j}": data[j] for j in range(columns)})
+
+
+def serial_cleaning(df, strategies, outlier_strategy, multiplier, columns):
+    """The original column-by-column pandas cleaning from page 4."""
+    cleaned = df.copy()
+    for col, strategy in strategies.items():
+        if strategy == "Median":
+            cleaned[col] = cleaned[col].fillna(cleaned[col].median())
+        elif strategy == "Mean":
+            cleaned[col] = cleaned[col].fillna(cleaned[col].mean())
+    for col in columns:
+        q1, q3 = cleaned[col].quantile(0.25), cleaned[col].quantile(0.75)
+        lower, upper = q1 - multiplier * (q3 - q1), q3 + multiplier * (q3 - q1)
+        if outlier_strategy == "Cap Outliers (IQR Method)":
+            cleaned[col] = np.where(cleaned[col] < lower, lower, cleaned[col])
+            cleaned[col] = np.where(cleaned[col] > upper, upper, cleaned[col])
+        else:
+            cleaned = cleaned[~((cleaned[col] < lower) | (cleaned[col] > upper))]
+    return cleaned.reset_index(drop=True)
+
+
+@pytest.mark.parametrize("frame", [wide_frame(), generate_loan_data(5000, seed=1)], ids=["float32", "loans"])
+@pytest.mark.parametrize("imputation", ["Median", "Mean"])
+@pytest.mark.parametrize("outlier_strategy", ["Cap Outliers (IQR Method)", "Remove Outliers (IQR Method, Sequential)"])
+def test_pipeline_matches_serial_pandas_cleaning(frame, imputation, outlier_strategy):
+    columns = [col for col in frame.columns if frame[col].dtype.kind in "fi"
+               and col not in ("Credit_History", "Loan_Amount_Term")]
+    strategies = {col: imputation for col in columns if frame[col].isna().any()}
+    expected = serial_cleaning(frame, strategies, outlier_strategy, 1.5, columns)
+    cleaned, _ = CleaningPipeline(strategies, outlier_strategy, 1.5, columns).fit_transform(frame)
+    pd.testing.assert_frame_equal(cleaned, expected)
+
+
+@pytest.mark.parametrize("outlier_strategy", ["Cap Outliers (IQR Method)", "Remove Outliers (IQR Method)"])
+def test_output_does_not_depend_on_execution_settings(outlier_strategy):
+    df = wide_frame(columns=8)
+    strategies = {col: "Mean" for col in df.columns}
+    results = [
+        CleaningPipeline(strategies, outlier_strategy, 1.5, list(df.columns),
+                         n_jobs=n_jobs, backend=backend).fit_transform(df)
+        for n_jobs, backend in [(1, "thread"), (3, "thread"), (3, "process")]]
+    for cleaned, report in results[1:]:
+        pd.testing.assert_frame_equal(cleaned, results[0][0])
+        assert report == results[0][1]
+
+
+def test_filled_quantiles_match_numpy():
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        observed = np.sort(rng.integers(0, 6, rng.integers(0, 20)) * 0.37)
+        fill, n_fill = rng.integers(0, 6) * 0.37, int(rng.integers(0, 6))
+        if len(observed) + n_fill == 0:
+            continue
+        expected = np.quantile(np.concatenate([observed, np.full(n_fill, fill)]), [0.25, 0.75])
+        assert _filled_quantiles(observed, np.float64(fill), n_fill, [0.25, 0.75]) == tuple(expected.tolist())
+
+
+def test_all_missing_column_exports_valid_json():
+    df = wide_frame(rows=200, columns=2)
+    df["Empty"] = np.float32(np.nan)
+    pipeline = CleaningPipeline({"Empty": "Median", "feature_0": "Mean"}, "Cap Outliers (IQR Method)", 1.5,
+                                ["Empty", "feature_0"]).fit(df)
+    config = json.loads(pipeline.to_json())
+    assert config["fill_values"]["Empty"] is None
+    assert "Empty" not in pipeline.bounds
+    restored = CleaningPipeline.from_json(pipeline.to_json())
+    pd.testing.assert_frame_equal(restored.transform(df)[0], pipeline.transform(df)[0])
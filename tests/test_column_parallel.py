@@ -0,0 +1,59 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from application_pages import column_parallel
+from application_pages.column_parallel import map_column_groups, process_pool
+
+# Set by the tests in this process only; spawned workers import the module afresh
+STATE = "imported"
+
+
+def _column_sums(group, inputs, shared, outputs, scale):
+    """Scaled masked sums per column, also written as per-column outputs."""
+    results = []
+    for j in group:
+        values = inputs["values"][j]
+        outputs["scaled"][j][...] = values * scale
+        results.append((float(values[shared["mask"]].sum()), os.getpid(), STATE))
+    return results
+
+
+def run(n_jobs, backend, columns):
+    return map_column_groups(
+        _column_sums, {"values": columns}, {"mask": np.arange(len(columns[0])) % 3 == 0},
+        {"scaled": [column.dtype for column in columns]}, (2,), n_jobs=n_jobs, backend=backend)
+
+
+@pytest.fixture
+def columns():
+    rng = np.random.default_rng(0)
+    return [rng.random(1000).astype(dtype) for dtype in (np.float64, np.float32, np.int64, np.float32)]
+
+
+def test_process_backend_matches_serial(columns):
+    expected, expected_outputs = run(1, "thread", columns)
+    results, outputs = run(2, "process", columns)
+    assert [result[0] for result in results] == [result[0] for result in expected]
+    for column, output, expected_output in zip(columns, outputs["scaled"], expected_outputs["scaled"]):
+        assert output.dtype == column.dtype
+        np.testing.assert_array_equal(output, expected_output)
+
+
+def test_process_workers_are_spawned_and_reused(columns, monkeypatch):
+    # Start from no pool, so the workers are created after the parent's state changes
+    monkeypatch.setattr(column_parallel, "_PROCESS_POOL", {"pool": None, "workers": 0})
+    monkeypatch.setattr(sys.modules[__name__], "STATE", "changed in the parent")
+    first, _ = run(2, "process", columns)
+    pool = process_pool(2)
+    try:
+        second, _ = run(2, "process", columns)
+        assert process_pool(1) is pool
+        # Forked workers would have inherited the parent's module state
+        assert {result[2] for result in first + second} == {"imported"}
+        workers = {result[1] for result in first + second}
+        assert os.getpid() not in workers and len(workers) <= 2
+    finally:
+        pool.shutdown()
@@ -0,0 +1,23 @@
+import pandas as pd
+
+from application_pages.data_generator import COLUMN_ORDER, generate_loan_data, iter_loan_data
+
+
+def test_generation_is_seeded():
+    df = generate_loan_data(5000, seed=11, chunk_size=1500)
+    pd.testing.assert_frame_equal(df, generate_loan_data(5000, seed=11, chunk_size=1500))
+    assert not df.equals(generate_loan_data(5000, seed=12, chunk_size=1500))
+    assert list(df.columns) == COLUMN_ORDER
+
+
+def test_assembled_frame_matches_concatenated_chunks():
+    df = generate_loan_data(5000, seed=11, chunk_size=1500)
+    chunks = pd.concat(iter_loan_data(5000, seed=11, chunk_size=1500))
+    for col in COLUMN_ORDER:
+        pd.testing.assert_series_equal(df[col], chunks[col], check_dtype=False, check_categorical=False)
+
+
+def test_loan_ids_are_unique_arrow_strings():
+    ids = generate_loan_data(5000, seed=11)["Loan_ID"]
+    assert ids.dtype == pd.StringDtype("pyarrow") and ids.dtype.storage == "pyarrow"
+    assert ids.is_unique and not ids.isna().any()
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from application_pages.data_generator import generate_loan_data
+from application_pages.drift import (
+    DriftMonitor, binned_ks_statistic, drift_risk_entries, jensen_shannon_divergence, next_risk_number,
+    population_stability_index)
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return generate_loan_data(5_000, seed=11)
+
+
+def test_metrics_match_their_definitions():
+    expected = np.array([120, 300, 0, 80, 500])
+    actual = np.array([200, 150, 40, 0, 610])
+    p, q = expected / expected.sum(), actual / actual.sum()
+
+    # Empty bins are floored at 1e-4 before the logs are taken
+    ps, qs = np.maximum(p, 1e-4), np.maximum(q, 1e-4)
+    assert population_stability_index(expected, actual) == pytest.approx(np.sum((qs - ps) * np.log(qs / ps)))
+
+    m = (p + q) / 2
+    kl_pm = sum(a * np.log2(a / b) for a, b in zip(p, m) if a > 0)
+    kl_qm = sum(a * np.log2(a / b) for a, b in zip(q, m) if a > 0)
+    assert jensen_shannon_divergence(expected, actual) == pytest.approx((kl_pm + kl_qm) / 2)
+
+    assert binned_ks_statistic(expected, actual) == pytest.approx(np.abs(np.cumsum(p) - np.cumsum(q)).max())
+    assert np.isnan(binned_ks_statistic(expected, np.zeros(5)))
+
+
+def test_metrics_of_identical_and_disjoint_distributions():
+    counts = np.array([10, 20, 30, 40])
+    assert population_stability_index(counts, counts * 3) == pytest.approx(0)
+    assert jensen_shannon_divergence(counts, counts * 3) == pytest.approx(0)
+    assert binned_ks_statistic(counts, counts * 3) == pytest.approx(0)
+    # Base-2 JS divergence and KS both reach 1 when the supports do not overlap
+    assert jensen_shannon_divergence(np.array([5, 5, 0, 0]), np.array([0, 0, 5, 5])) == pytest.approx(1)
+    assert binned_ks_statistic(np.array([5, 5, 0, 0]), np.array([0, 0, 5, 5])) == pytest.approx(1)
+
+
+def test_monitor_flags_shifted_features_only(baseline):
+    monitor = DriftMonitor(baseline)
+    assert "Loan_ID" not in monitor.columns
+
+    same = monitor.update(baseline.sample(frac=1, random_state=0))
+    assert not same["Alert"].any()
+    assert same["PSI"].max() == pytest.approx(0, abs=1e-9)
+
+    shifted = baseline.assign(ApplicantIncome=baseline["ApplicantIncome"] * 3,
+                              Property_Area=baseline["Property_Area"].cat.add_categories("Offshore"))
+    shifted.loc[shifted.index[:1000], "Property_Area"] = "Offshore"
+    metrics = monitor.update(shifted)
+    assert set(metrics.index[metrics["Alert"]]) == {"ApplicantIncome", "Property_Area"}
+    assert np.isnan(metrics.loc["Property_Area", "KS"])
+
+    # Pooled counts cover both batches, so the shift is diluted but still visible
+    cumulative = monitor.cumulative_metrics()
+    assert 0 < cumulative.loc["ApplicantIncome", "PSI"] < metrics.loc["ApplicantIncome", "PSI"]
+    assert monitor.history_frame()["Rows"].tolist() == [len(baseline), len(baseline)]
+
+
+def register(risk_ids, names=None):
+    names = names or [f"Risk {i}" for i in range(len(risk_ids))]
+    return pd.DataFrame({"Risk ID": risk_ids, "Risk Name": names, "Status": "Open"})
+
+
+def test_next_risk_number_follows_the_largest_id():
+    assert next_risk_number(register([])) == 1
+    # MR_002 was deleted, and a hand-entered ID jumped ahead
+    assert next_risk_number(register(["MR_001", "MR_003", "MR_010"])) == 11
+    assert next_risk_number(register(["MR_004", "Vendor risk", "MR_002"])) == 5
+    assert next_risk_number(register(["Vendor risk"])) == 1
+
+
+def test_drift_entries_do_not_reuse_risk_ids(baseline):
+    monitor = DriftMonitor(baseline)
+    shifted = baseline.assign(ApplicantIncome=baseline["ApplicantIncome"] * 3,
+                              LoanAmount=baseline["LoanAmount"] * 3)
+    metrics = monitor.update(shifted)
+    existing = register(["MR_001", "MR_004"], names=["Data Drift in LoanAmount", "Gender Bias"])
+    entries = drift_risk_entries(metrics, existing, "Batch 1")
+    # LoanAmount already has an open drift risk
+    assert [entry["Risk Name"] for entry in entries] == ["Data Drift in ApplicantIncome"]
+    assert [entry["Risk ID"] for entry in entries] == ["MR_005"]
@@ -0,0 +1,177 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from application_pages.data_generator import generate_loan_data
+from application_pages.fairness import (
+    bootstrap_dpd, demographic_parity, distribution_disparity, intersectional_cube, permutation_test_dpd,
+    threshold_sweep, _fits_cell_code)
+
+
+ATTRIBUTES = ["Gender", "Married", "Dependents", "Education", "Property_Area"]
+
+
+@pytest.fixture(scope="module")
+def loans():
+    return generate_loan_data(20_000, seed=3)
+
+
+def test_demographic_parity_matches_groupby(loans):
+    results = demographic_parity(loans, ATTRIBUTES, "Loan_Status", "Y")
+    assert set(results) == set(ATTRIBUTES)
+    rows = loans[loans["Loan_Status"].notna()]
+    for attr, result in results.items():
+        rates = (rows["Loan_Status"] == "Y").groupby(rows[attr], observed=True).mean()
+        assert result["Approval Rates"] == pytest.approx(rates.to_dict())
+        assert result["Demographic Parity Difference"] == pytest.approx(rates.max() - rates.min())
+
+
+def high_cardinality_frame(rows=4000, attributes=6, categories=2000, seed=0):
+    """Attributes whose mixed-radix cell codes overflow int64, with some missing values."""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        f"attr_{j}": pd.Series(rng.integers(0, categories, rows)).astype(str).where(rng.random(rows) > 0.05)
+        for j in range(attributes)})
+    frame["Loan_Status"] = np.where(rng.random(rows) < 0.6, "Y", "N")
+    return frame
+
+
+def brute_force_cube(df, attributes, target_column, positive_outcome, min_support, max_order):
+    """One pandas groupby per attribute combination, straight from the rows."""
+    rows = df[df[target_column].notna()]
+    approved = (rows[target_column] == positive_outcome).rename("Approved")
+    frames = []
+    for order in range(1, max_order + 1):
+        for subset in itertools.combinations(attributes, order):
+            grouped = approved.groupby([rows[attr] for attr in subset], dropna=True, observed=True)
+            counts = pd.DataFrame({"Applicants": grouped.size(), "Approvals": grouped.sum()}).reset_index()
+            counts = counts[counts["Applicants"] >= min_support]
+            frames.append(counts.assign(Order=order))
+    expected = pd.concat(frames, ignore_index=True).reindex(columns=attributes + ["Order", "Applicants", "Approvals"])
+    return expected.astype({attr: object for attr in attributes})
+
+
+def sorted_subgroups(subgroups, attributes):
+    table = subgroups[attributes + ["Order", "Applicants", "Approvals"]].copy()
+    table[attributes] = table[attributes].astype(object).where(table[attributes].notna(), "")
+    table = table.astype({"Applicants": np.int64, "Approvals": np.int64})
+    return table.sort_values(list(table.columns), ignore_index=True)
+
+
+@pytest.mark.parametrize("min_support", [1, 30])
+def test_intersectional_cube_matches_groupby(loans, min_support):
+    cube = intersectional_cube(loans, ATTRIBUTES, "Loan_Status", "Y", min_support=min_support)
+    expected = brute_force_cube(loans, ATTRIBUTES, "Loan_Status", "Y", min_support, len(ATTRIBUTES))
+    pd.testing.assert_frame_equal(sorted_subgroups(cube["Subgroups"], ATTRIBUTES),
+                                  sorted_subgroups(expected, ATTRIBUTES))
+    assert cube["Applicants"] == int(loans["Loan_Status"].notna().sum())
+
+
+def test_intersectional_cube_matches_groupby_when_cell_codes_overflow():
+    frame = high_cardinality_frame()
+    attributes = [col for col in frame.columns if col.startswith("attr_")]
+    assert not _fits_cell_code([frame[attr].nunique() + 1 for attr in attributes])
+    cube = intersectional_cube(frame, attributes, "Loan_Status", "Y", min_support=1, max_order=3)
+    expected = brute_force_cube(frame, attributes, "Loan_Status", "Y", 1, 3)
+    pd.testing.assert_frame_equal(sorted_subgroups(cube["Subgroups"], attributes),
+                                  sorted_subgroups(expected, attributes))
+
+
+def test_bootstrap_does_not_depend_on_n_jobs(loans):
+    parity = demographic_parity(loans, ["Property_Area"], "Loan_Status", "Y")["Property_Area"]
+    serial = bootstrap_dpd(parity["Group Counts"], parity["Group Approvals"], replicates=25_000, seed=5)
+    parallel = bootstrap_dpd(parity["Group Counts"], parity["Group Approvals"], replicates=25_000, seed=5, n_jobs=2)
+    assert serial == parallel
+    assert serial["Lower"] <= parity["Demographic Parity Difference"] <= serial["Upper"]
+
+
+def brute_force_sweep(df, attribute, label_column, positive_label, score_column, thresholds, approve_below):
+    """Fairness metrics from explicit per-threshold decisions and pandas groupbys."""
+    rows = df[df[attribute].notna() & df[label_column].notna() & df[score_column].notna()]
+    actual = rows[label_column] == positive_label
+    records = []
+    for threshold in thresholds:
+        approved = rows[score_column] < threshold if approve_below else rows[score_column] >= threshold
+        by_group = pd.DataFrame({"actual": actual, "approved": approved, "group": rows[attribute]}).groupby("group")
+        selection = by_group["approved"].mean()
+        tpr = by_group.apply(lambda g: g["approved"][g["actual"]].mean())
+        fpr = by_group.apply(lambda g: g["approved"][~g["actual"]].mean())
+        precision = by_group.apply(lambda g: g["actual"][g["approved"]].mean())
+        records.append({
+            "Selection Rate": approved.mean(),
+            "Demographic Parity Difference": selection.max() - selection.min(),
+            "Disparate Impact Ratio": selection.min() / selection.max() if selection.max() > 0 else np.nan,
+            "Equal Opportunity Difference": tpr.max() - tpr.min(),
+            "Equalized Odds Difference": max(tpr.max() - tpr.min(), fpr.max() - fpr.min()),
+            "Predictive Parity Difference": precision.max() - precision.min(),
+        })
+    return pd.DataFrame(records, index=pd.Index(np.asarray(thresholds, dtype=np.float64), name="Threshold"))
+
+
+@pytest.mark.parametrize("approve_below", [True, False])
+def test_threshold_sweep_matches_brute_force(loans, approve_below):
+    rng = np.random.default_rng(7)
+    # Scores on a coarse grid, so many applicants sit exactly on a threshold
+    scored = loans.assign(Score=rng.integers(0, 21, len(loans)) / 20)
+    scored.loc[rng.random(len(scored)) < 0.02, "Score"] = np.nan
+    thresholds = np.arange(21) / 20
+    sweep = threshold_sweep(scored, "Property_Area", "Loan_Status", "Y", "Score", thresholds, approve_below)
+    expected = brute_force_sweep(scored, "Property_Area", "Loan_Status", "Y", "Score", thresholds, approve_below)
+    pd.testing.assert_frame_equal(sweep[expected.columns], expected)
+
+
+def test_permutation_test_matches_label_shuffles(loans):
+    sample = loans.iloc[:400]
+    result = permutation_test_dpd(sample, "Dependents", "Loan_Status", "Y", permutations=20_000, seed=1)
+    parity = demographic_parity(sample, ["Dependents"], "Loan_Status", "Y")["Dependents"]
+    assert result["Observed DPD"] == pytest.approx(parity["Demographic Parity Difference"])
+    assert result == permutation_test_dpd(sample, "Dependents", "Loan_Status", "Y", permutations=20_000, seed=1)
+
+    rows = sample[sample["Dependents"].notna() & sample["Loan_Status"].notna()]
+    codes = pd.factorize(rows["Dependents"])[0]
+    approved = (rows["Loan_Status"] == "Y").to_numpy()
+    rng = np.random.default_rng(0)
+    null = []
+    for _ in range(20_000):
+        rates = np.bincount(rng.permutation(codes), weights=approved) / np.bincount(codes)
+        null.append(rates.max() - rates.min())
+    null = np.asarray(null)
+    # Both are Monte Carlo estimates of the same null distribution
+    assert result["Null Mean"] == pytest.approx(null.mean(), abs=4 * null.std() / np.sqrt(len(null)) * np.sqrt(2))
+    p_value = (np.count_nonzero(null >= result["Observed DPD"] - 1e-12) + 1) / (len(null) + 1)
+    assert result["P-Value"] == pytest.approx(p_value, abs=0.02)
+
+
+def reference_disparity(a, b):
+    """KS, Wasserstein-1 and SMD of two samples, evaluating both ECDFs on the pooled values."""
+    a, b = np.sort(a[~np.isnan(a)]), np.sort(b[~np.isnan(b)])
+    pooled = np.unique(np.concatenate([a, b]))
+    gap = np.abs(np.searchsorted(a, pooled, side="right") / len(a) - np.searchsorted(b, pooled, side="right") / len(b))
+    ks = gap.max()
+    wasserstein = (gap[:-1] * np.diff(pooled)).sum()
+    smd = (a.mean() - b.mean()) / np.sqrt((a.var(ddof=1) + b.var(ddof=1)) / 2)
+    return ks, wasserstein, smd
+
+
+@pytest.mark.parametrize("block_elements", [2 ** 24, 1], ids=["one-block", "column-blocks"])
+def test_distribution_disparity_matches_reference(loans, block_elements):
+    features = ["ApplicantIncome", "CoapplicantIncome", "LoanAmount", "Loan_Amount_Term"]
+    table = distribution_disparity(loans, "Property_Area", features, block_elements=block_elements)
+    assert sorted(table["Feature"]) == sorted(features)
+    assert table["KS Statistic"].is_monotonic_decreasing
+
+    rows = loans[loans["Property_Area"].notna()]
+    groups = list(pd.unique(rows["Property_Area"]))
+    for result in table.to_dict("records"):
+        values = rows[result["Feature"]].to_numpy(np.float64, na_value=np.nan)
+        stats = {
+            (g, h): reference_disparity(values[(rows["Property_Area"] == g).to_numpy()],
+                                        values[(rows["Property_Area"] == h).to_numpy()])
+            for g, h in itertools.combinations(groups, 2)}
+        worst = max(stats, key=lambda pair: stats[pair][0])
+        assert result["KS Statistic"] == pytest.approx(stats[worst][0])
+        assert set(result["Groups"].split(" vs ")) == set(worst)
+        assert result["Wasserstein Distance"] == pytest.approx(max(s[1] for s in stats.values()))
+        assert result["Standardized Mean Difference"] == pytest.approx(max(abs(s[2]) for s in stats.values()))
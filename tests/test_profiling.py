@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from application_pages.data_generator import generate_loan_data
+from application_pages.profiling import dataset_fingerprint
+
+
+def test_fingerprint_depends_only_on_content():
+    df = generate_loan_data(2000, seed=5)
+    assert dataset_fingerprint(df) == dataset_fingerprint(df.copy())
+    assert dataset_fingerprint(df) != dataset_fingerprint(generate_loan_data(2000, seed=6))
+
+
+def test_fingerprint_sees_text_edits_and_missing_values():
+    df = generate_loan_data(2000, seed=5)
+    fingerprint = dataset_fingerprint(df)
+    for value in ["LP999999", "", None]:
+        edited = df.copy()
+        edited.loc[17, "Loan_ID"] = value
+        assert dataset_fingerprint(edited) != fingerprint
+    as_object = df.astype({"Loan_ID": object})
+    blank, missing = as_object.copy(), as_object.copy()
+    blank.loc[3, "Loan_ID"], missing.loc[3, "Loan_ID"] = "", np.nan
+    assert len({dataset_fingerprint(as_object), dataset_fingerprint(blank), dataset_fingerprint(missing)}) == 3
+
+
+def test_fingerprint_does_not_depend_on_arrow_chunking():
+    ids = pd.Series(["LP001", None, "LP003", "", None, "LP006"] * 50, dtype=pd.StringDtype("pyarrow"))
+    chunked = pd.concat([ids.iloc[:71], ids.iloc[71:]], ignore_index=True)
+    sliced = pd.concat([ids.iloc[:1], ids], ignore_index=True).iloc[1:].reset_index(drop=True)
+    fingerprints = {dataset_fingerprint(pd.DataFrame({"Loan_ID": values})) for values in (ids, chunked, sliced)}
+    assert len(fingerprints) == 1
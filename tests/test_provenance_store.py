@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+from application_pages.provenance_store import (
+    PROVENANCE_COLUMNS, ProvenanceStore, SQLiteProvenanceBackend, entry_hash)
+
+
+def entries(count, prefix="Event"):
+    return [{"Timestamp": f"2024-01-01 00:{i // 60:02d}:{i % 60:02d}", "Action": f"{prefix} {i % 3}",
+             "Description": f"{prefix} number {i}"} for i in range(count)]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "provenance.db")
+
+
+@pytest.mark.parametrize("persisted", [False, True], ids=["memory", "sqlite"])
+def test_queries_match_filtering_the_frame(db_path, persisted):
+    store = ProvenanceStore(SQLiteProvenanceBackend(db_path) if persisted else None, flush_size=7)
+    logged = entries(100)
+    for i, entry in enumerate(logged):
+        store.append(dict(entry, User=f"User {i % 4}"))
+    # Appending one at a time extends the cached frame rather than rebuilding it
+    assert len(store.to_frame()) == 100
+    store.extend(entries(3, prefix="Batch"))
+
+    frame = pd.DataFrame(
+        [dict(e, User=f"User {i % 4}") for i, e in enumerate(logged)]
+        + [dict(e, User="Risk_Manager_001") for e in entries(3, prefix="Batch")], columns=PROVENANCE_COLUMNS)
+    pd.testing.assert_frame_equal(store.to_frame(), frame)
+    assert store.last() == frame.iloc[-1].to_dict()
+
+    for action, user, start, end in [
+            ("Event 1", None, None, None), (None, ["User 0", "User 2"], None, None),
+            (["Event 0", "Batch 1"], "User 0", None, None), (None, None, "2024-01-01 00:00:30", "2024-01-01 00:01:05"),
+            ("Event 2", "User 3", "2024-01-01 00:00:20", None)]:
+        expected = frame
+        if action is not None:
+            expected = expected[expected["Action"].isin([action] if isinstance(action, str) else action)]
+        if user is not None:
+            expected = expected[expected["User"].isin([user] if isinstance(user, str) else user)]
+        if start is not None:
+            expected = expected[expected["Timestamp"] >= start]
+        if end is not None:
+            expected = expected[expected["Timestamp"] <= end]
+        result = store.query(action, user, start, end)
+        pd.testing.assert_frame_equal(result.reset_index(drop=True), expected.reset_index(drop=True))
+
+
+def test_stored_log_is_reloaded(db_path):
+    store = ProvenanceStore(SQLiteProvenanceBackend(db_path), flush_size=8)
+    store.extend(entries(20))
+    store.append(entries(1, prefix="Tail")[0])
+    store.flush()
+    reloaded = ProvenanceStore(SQLiteProvenanceBackend(db_path))
+    pd.testing.assert_frame_equal(reloaded.to_frame(), store.to_frame())
+
+
+def test_untouched_chain_verifies():
+    store = ProvenanceStore(checkpoint_interval=8)
+    store.extend(entries(30))
+    report = store.verify()
+    assert report["Valid"] and report["Entries Verified"] == 30
+    assert len(store.checkpoints) == 3
+    assert store.verify(from_checkpoint=-1)["Entries Verified"] == 6
+
+
+def test_edited_entry_breaks_the_chain_from_that_point():
+    store = ProvenanceStore(checkpoint_interval=8)
+    store.extend(entries(30))
+    store._columns["Description"][12] = "Edited after the fact"
+    report = store.verify()
+    assert not report["Valid"]
+    assert report["First Invalid Entry"] == 12
+    assert report["Entries Verified"] == 12
+
+
+def test_replaced_hash_fails_its_checkpoint():
+    store = ProvenanceStore(checkpoint_interval=8)
+    store.extend(entries(30))
+    # Rechaining from the edit onwards keeps the chain consistent but not the checkpoint block
+    store._columns["Description"][20] = "Edited after the fact"
+    for position in range(20, 30):
+        entry = {col: values[position] for col, values in store._columns.items()}
+        store._hashes[position] = entry_hash(store._hashes[position - 1], entry)
+    report = store.verify()
+    assert report["First Invalid Entry"] is None
+    assert report["Invalid Checkpoints"] == [24]
+    assert not report["Valid"]
+
+
+def test_tampered_database_row_is_detected_on_reload(db_path):
+    store = ProvenanceStore(SQLiteProvenanceBackend(db_path))
+    store.extend(entries(20))
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE provenance_logs SET description = 'Rewritten' WHERE id = 8")
+    report = ProvenanceStore(SQLiteProvenanceBackend(db_path)).verify()
+    assert not report["Valid"]
+    assert report["First Invalid Entry"] == 7
+
+
+def test_stripped_hash_is_reported_not_recomputed(db_path):
+    store = ProvenanceStore(SQLiteProvenanceBackend(db_path))
+    store.extend(entries(20))
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE provenance_logs SET entry_hash = NULL WHERE id = 5")
+    report = ProvenanceStore(SQLiteProvenanceBackend(db_path)).verify()
+    assert not report["Valid"]
+    assert report["Entries Missing Hash"] == [4]
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT entry_hash FROM provenance_logs WHERE id = 5").fetchone()[0] is None
+
+
+def test_legacy_rows_are_backfilled_once(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE provenance_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "timestamp TEXT NOT NULL, action TEXT NOT NULL, description TEXT, user TEXT)")
+        conn.executemany(
+            "INSERT INTO provenance_logs (timestamp, action, description, user) VALUES (?, ?, ?, ?)",
+            [(e["Timestamp"], e["Action"], e["Description"], "Legacy_User") for e in entries(10)])
+    store = ProvenanceStore(SQLiteProvenanceBackend(db_path))
+    assert store.verify()["Valid"] and len(store) == 10
+    store.extend(entries(5, prefix="New"))
+
+    reloaded = ProvenanceStore(SQLiteProvenanceBackend(db_path))
+    assert len(reloaded) == 15 and reloaded.head == store.head
+    assert reloaded.verify()["Valid"]
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM provenance_logs WHERE entry_hash IS NULL").fetchone()[0] == 0
+        # The backfill window is closed, so a later NULL hash is tampering rather than legacy data
+        conn.execute("UPDATE provenance_logs SET entry_hash = NULL WHERE id = 2")
+    assert ProvenanceStore(SQLiteProvenanceBackend(db_path)).verify()["Entries Missing Hash"] == [1]
+
+
+def test_sessions_sharing_a_database_keep_one_chain(db_path):
+    stores = [ProvenanceStore(SQLiteProvenanceBackend(db_path), flush_size=1, checkpoint_interval=16)
+              for _ in range(4)]
+
+    def log(store, worker):
+        for entry in entries(50, prefix=f"Worker {worker}"):
+            store.append(entry)
+
+    threads = [threading.Thread(target=log, args=(store, i)) for i, store in enumerate(stores)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reloaded = ProvenanceStore(SQLiteProvenanceBackend(db_path), checkpoint_interval=16)
+    assert len(reloaded) == 200
+    assert reloaded.verify()["Valid"]
+    assert len(reloaded.checkpoints) == 12
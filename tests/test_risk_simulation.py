@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from application_pages import risk_simulation
+from application_pages.data_generator import generate_loan_data
+from application_pages.risk_simulation import (
+    SCORE_BINS, SCORE_QUANTILES, _histogram_quantiles, applicant_inputs, mock_risk_score, monte_carlo_simulation)
+
+
+@pytest.fixture(scope="module")
+def loans():
+    return generate_loan_data(3000, seed=4)
+
+
+def simulate(df, scenarios=300, seed=0, noise=(10, 10, 0.05)):
+    return monte_carlo_simulation(df, scenarios, *noise, human_review_threshold=0.3, seed=seed)
+
+
+@pytest.mark.parametrize("block_cells", [2 ** 22, 64 * SCORE_BINS], ids=["one-block", "applicant-blocks"])
+def test_simulation_is_reproducible_for_a_seed(loans, monkeypatch, block_cells):
+    monkeypatch.setattr(risk_simulation, "APPLICANT_BLOCK_CELLS", block_cells)
+    applicants, details = simulate(loans, seed=7)
+    again, again_details = simulate(loans, seed=7)
+    pd.testing.assert_frame_equal(applicants, again)
+    for key in ["Flagged Counts", "Approved Counts"]:
+        np.testing.assert_array_equal(details[key], again_details[key])
+    assert details["Summary"] == again_details["Summary"]
+    assert not applicants.equals(simulate(loans, seed=8)[0])
+
+    # Per-scenario counts and per-applicant flag probabilities count the same flags
+    flags = np.nansum(applicants["Flag Probability"] * details["Summary"]["Scenarios"])
+    assert details["Flagged Counts"].sum() == pytest.approx(flags)
+
+
+def test_histogram_quantiles_are_within_a_bin_of_the_sample_quantiles():
+    rng = np.random.default_rng(0)
+    samples = np.stack([rng.beta(2, 5, 2000), rng.uniform(0, 1, 2000), np.clip(rng.normal(0.6, 0.1, 2000), 0, 1)])
+    bins = np.minimum((samples * SCORE_BINS).astype(np.intp), SCORE_BINS - 1)
+    histogram = np.stack([np.bincount(row, minlength=SCORE_BINS) for row in bins]).astype(np.uint16)
+    result = _histogram_quantiles(histogram, SCORE_QUANTILES)
+    expected = np.quantile(samples, SCORE_QUANTILES, axis=1).T
+    np.testing.assert_allclose(result, expected, atol=1 / SCORE_BINS)
+    assert np.isnan(_histogram_quantiles(np.zeros((1, SCORE_BINS), dtype=np.uint16), SCORE_QUANTILES)).all()
+
+
+def test_noise_free_simulation_reproduces_the_point_scores(loans, monkeypatch):
+    monkeypatch.setattr(risk_simulation, "APPLICANT_BLOCK_CELLS", 64 * SCORE_BINS)
+    applicants, details = simulate(loans, scenarios=50, noise=(0, 0, 0.0))
+    scores = mock_risk_score(**applicant_inputs(loans))
+    known = ~np.isnan(scores)
+    np.testing.assert_allclose(applicants["Mean Risk Score"][known], scores[known])
+    np.testing.assert_array_equal(applicants["Flag Probability"][known], (scores[known] > 0.3).astype(float))
+    for q in SCORE_QUANTILES:
+        np.testing.assert_allclose(applicants[f"Risk Score P{int(q * 100):02d}"][known], scores[known],
+                                   atol=1 / SCORE_BINS)
+    assert applicants.loc[~known].isna().all().all()
+    assert (details["Flagged Counts"] == int((scores[known] > 0.3).sum())).all()
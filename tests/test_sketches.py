@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from application_pages.sketches import HyperLogLog, KLLSketch, StreamingMoments, hll_relative_error, kll_rank_error
+
+
+QUANTILES = np.linspace(0, 1, 201)
+
+
+def distributions(rows=60_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "uniform": rng.random(rows),
+        "lognormal": rng.lognormal(0, 2, rows),
+        # Heavy ties, like loan terms or dependants
+        "ties": rng.choice([0.0, 1.0, 2.0, 3.0, 360.0], rows, p=[0.5, 0.2, 0.15, 0.1, 0.05]),
+        "sorted": np.arange(rows, dtype=np.float64),
+    }
+
+
+def rank_error(data, estimates, qs=QUANTILES):
+    """Largest distance between each requested quantile and the true rank range of its estimate."""
+    data = np.sort(data)
+    lower = np.searchsorted(data, estimates, side="left") / len(data)
+    upper = np.searchsorted(data, estimates, side="right") / len(data)
+    return float(np.max(np.maximum(lower - qs, 0) + np.maximum(qs - upper, 0)))
+
+
+@pytest.mark.parametrize("name", ["uniform", "lognormal", "ties", "sorted"])
+def test_kll_quantiles_stay_within_the_rank_error_bound(name):
+    data = distributions()[name]
+    k = 100
+    errors = []
+    for seed in range(10):
+        sketch = KLLSketch(k, seed=seed)
+        for start in range(0, len(data), 2_000):
+            sketch.update(data[start:start + 2_000])
+        assert sketch.n == len(data)
+        assert sum(len(items) for items in sketch.levels) <= 3 * k + 8 * len(sketch.levels)
+        errors.append(rank_error(data, sketch.quantiles(QUANTILES)))
+    assert max(errors) <= kll_rank_error(k)
+    # The bound holds with high probability, so a typical sketch sits well inside it
+    assert np.mean(errors) <= kll_rank_error(k) / 2
+
+
+@pytest.mark.parametrize("name", ["uniform", "lognormal", "ties"])
+def test_merged_kll_sketches_stay_within_the_rank_error_bound(name):
+    data = distributions()[name]
+    k = 100
+    parts = [KLLSketch(k, seed=i).update(chunk) for i, chunk in enumerate(np.array_split(data, 16))]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    assert merged.n == len(data)
+    assert rank_error(data, merged.quantiles(QUANTILES)) <= kll_rank_error(k)
+    assert merged.quantiles([0, 1]).tolist() == [data.min(), data.max()]
+
+
+def test_kll_edge_cases():
+    assert np.isnan(KLLSketch().quantiles([0.5])).all()
+    sketch = KLLSketch().update([np.nan, 3.0, np.nan, 1.0])
+    assert sketch.n == 2
+    assert sketch.quantiles([0, 0.5, 1]).tolist() == [1.0, 1.0, 3.0]
+    with pytest.raises(ValueError):
+        KLLSketch(k=100).merge(KLLSketch(k=200))
+
+
+@pytest.mark.parametrize("precision", [10, 12])
+@pytest.mark.parametrize("distinct", [50, 5_000, 300_000])
+def test_hll_cardinality_is_within_a_few_standard_errors(precision, distinct):
+    rng = np.random.default_rng(distinct)
+    values = rng.permutation(distinct).astype(np.float64)
+    # Every value is seen three times in shuffled batches
+    stream = rng.permutation(np.tile(values, 3))
+    sketch = HyperLogLog(precision)
+    for chunk in np.array_split(stream, 7):
+        sketch.update(chunk)
+    assert abs(sketch.estimate() / distinct - 1) <= 3 * hll_relative_error(precision)
+
+
+def test_merged_hll_matches_one_sketch_of_the_union():
+    rng = np.random.default_rng(1)
+    left, right = rng.integers(0, 40_000, 50_000), rng.integers(20_000, 60_000, 50_000)
+    merged = HyperLogLog().update(left).merge(HyperLogLog().update(right))
+    union = HyperLogLog().update(np.concatenate([left, right]))
+    np.testing.assert_array_equal(merged.registers, union.registers)
+    # Strings and missing values are hashed too; missing values are not counted
+    assert HyperLogLog().update(["a", "b", None, "a"]).estimate() == pytest.approx(2, abs=0.01)
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(12))
+
+
+def test_streaming_moments_match_numpy():
+    data = distributions()["lognormal"]
+    moments = StreamingMoments()
+    for chunk in np.array_split(data, 9):
+        moments.update(chunk)
+    assert moments.n == len(data)
+    assert moments.mean == pytest.approx(data.mean())
+    assert moments.std == pytest.approx(data.std(ddof=1))
+    assert (moments.min, moments.max) == (data.min(), data.max())